@@ -0,0 +1,152 @@
+"""
+Versiones asíncronas (ASGI) de los endpoints del Dashboard de Misión y del BSC.
+
+Las consultas independientes se lanzan en paralelo en un pool de hilos propio
+(``ASYNC_DB_THREADS``), cada una con la conexión a project_dss de su hilo, y
+el cálculo EVM se ejecuta fuera del event loop. Devuelven exactamente el mismo
+JSON que las vistas síncronas.
+"""
+import asyncio
+import contextvars
+import functools
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+from django.utils.timezone import now
+from rest_framework import exceptions
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+
+from core.db_routers import read_alias
+
+from .views import (
+    BSC_EVM_SQL, BSC_RISK_SQL, BSC_QUALITY_SQL, BSC_TIME_SQL, BSC_CAPACITY_SQL,
+    build_bsc_perspectives, compute_mission_kpis,
+    latest_snapshot_progress, project_financials, task_planned_hours,
+)
+
+
+def _json_response(data, status=200):
+    return HttpResponse(JSONRenderer().render(data), status=status, content_type='application/json')
+
+
+def _authenticate(request):
+    """Aplica las mismas clases de autenticación configuradas en DRF."""
+    for auth_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        result = auth_class().authenticate(request)
+        if result is not None:
+            return result[0]
+    return None
+
+
+def _unauthorized(request, data):
+    response = _json_response(data, status=401)
+    auth_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    if auth_classes:
+        response['WWW-Authenticate'] = auth_classes[0]().authenticate_header(request)
+    return response
+
+
+def async_api_view(view):
+    """Exige GET y un usuario autenticado (equivalente a IsAuthenticated)."""
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method != 'GET':
+            detail = exceptions.MethodNotAllowed(request.method).detail
+            return _json_response({'detail': detail}, status=405)
+
+        try:
+            user = await sync_to_async(_authenticate)(request)
+        except exceptions.AuthenticationFailed as e:
+            data = e.detail if isinstance(e.detail, (list, dict)) else {'detail': e.detail}
+            return _unauthorized(request, data)
+
+        if user is None or not user.is_authenticated:
+            return _unauthorized(request, {'detail': exceptions.NotAuthenticated.default_detail})
+
+        request.user = user
+        try:
+            return await view(request, *args, **kwargs)
+        except Exception as e:
+            traceback.print_exc()
+            return _json_response({"error": str(e)}, status=500)
+
+    return wrapper
+
+
+# Hilos de las consultas. Cada uno conserva sus conexiones entre peticiones
+# (como un hilo de WSGI con CONN_MAX_AGE), así que no se paga el handshake con
+# la base en cada consulta y hay a lo sumo ASYNC_DB_THREADS por base y worker.
+_db_executor = ThreadPoolExecutor(max_workers=settings.ASYNC_DB_THREADS, thread_name_prefix='async-db')
+
+
+def _close_old_connections():
+    # Lo que hacen request_started / request_finished en los hilos de Django,
+    # que los del pool no reciben: cierra las caídas, con error o vencidas
+    for connection in connections.all(initialized_only=True):
+        connection.close_if_unusable_or_obsolete()
+
+
+def _in_worker_thread(func):
+    """
+    Ejecuta ``func`` en un hilo de ``_db_executor`` (no en el hilo compartido
+    de Django) para que varias consultas avancen a la vez, cada una con la
+    conexión persistente de su hilo. Conserva el contexto de la petición (la
+    réplica fijada por el router).
+    """
+    def run(*args):
+        _close_old_connections()
+        try:
+            return func(*args)
+        finally:
+            _close_old_connections()
+
+    async def call(*args):
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(_db_executor, context.run, run, *args)
+
+    return call
+
+
+def _fetch_row(sql, params=None):
+    with connections[read_alias('project_dss')].cursor() as cursor:
+        cursor.execute(sql, params or {})
+        columns = [col[0] for col in cursor.description]
+        return dict(zip(columns, cursor.fetchone()))
+
+
+@async_api_view
+async def bsc_dashboard(request):
+    params = {'today': now().date(), 'start_date': now().date() - timedelta(days=30)}
+    fetch = _in_worker_thread(_fetch_row)
+
+    rows = await asyncio.gather(
+        fetch(BSC_EVM_SQL, params),
+        fetch(BSC_RISK_SQL),
+        fetch(BSC_QUALITY_SQL),
+        fetch(BSC_TIME_SQL, params),
+        fetch(BSC_CAPACITY_SQL),
+    )
+    totals = {}
+    for row in rows:
+        totals.update(row)
+
+    return _json_response(build_bsc_perspectives(totals))
+
+
+@async_api_view
+async def mission_kpis(request):
+    snapshots, financials, tasks = await asyncio.gather(
+        _in_worker_thread(latest_snapshot_progress)(),
+        _in_worker_thread(project_financials)(),
+        _in_worker_thread(task_planned_hours)(),
+    )
+
+    # El cálculo EVM recorre todas las tareas: fuera del event loop
+    results = await asyncio.to_thread(compute_mission_kpis, financials, tasks, snapshots)
+    return _json_response(results)
@@ -0,0 +1,200 @@
+"""
+Tendencia del backlog de defectos sobre ``dwh.fact_defect_summary``.
+
+Una sola consulta arma la serie de cada grupo (portafolio o proyecto):
+
+- El calendario (``dim_date``) da los periodos del rango según la
+  granularidad (día / semana / mes), también los que no tuvieron defectos.
+- Si hay más periodos que ``max_points``, se agrupan de ``stride`` en
+  ``stride`` consecutivos: los flujos (nuevos, resueltos, días de resolución)
+  se suman y el backlog es el del cierre de cada punto.
+- ``stride``, ``date_from`` y ``date_to`` de la respuesta salen de la misma
+  consulta: son los de los periodos que hay en ``dim_date``, no los pedidos.
+- El backlog abierto es el saldo previo al rango más la suma acumulada
+  (``SUM() OVER``) de nuevos - resueltos.
+- MTTR: días promedio de detección a resolución de los defectos resueltos en
+  el punto (``resolution_days`` lo calcula el ETL).
+"""
+from datetime import timedelta
+
+from django.db import connections
+
+from core.db_routers import read_alias
+
+from .utilization import next_period_start, period_start
+
+# Rango por defecto (días hacia atrás desde date_to) según la granularidad; lo aplica DefectTrendInputSerializer
+DEFAULT_WINDOW_DAYS = {'day': 90, 'week': 365, 'month': 3 * 365}
+
+DEFECT_TREND_SQL = """
+    WITH daily AS (
+        SELECT {group_column} AS group_id, f.date_key,
+               SUM(f.defect_count_new) AS new,
+               SUM(f.defect_count_resolved) AS resolved,
+               SUM(COALESCE(f.resolution_days, 0)) AS resolution_days
+        FROM dwh.fact_defect_summary f
+        JOIN dwh.dim_project p ON p.project_key = f.project_key
+        WHERE f.date_key <= %(date_to)s
+          AND (%(project)s::int IS NULL OR p.project_id = %(project)s)
+          AND (%(client)s::int IS NULL OR p.client_id = %(client)s)
+        GROUP BY 1, 2
+    ),
+    opening AS (
+        SELECT group_id, SUM(new - resolved) AS backlog
+        FROM daily
+        WHERE date_key < %(date_from)s
+        GROUP BY 1
+    ),
+    periods AS (
+        SELECT date_trunc(%(grain)s, d.date_key)::date AS period_start, COUNT(*)::int AS days,
+               MIN(d.date_key) AS first_day, MAX(d.date_key) AS last_day
+        FROM dwh.dim_date d
+        WHERE d.date_key BETWEEN %(date_from)s AND %(date_to)s
+        GROUP BY 1
+    ),
+    points AS (
+        SELECT k.*, (ROW_NUMBER() OVER (ORDER BY period_start) - 1) / stride AS point
+        FROM (
+            SELECT periods.*, CEIL(COUNT(*) OVER () / %(max_points)s::numeric)::int AS stride
+            FROM periods
+        ) k
+    ),
+    -- Días del calendario que cubren los puntos (una fila aunque el rango quede fuera de dim_date)
+    span AS (
+        SELECT MIN(first_day) AS first_day, MAX(last_day) AS last_day, MAX(stride) AS stride
+        FROM points
+    ),
+    period_flows AS (
+        SELECT group_id, date_trunc(%(grain)s, date_key)::date AS period_start,
+               SUM(new) AS new, SUM(resolved) AS resolved, SUM(resolution_days) AS resolution_days
+        FROM daily
+        WHERE date_key >= %(date_from)s
+        GROUP BY 1, 2
+    ),
+    flows AS (
+        SELECT g.group_id, k.point,
+               MIN(k.period_start) AS period_start,
+               SUM(k.days)::int AS days,
+               COALESCE(SUM(pf.new), 0) AS new,
+               COALESCE(SUM(pf.resolved), 0) AS resolved,
+               COALESCE(SUM(pf.resolution_days), 0) AS resolution_days
+        FROM (SELECT DISTINCT group_id FROM daily) g
+        CROSS JOIN points k
+        LEFT JOIN period_flows pf ON pf.group_id = g.group_id AND pf.period_start = k.period_start
+        GROUP BY 1, 2
+    ),
+    series AS (
+        SELECT fl.*,
+               COALESCE(o.backlog, 0)
+                   + SUM(fl.new - fl.resolved) OVER (PARTITION BY fl.group_id ORDER BY fl.point) AS backlog
+        FROM flows fl
+        LEFT JOIN opening o ON o.group_id = fl.group_id
+    ),
+    ranked AS (
+        SELECT s.*,
+               DENSE_RANK() OVER (ORDER BY s.final_backlog DESC, s.group_id) AS group_rank
+        FROM (
+            SELECT series.*,
+                   FIRST_VALUE(backlog) OVER (PARTITION BY group_id ORDER BY point DESC) AS final_backlog
+            FROM series
+        ) s
+    )
+    SELECT s.first_day, s.last_day, s.stride,
+           r.group_id, p.name AS project_name, r.period_start, r.days,
+           r.new, r.resolved, r.resolution_days, r.backlog
+    FROM span s
+    LEFT JOIN ranked r ON r.group_rank <= %(limit)s
+    LEFT JOIN dwh.dim_project p ON p.project_id = r.group_id AND %(by_project)s
+    ORDER BY r.group_rank, r.period_start
+"""
+
+GROUP_COLUMNS = {'portfolio': '0', 'project': 'p.project_id'}
+
+
+def _align(grain, date_from, date_to):
+    """Periodos completos: del inicio del periodo de date_from al fin del de date_to."""
+    if grain == 'day':
+        return date_from, date_to
+    return period_start(grain, date_from), next_period_start(grain, date_to) - timedelta(days=1)
+
+
+def _mttr(resolution_days, resolved):
+    return round(resolution_days / resolved, 1) if resolved else None
+
+
+def _point(row):
+    days = row['days']
+    new, resolved = int(row['new']), int(row['resolved'])
+    return {
+        'period_start': row['period_start'],
+        'days': days,
+        'new': new,
+        'resolved': resolved,
+        'arrival_rate': round(new / days, 3),
+        'resolution_rate': round(resolved / days, 3),
+        'backlog': int(row['backlog']),
+        'mttr_days': _mttr(int(row['resolution_days']), resolved),
+    }
+
+
+def defect_trend(params):
+    """Serie del backlog de defectos para los parámetros ya validados."""
+    grain, group_by = params['grain'], params['group_by']
+    date_from, date_to = _align(grain, params['date_from'], params['date_to'])
+
+    query = {
+        'grain': grain,
+        'date_from': date_from,
+        'date_to': date_to,
+        'project': params.get('project'),
+        'client': params.get('client'),
+        'max_points': params['max_points'],
+        'limit': params['limit'],
+        'by_project': group_by == 'project',
+    }
+    sql = DEFECT_TREND_SQL.format(group_column=GROUP_COLUMNS[group_by])
+    with connections[read_alias('project_dss')].cursor() as cursor:
+        cursor.execute(sql, query)
+        columns = [col[0] for col in cursor.description]
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    # El rango y el agrupamiento que se devuelven son los de los puntos: los
+    # periodos que están en dim_date, no el rango pedido
+    span = rows[0]
+    if span['stride'] is not None:
+        date_from, date_to = span['first_day'], span['last_day']
+
+    series = {}
+    for row in rows:
+        if row['period_start'] is None:
+            continue
+        item = series.get(row['group_id'])
+        if item is None:
+            item = series[row['group_id']] = {'points': [], '_resolution_days': 0}
+            if group_by == 'project':
+                item.update(project_id=row['group_id'], project_name=row['project_name'])
+        item['points'].append(_point(row))
+        item['_resolution_days'] += int(row['resolution_days'])
+
+    result = []
+    for item in series.values():
+        points, resolution_days = item['points'], item.pop('_resolution_days')
+        new = sum(point['new'] for point in points)
+        resolved = sum(point['resolved'] for point in points)
+        item['totals'] = {
+            'new': new,
+            'resolved': resolved,
+            'backlog': points[-1]['backlog'],
+            'mttr_days': _mttr(resolution_days, resolved),
+        }
+        result.append(item)
+
+    return {
+        'grain': grain,
+        'group_by': group_by,
+        'date_from': date_from,
+        'date_to': date_to,
+        # Periodos de la granularidad que agrupa cada punto
+        'stride': span['stride'] or 1,
+        'series': result,
+    }
@@ -0,0 +1,104 @@
+"""
+Bitácora de ejecuciones del ETL (``dwh.etl_run_log``).
+
+El ETL corre como comando aparte, así que sus métricas no viven en el proceso
+web: cada corrida deja una fila con su duración y las filas cargadas por
+tabla, y el endpoint /metrics lee la última. El run_id de la última corrida
+sirve además como versión del DWH para las cachés de los endpoints de
+análisis (``dwh_version``).
+"""
+import json
+
+from django.db import ProgrammingError, connections
+from sqlalchemy import text
+
+ETL_RUN_LOG_DDL = """
+    CREATE TABLE IF NOT EXISTS dwh.etl_run_log (
+        run_id serial PRIMARY KEY,
+        started_at timestamptz NOT NULL,
+        finished_at timestamptz NOT NULL,
+        duration_seconds double precision NOT NULL,
+        success boolean NOT NULL,
+        row_counts jsonb NOT NULL DEFAULT '{}'::jsonb
+    )
+"""
+
+# SQLSTATE undefined_table: el ETL todavía no creó la bitácora
+UNDEFINED_TABLE = '42P01'
+
+# Tablas del DWH que carga el ETL (se reportan sus filas al terminar)
+LOADED_TABLES = [
+    'dim_status', 'dim_project', 'dim_employee', 'dim_client', 'dim_resource', 'dim_task',
+    'fact_timelog', 'fact_budget', 'fact_defect_summary', 'fact_risk', 'fact_resource',
+    'fact_progress_snapshot', 'agg_bsc_monthly', 'agg_timelog_employee_week', 'agg_timelog_project_month',
+]
+
+
+def count_loaded_rows(conn):
+    sql = ' UNION ALL '.join(
+        f"SELECT '{table}', COUNT(*) FROM dwh.{table}" for table in LOADED_TABLES
+    )
+    return {table: count for table, count in conn.execute(text(sql))}
+
+
+def record_run(engine, started_at, finished_at, success, row_counts):
+    """Registra una corrida del ETL (conexión SQLAlchemy al DWH)."""
+    with engine.connect() as conn:
+        conn.execute(text(ETL_RUN_LOG_DDL))
+        conn.execute(
+            text(
+                "INSERT INTO dwh.etl_run_log (started_at, finished_at, duration_seconds, success, row_counts) "
+                "VALUES (:started_at, :finished_at, :duration, :success, CAST(:row_counts AS jsonb))"
+            ),
+            {
+                'started_at': started_at,
+                'finished_at': finished_at,
+                'duration': (finished_at - started_at).total_seconds(),
+                'success': success,
+                'row_counts': json.dumps(row_counts),
+            },
+        )
+        conn.commit()
+
+
+def dwh_version(using='project_dss'):
+    """
+    run_id de la última corrida del ETL (cambia con cada carga), o None sin
+    bitácora. Es una sola consulta: PostgreSQL resuelve las tablas al planear,
+    así que un CASE con to_regclass no evita el error si la tabla no existe y
+    se atiende ese error. Las lecturas del DSS van en autocommit (fuera de una
+    transacción que el error dejaría abortada).
+    """
+    try:
+        with connections[using].cursor() as cursor:
+            cursor.execute("SELECT MAX(run_id) FROM dwh.etl_run_log")
+            return cursor.fetchone()[0]
+    except ProgrammingError as exc:
+        if getattr(exc.__cause__, 'pgcode', None) != UNDEFINED_TABLE:
+            raise
+        return None
+
+
+def latest_run():
+    """Última corrida registrada, o None si el ETL nunca ha dejado bitácora."""
+    with connections['project_dss'].cursor() as cursor:
+        cursor.execute("SELECT to_regclass('dwh.etl_run_log') IS NOT NULL")
+        if not cursor.fetchone()[0]:
+            return None
+        cursor.execute(
+            "SELECT run_id, finished_at, duration_seconds, success, row_counts "
+            "FROM dwh.etl_run_log ORDER BY run_id DESC LIMIT 1"
+        )
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    run_id, finished_at, duration, success, row_counts = row
+    if isinstance(row_counts, str):
+        row_counts = json.loads(row_counts)
+    return {
+        'run_id': run_id,
+        'finished_at': finished_at,
+        'duration_seconds': duration,
+        'success': success,
+        'row_counts': row_counts,
+    }
@@ -0,0 +1,324 @@
+"""
+Simulación Monte Carlo vectorizada del Estimate At Completion (EAC) y de la
+fecha de término para todo el portafolio de proyectos.
+
+Todas las entradas se cargan una sola vez como arreglos NumPy (un elemento por
+proyecto) y cada simulación se calcula como una matriz iteraciones x proyectos.
+Las corridas grandes se parten en bloques de proyectos con semillas derivadas
+de un único ``SeedSequence``, por lo que el resultado depende solo de la
+semilla y no de cuántos procesos participen.
+
+El pool de procesos es uno solo por worker web y vive mientras el proceso:
+se crea en la primera corrida grande con ``forkserver`` (o ``spawn``), nunca
+con ``fork``. Hacer fork de un worker con hilos (gthread, ASGI) puede heredar
+locks tomados y sockets de la base abiertos. Los procesos hijos solo importan
+este módulo y NumPy: los modelos se importan dentro de las funciones que leen
+el DWH.
+"""
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Max, Sum
+from django.utils.timezone import now
+
+PERCENTILES = (50, 80, 95)
+
+# Dispersión mínima del log(CPI) para no simular proyectos sin incertidumbre
+MIN_LOG_CPI_SIGMA = 0.05
+# Dispersión usada cuando el portafolio no tiene historia suficiente
+DEFAULT_LOG_CPI_SIGMA = 0.15
+# Elementos (iteraciones x proyectos) por bloque: ~16 MB por matriz float64
+CHUNK_ELEMENTS = 2_000_000
+# Fechas de término más allá de este horizonte se reportan como no estimables
+MAX_FINISH_DAYS = 3650
+
+
+def _to_float_array(values):
+    return np.array([float(v or 0) for v in values], dtype=np.float64)
+
+
+def load_portfolio_inputs(throughput_window_days=90):
+    """
+    Lee del DWH las entradas de la simulación y las devuelve como arreglos
+    NumPy alineados por proyecto (ordenados por project_key).
+    """
+    from .models import DimProject, DimTask, FactBudget, FactProgressSnapshot, FactTimelog
+
+    financials = list(
+        DimProject.objects.annotate(
+            bac=Max('factbudget__budget_allocated'),
+            ac=Sum('factbudget__cost_actual')
+        ).order_by('project_key').values_list('project_key', 'project_id', 'name', 'bac', 'ac')
+    )
+    project_keys = np.array([row[0] for row in financials], dtype=np.int64)
+    n_projects = len(project_keys)
+    bac = _to_float_array(row[3] for row in financials)
+    ac = _to_float_array(row[4] for row in financials)
+
+    # --- Horas planificadas por tarea y proyecto ---
+    tasks = list(
+        DimTask.objects.filter(project_key__isnull=False)
+        .order_by('task_key')
+        .values_list('task_key', 'project_key', 'planned_hours')
+    )
+    task_keys = np.array([t[0] for t in tasks], dtype=np.int64)
+    task_project_idx = np.searchsorted(project_keys, np.array([t[1] for t in tasks], dtype=np.int64))
+    task_planned = _to_float_array(t[2] for t in tasks)
+    planned = np.bincount(task_project_idx, weights=task_planned, minlength=n_projects)
+
+    # --- Historia de avance (EV por fecha de snapshot) ---
+    snapshots = list(FactProgressSnapshot.objects.values_list('date_key', 'task_key', 'percent_complete'))
+    snap_dates = np.array([s[0] for s in snapshots], dtype='datetime64[D]')
+    snap_task_keys = np.array([s[1] for s in snapshots], dtype=np.int64)
+    snap_pct = _to_float_array(s[2] for s in snapshots)
+
+    if len(task_keys):
+        pos = np.clip(np.searchsorted(task_keys, snap_task_keys), 0, len(task_keys) - 1)
+        known = task_keys[pos] == snap_task_keys
+    else:
+        pos = np.zeros(len(snap_task_keys), dtype=np.int64)
+        known = np.zeros(len(snap_task_keys), dtype=bool)
+    snap_dates, pos, snap_pct = snap_dates[known], pos[known], snap_pct[known]
+
+    unique_dates, date_idx = np.unique(snap_dates, return_inverse=True)
+    n_dates = len(unique_dates)
+    earned_by_date = np.bincount(
+        date_idx * n_projects + task_project_idx[pos],
+        weights=task_planned[pos] * snap_pct / 100.0,
+        minlength=n_dates * n_projects
+    ).reshape(n_dates, n_projects)
+
+    if n_dates:
+        as_of = unique_dates[-1].astype(object)
+        earned = earned_by_date[-1]
+    else:
+        as_of = now().date()
+        earned = np.zeros(n_projects)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pct_by_date = np.where(planned > 0, earned_by_date / planned, 0.0)
+        pct_complete = np.where(planned > 0, earned / planned, 0.0)
+    ev = bac * pct_complete
+
+    # --- Costo real acumulado a cada fecha de snapshot ---
+    budget_rows = list(FactBudget.objects.values_list('date_key', 'project_key', 'cost_actual'))
+    budget_dates = np.array([b[0] for b in budget_rows], dtype='datetime64[D]')
+    budget_idx = np.searchsorted(project_keys, np.array([b[1] for b in budget_rows], dtype=np.int64))
+    budget_cost = _to_float_array(b[2] for b in budget_rows)
+    ac_by_date = np.zeros((n_dates, n_projects))
+    for i, snapshot_date in enumerate(unique_dates):
+        mask = budget_dates <= snapshot_date
+        ac_by_date[i] = np.bincount(budget_idx[mask], weights=budget_cost[mask], minlength=n_projects)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_cpi = np.where(
+            (ac_by_date > 0) & (pct_by_date > 0),
+            np.log(bac * pct_by_date / ac_by_date),
+            np.nan
+        )
+
+    # --- Ritmo de trabajo diario (horas/día) en la ventana reciente ---
+    window_start = as_of - timedelta(days=throughput_window_days)
+    daily = list(
+        FactTimelog.objects.filter(date_key__gt=window_start, date_key__lte=as_of, task_key__project_key__isnull=False)
+        .values('date_key', 'task_key__project_key')
+        .annotate(hours=Sum('hours_worked'))
+        .values_list('task_key__project_key', 'hours')
+    )
+    daily_idx = np.searchsorted(project_keys, np.array([d[0] for d in daily], dtype=np.int64))
+    daily_hours = _to_float_array(d[1] for d in daily)
+    hours_sum = np.bincount(daily_idx, weights=daily_hours, minlength=n_projects)
+    hours_sumsq = np.bincount(daily_idx, weights=daily_hours ** 2, minlength=n_projects)
+    rate_mean = hours_sum / throughput_window_days
+    daily_var = np.maximum(
+        (hours_sumsq / throughput_window_days - rate_mean ** 2) * throughput_window_days / max(throughput_window_days - 1, 1),
+        0.0
+    )
+    # Incertidumbre del ritmo promedio (no de un día aislado): var / n
+    rate_var = daily_var / throughput_window_days
+
+    return {
+        'as_of': as_of,
+        'project_ids': [row[1] for row in financials],
+        'names': [row[2] for row in financials],
+        'bac': bac,
+        'ac': ac,
+        'ev': ev,
+        'remaining_hours': np.maximum(planned - earned, 0.0),
+        'log_cpi': log_cpi,
+        'rate_mean': rate_mean,
+        'rate_var': rate_var,
+    }
+
+
+def _cpi_distribution(log_cpi):
+    """
+    Parámetros (mu, sigma) del log(CPI) por proyecto. Los proyectos con una
+    sola observación usan la dispersión del portafolio; los que no tienen
+    ninguna se centran en la mediana del portafolio.
+    """
+    valid = ~np.isnan(log_cpi)
+    counts = valid.sum(axis=0)
+    filled = np.where(valid, log_cpi, 0.0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mu = np.where(counts > 0, filled.sum(axis=0) / counts, np.nan)
+        sq_dev = np.where(valid, (log_cpi - mu) ** 2, 0.0).sum(axis=0)
+        sigma = np.where(counts > 1, np.sqrt(sq_dev / (counts - 1)), np.nan)
+
+    observed = mu[~np.isnan(mu)]
+    portfolio_mu = float(np.median(observed)) if observed.size else 0.0
+    portfolio_sigma = float(np.std(observed, ddof=1)) if observed.size > 1 else DEFAULT_LOG_CPI_SIGMA
+
+    mu = np.where(np.isnan(mu), portfolio_mu, mu)
+    sigma = np.where(np.isnan(sigma), portfolio_sigma, sigma)
+    return mu, np.maximum(sigma, MIN_LOG_CPI_SIGMA)
+
+
+def _simulate_chunk(seed_seq, iterations, bac, ac, ev, remaining, mu, sigma, rate_mean, rate_var):
+    """
+    Simula un bloque de proyectos. Devuelve los percentiles por proyecto y la
+    suma del EAC de cada iteración (para agregar el portafolio).
+    """
+    rng = np.random.default_rng(seed_seq)
+    shape = (iterations, len(mu))
+
+    # float32 reduce a la mitad memoria y tiempo; la precisión sobra para percentiles
+    z_cpi = rng.standard_normal(shape, dtype=np.float32)
+    cpi = np.exp(mu.astype(np.float32) + sigma.astype(np.float32) * z_cpi)
+    eac = (ac + (bac - ev) / cpi).astype(np.float32)
+
+    # Ritmo diario ~ LogNormal con la media y varianza observadas
+    has_rate = rate_mean > 0
+    safe_mean = np.where(has_rate, rate_mean, 1.0)
+    log_var = np.log1p(rate_var / safe_mean ** 2)
+    log_mu = np.log(safe_mean) - log_var / 2
+    z_rate = rng.standard_normal(shape, dtype=np.float32)
+    rate = np.exp(log_mu.astype(np.float32) + np.sqrt(log_var).astype(np.float32) * z_rate)
+    finish_days = np.where(remaining > 0, remaining / rate, 0.0).astype(np.float32)
+    finish_days[:, ~has_rate & (remaining > 0)] = np.nan
+
+    return (
+        np.percentile(eac, PERCENTILES, axis=0),
+        np.percentile(finish_days, PERCENTILES, axis=0),
+        eac.sum(axis=1, dtype=np.float64),
+    )
+
+
+def _forecast_pool_workers():
+    return getattr(settings, 'FORECAST_MAX_WORKERS', None) or multiprocessing.cpu_count()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _forecast_pool():
+    """Pool de procesos del worker actual (se crea la primera vez que se usa)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+            if context.get_start_method() == 'forkserver':
+                # Los hijos se crean desde el servidor con este módulo (y NumPy) ya importado
+                context.set_forkserver_preload([__name__])
+            _pool = ProcessPoolExecutor(max_workers=_forecast_pool_workers(), mp_context=context)
+        return _pool
+
+
+def _discard_pool(pool):
+    """Descarta un pool roto (p. ej. un hijo terminado por OOM); la próxima corrida crea otro."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def simulate_portfolio(inputs, iterations, seed):
+    """
+    Ejecuta la simulación Monte Carlo para todos los proyectos a la vez.
+    Los bloques se reparten en un pool de procesos cuando la corrida supera
+    ``FORECAST_PARALLEL_THRESHOLD`` elementos.
+    """
+    mu, sigma = _cpi_distribution(inputs['log_cpi'])
+    n_projects = len(mu)
+
+    chunk_size = max(1, CHUNK_ELEMENTS // iterations)
+    bounds = [(start, min(start + chunk_size, n_projects)) for start in range(0, n_projects, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(bounds))
+
+    columns = ('bac', 'ac', 'ev', 'remaining_hours')
+    jobs = [
+        (seeds[i], iterations, *(inputs[c][lo:hi] for c in columns),
+         mu[lo:hi], sigma[lo:hi], inputs['rate_mean'][lo:hi], inputs['rate_var'][lo:hi])
+        for i, (lo, hi) in enumerate(bounds)
+    ]
+
+    threshold = getattr(settings, 'FORECAST_PARALLEL_THRESHOLD', 20_000_000)
+    workers = min(_forecast_pool_workers(), len(jobs))
+    if iterations * n_projects > threshold and workers > 1:
+        pool = _forecast_pool()
+        try:
+            results = list(pool.map(_simulate_chunk, *zip(*jobs)))
+        except BrokenProcessPool:
+            _discard_pool(pool)
+            raise
+    else:
+        results = [_simulate_chunk(*job) for job in jobs]
+
+    eac_pct = np.concatenate([r[0] for r in results], axis=1) if results else np.zeros((len(PERCENTILES), 0))
+    finish_pct = np.concatenate([r[1] for r in results], axis=1) if results else np.zeros((len(PERCENTILES), 0))
+    portfolio_eac = np.sum([r[2] for r in results], axis=0) if results else np.zeros(iterations)
+
+    return {
+        'eac': eac_pct,
+        'finish_days': finish_pct,
+        'portfolio_eac': np.percentile(portfolio_eac, PERCENTILES),
+        'cpi_median': np.exp(mu),
+    }
+
+
+def build_forecast_response(inputs, simulation, iterations, seed):
+    """Da formato de respuesta JSON a los resultados de la simulación."""
+    as_of = inputs['as_of']
+
+    def finish_date(days):
+        if np.isnan(days) or days > MAX_FINISH_DAYS:
+            return None
+        return as_of + timedelta(days=int(np.ceil(days)))
+
+    projects = []
+    for i, project_id in enumerate(inputs['project_ids']):
+        item = {
+            'id': project_id,
+            'name': inputs['names'][i],
+            'budget_allocated': round(float(inputs['bac'][i]), 2),
+            'actual_cost': round(float(inputs['ac'][i]), 2),
+            'earned_value': round(float(inputs['ev'][i]), 2),
+            'remaining_hours': round(float(inputs['remaining_hours'][i]), 2),
+            'cpi_median': round(float(simulation['cpi_median'][i]), 2),
+        }
+        for j, p in enumerate(PERCENTILES):
+            item[f'eac_p{p}'] = round(float(simulation['eac'][j][i]), 2)
+        for j, p in enumerate(PERCENTILES):
+            item[f'finish_p{p}'] = finish_date(simulation['finish_days'][j][i])
+        projects.append(item)
+
+    portfolio = {'budget_allocated': round(float(inputs['bac'].sum()), 2)}
+    for j, p in enumerate(PERCENTILES):
+        portfolio[f'eac_p{p}'] = round(float(simulation['portfolio_eac'][j]), 2)
+
+    return {
+        'as_of': as_of,
+        'iterations': iterations,
+        'seed': seed,
+        'portfolio': portfolio,
+        'projects': projects,
+    }
@@ -5,6 +5,16 @@ from datetime import datetime
 from sqlalchemy import create_engine, text
 from django.core.management.base import BaseCommand
 from django.conf import settings
+from django.utils import timezone
+from analytics.etl_runs import count_loaded_rows, record_run
+from analytics.rollups import ROLLUP_DDL, ROLLUP_TABLES, BSC_MONTHLY_BUILD_SQL, refresh_timelog_rollups
+
+# Columnas que el ETL agrega al esquema original del DWH
+# * fact_defect_summary.resolution_days: suma de días entre detección y
+#   resolución de los defectos resueltos ese día (MTTR = días / resueltos)
+FACT_DDL = [
+    "ALTER TABLE dwh.fact_defect_summary ADD COLUMN IF NOT EXISTS resolution_days integer NOT NULL DEFAULT 0",
+]
 
 class Command(BaseCommand):
     help = 'Ejecuta el proceso ETL completo para mover y transformar datos de OLTP (project_mgmt) a DSS (project_dss)'
@@ -12,6 +22,9 @@ class Command(BaseCommand):
     def handle(self, *args, **kwargs):
         self.stdout.write(self.style.WARNING("Iniciando proceso ETL..."))
         start_total_time = time.time()
+        started_at = timezone.now()
+        target_engine = None
+        success = False
 
         try:
             # 1. Configuración de Motores de Base de Datos
@@ -25,6 +38,7 @@ class Command(BaseCommand):
             # 3. Fase de Transformación y Carga
             if extracted_data:
                 self.transform_and_load(extracted_data, target_engine)
+                success = True
                 
             duration_total = time.time() - start_total_time
             self.stdout.write(self.style.SUCCESS(f"¡Éxito! Proceso ETL completado en {duration_total:.2f} segundos."))
@@ -34,6 +48,20 @@ class Command(BaseCommand):
             import traceback
             traceback.print_exc()
 
+        if target_engine is not None:
+            self.log_run(target_engine, started_at, success)
+
+    def log_run(self, engine, started_at, success):
+        """Deja la corrida en dwh.etl_run_log (duración y filas por tabla) para /metrics."""
+        try:
+            row_counts = {}
+            if success:
+                with engine.connect() as conn:
+                    row_counts = count_loaded_rows(conn)
+            record_run(engine, started_at, timezone.now(), success, row_counts)
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f"No se pudo registrar la corrida del ETL: {e}"))
+
     def get_engine(self, db_alias):
         """Crea un motor SQLAlchemy usando la configuración de Django."""
         db_conf = settings.DATABASES[db_alias]
@@ -97,6 +125,11 @@ class Command(BaseCommand):
         
         # A. LIMPIEZA INICIAL (TRUNCATE)
         with engine.connect() as conn:
+            # Tablas de agregados y columnas nuevas: se crean la primera vez que corre el ETL
+            for ddl in FACT_DDL + ROLLUP_DDL:
+                conn.execute(text(ddl))
+            conn.execute(text(f"TRUNCATE {', '.join(ROLLUP_TABLES)};"))
+
             self.stdout.write("   > Limpiando tablas DWH existentes...")
             # Se usa CASCADE para limpiar en orden correcto y RESTART IDENTITY para reiniciar contadores
             conn.execute(text("TRUNCATE dwh.fact_timelog, dwh.fact_budget, dwh.fact_defect_summary, dwh.fact_risk, dwh.fact_resource, dwh.fact_progress_snapshot RESTART IDENTITY CASCADE;"))
@@ -214,8 +247,15 @@ class Command(BaseCommand):
              new_d = df_d.groupby(['detected_date', 'project_id']).size().reset_index(name='defect_count_new')
              new_d.rename(columns={'detected_date': 'date_key'}, inplace=True)
              
-             # Defectos Resueltos
-             res_d = df_d.dropna(subset=['resolved_date']).groupby(['resolved_date', 'project_id']).size().reset_index(name='defect_count_resolved')
+             # Defectos Resueltos y sus días hasta la resolución
+             res_d = df_d.dropna(subset=['resolved_date']).copy()
+             res_d['resolution_days'] = (
+                 pd.to_datetime(res_d['resolved_date']) - pd.to_datetime(res_d['detected_date'])
+             ).dt.days.clip(lower=0)
+             res_d = res_d.groupby(['resolved_date', 'project_id']).agg(
+                 defect_count_resolved=('resolution_days', 'size'),
+                 resolution_days=('resolution_days', 'sum'),
+             ).reset_index()
              res_d.rename(columns={'resolved_date': 'date_key'}, inplace=True)
              
              # Full Outer Join para combinar días con solo nuevos o solo resueltos
@@ -227,7 +267,7 @@ class Command(BaseCommand):
              fact_def.dropna(subset=['project_key'], inplace=True)
              
              if not fact_def.empty:
-                 fact_def = fact_def[['date_key', 'project_key', 'defect_count_new', 'defect_count_resolved']]
+                 fact_def = fact_def[['date_key', 'project_key', 'defect_count_new', 'defect_count_resolved', 'resolution_days']]
                  fact_def.to_sql('fact_defect_summary', engine, schema='dwh', if_exists='append', index=False)
                  self.stdout.write(f"   > Fact Defect Summary: {len(fact_def)} filas")
 
@@ -274,4 +314,21 @@ class Command(BaseCommand):
             if not fps.empty:
                 fps = fps[['date_key', 'task_key', 'percent_complete']]
                 fps.to_sql('fact_progress_snapshot', engine, schema='dwh', if_exists='append', index=False)
-                self.stdout.write(f"   > Fact Progress Snapshot: {len(fps)} filas para el día {today}")
\ No newline at end of file
+                self.stdout.write(f"   > Fact Progress Snapshot: {len(fps)} filas para el día {today}")
+
+        # D. AGREGADOS (ROLLUPS)
+        self.build_rollups(engine)
+
+    def build_rollups(self, engine):
+        """Reconstruye dentro del DWH las tablas de agregados usadas por los dashboards."""
+        with engine.connect() as conn:
+            result = conn.execute(text(BSC_MONTHLY_BUILD_SQL))
+            conn.commit()
+            self.stdout.write(f"   > Agregado BSC mensual: {result.rowcount} filas")
+
+            # Agregados de horas: solo se escriben las celdas que cambiaron
+            for table, stats in refresh_timelog_rollups(conn).items():
+                self.stdout.write(
+                    f"   > {table}: {stats['upserted']} filas actualizadas, {stats['deleted']} borradas "
+                    f"({stats['periods']} periodos afectados)"
+                )
@@ -112,6 +112,8 @@ class FactDefectSummary(models.Model):
     project_key = models.ForeignKey(DimProject, models.DO_NOTHING, db_column='project_key')
     defect_count_new = models.IntegerField(blank=True, null=True)
     defect_count_resolved = models.IntegerField(blank=True, null=True)
+    # Agregada por el ETL: días de detección a resolución de los resueltos ese día
+    resolution_days = models.IntegerField(default=0)
 
     class Meta:
         managed = False
@@ -166,3 +168,26 @@ class FactTimelog(models.Model):
     class Meta:
         managed = False
         db_table = 'dwh"."fact_timelog'
+
+
+class AggBscMonthly(models.Model):
+    """Cubo BSC (cliente x proyecto x mes) reconstruido por el ETL (ver analytics/rollups.py)."""
+    pk = models.CompositePrimaryKey('project_key', 'month_start')
+    project_key = models.ForeignKey(DimProject, models.DO_NOTHING, db_column='project_key')
+    month_start = models.DateField()
+    client_key = models.ForeignKey(DimClient, models.DO_NOTHING, db_column='client_key', blank=True, null=True)
+    year = models.IntegerField()
+    quarter = models.IntegerField()
+    month = models.IntegerField()
+    earned_value = models.DecimalField(max_digits=14, decimal_places=2)
+    cost_actual = models.DecimalField(max_digits=14, decimal_places=2)
+    risk_count = models.IntegerField()
+    risk_impact_sum = models.DecimalField(max_digits=12, decimal_places=2)
+    defects_new = models.IntegerField()
+    defects_resolved = models.IntegerField()
+    hours_worked = models.DecimalField(max_digits=12, decimal_places=2)
+    available_hours = models.DecimalField(max_digits=12, decimal_places=2)
+
+    class Meta:
+        managed = False
+        db_table = 'dwh"."agg_bsc_monthly'
@@ -0,0 +1,271 @@
+"""
+Compilador de consultas OLAP declarativas sobre el esquema estrella ``dwh``.
+
+Una consulta nombra medidas (de una sola tabla de hechos), dimensiones,
+filtros, orden y límite. Solo se aceptan los nombres de las listas blancas de
+este módulo: ningún texto del usuario llega al SQL, los valores de los filtros
+siempre viajan como parámetros y ya llegan convertidos al tipo de su dimensión
+(``DIMENSIONS``, lo valida ``OLAPFilterSerializer``).
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DataError, connections
+
+from core.db_routers import read_alias
+from core.metrics import record_cache
+
+
+class OLAPQueryError(Exception):
+    """Consulta inválida o demasiado costosa."""
+
+
+# --- TABLAS DE HECHOS Y SUS JOINS PERMITIDOS ---
+# Cada join declara el alias del que depende (None = la tabla de hechos 'f').
+FACTS = {
+    'timelog': {
+        'table': 'dwh.fact_timelog',
+        'joins': {
+            'd': (None, 'JOIN dwh.dim_date d ON d.date_key = f.date_key'),
+            't': (None, 'JOIN dwh.dim_task t ON t.task_key = f.task_key'),
+            'e': (None, 'JOIN dwh.dim_employee e ON e.employee_key = f.employee_key'),
+            'p': ('t', 'LEFT JOIN dwh.dim_project p ON p.project_key = t.project_key'),
+            's': ('p', 'LEFT JOIN dwh.dim_status s ON s.status_key = p.status_key'),
+        },
+    },
+    'budget': {
+        'table': 'dwh.fact_budget',
+        'joins': {
+            'd': (None, 'JOIN dwh.dim_date d ON d.date_key = f.date_key'),
+            'p': (None, 'JOIN dwh.dim_project p ON p.project_key = f.project_key'),
+            's': ('p', 'LEFT JOIN dwh.dim_status s ON s.status_key = p.status_key'),
+        },
+    },
+    'defects': {
+        'table': 'dwh.fact_defect_summary',
+        'joins': {
+            'd': (None, 'JOIN dwh.dim_date d ON d.date_key = f.date_key'),
+            'p': (None, 'JOIN dwh.dim_project p ON p.project_key = f.project_key'),
+            's': ('p', 'LEFT JOIN dwh.dim_status s ON s.status_key = p.status_key'),
+        },
+    },
+    'risk': {
+        'table': 'dwh.fact_risk',
+        'joins': {
+            'd': (None, 'JOIN dwh.dim_date d ON d.date_key = f.date_key'),
+            'p': (None, 'LEFT JOIN dwh.dim_project p ON p.project_key = f.project_key'),
+            # En riesgos el estado es el del propio riesgo
+            's': (None, 'LEFT JOIN dwh.dim_status s ON s.status_key = f.status_key'),
+        },
+    },
+}
+
+# nombre público -> (tabla de hechos, expresión SQL)
+MEASURES = {
+    'hours_worked_sum': ('timelog', 'SUM(f.hours_worked)'),
+    'timelog_count': ('timelog', 'COUNT(*)'),
+    'cost_actual_sum': ('budget', 'SUM(f.cost_actual)'),
+    'budget_allocated_max': ('budget', 'MAX(f.budget_allocated)'),
+    'defects_new_sum': ('defects', 'SUM(f.defect_count_new)'),
+    'defects_resolved_sum': ('defects', 'SUM(f.defect_count_resolved)'),
+    'risk_count': ('risk', 'COUNT(*)'),
+    'impact_score_avg': ('risk', 'AVG(f.impact_score)'),
+    'probability_avg': ('risk', 'AVG(f.probability)'),
+}
+
+# nombre público -> (alias de la dimensión, columna, tipo de los valores de sus filtros)
+DIMENSIONS = {
+    'date.date': ('d', 'd.date_key', 'date'),
+    'date.year': ('d', 'd.year', 'int'),
+    'date.quarter': ('d', 'd.quarter', 'int'),
+    'date.month': ('d', 'd.month', 'int'),
+    'date.week': ('d', 'd.week', 'int'),
+    'date.is_workday': ('d', 'd.is_workday', 'bool'),
+    'project.id': ('p', 'p.project_id', 'int'),
+    'project.name': ('p', 'p.name', 'text'),
+    'project.client_id': ('p', 'p.client_id', 'int'),
+    'task.id': ('t', 't.task_id', 'int'),
+    'task.name': ('t', 't.name', 'text'),
+    'employee.id': ('e', 'e.employee_id', 'int'),
+    'employee.name': ('e', 'e.name', 'text'),
+    'employee.role': ('e', 'e.role', 'text'),
+    'status.id': ('s', 's.status_id', 'text'),
+    'status.category': ('s', 's.category', 'text'),
+}
+# Un solo enum en el esquema OpenAPI para el filtro y la lista de dimensiones
+DIMENSION_CHOICES = sorted(DIMENSIONS)
+
+FILTER_OPERATORS = {
+    'eq': '{col} = %s',
+    'ne': '{col} <> %s',
+    'lt': '{col} < %s',
+    'lte': '{col} <= %s',
+    'gt': '{col} > %s',
+    'gte': '{col} >= %s',
+    'in': '{col} IN %s',
+    'between': '{col} BETWEEN %s AND %s',
+}
+
+
+def catalog():
+    """Medidas y dimensiones disponibles por tabla de hechos."""
+    result = {}
+    for fact, spec in FACTS.items():
+        result[fact] = {
+            'measures': [name for name, (f, _) in MEASURES.items() if f == fact],
+            'dimensions': [name for name, (alias, _, _) in DIMENSIONS.items() if alias in spec['joins']],
+        }
+    return result
+
+
+def normalize(query):
+    """Forma canónica de la consulta (clave de caché y base del SQL)."""
+    def unique(items):
+        return sorted(set(items))
+
+    filters = []
+    for f in query.get('filters', []):
+        value = f['value']
+        if f['op'] == 'in':
+            # Los valores ya son todos del tipo de la dimensión
+            value = sorted(set(value))
+        filters.append({'dimension': f['dimension'], 'op': f['op'], 'value': value})
+    filters.sort(key=lambda f: json.dumps(f, sort_keys=True, default=str))
+
+    return {
+        'measures': unique(query['measures']),
+        'dimensions': unique(query.get('dimensions', [])),
+        'filters': filters,
+        'order_by': [
+            {'field': o['field'], 'desc': bool(o.get('desc', False))}
+            for o in query.get('order_by', [])
+        ],
+        'limit': query['limit'],
+    }
+
+
+def compile_query(query):
+    """Traduce una consulta normalizada a (sql, params, columnas)."""
+    facts = {MEASURES[m][0] for m in query['measures']}
+    if len(facts) != 1:
+        raise OLAPQueryError(
+            "Todas las medidas deben pertenecer a la misma tabla de hechos "
+            f"(recibidas: {', '.join(sorted(facts))})."
+        )
+    fact = facts.pop()
+    joins = FACTS[fact]['joins']
+
+    used_dimensions = query['dimensions'] + [f['dimension'] for f in query['filters']]
+    required = set()
+    for name in used_dimensions:
+        alias = DIMENSIONS[name][0]
+        if alias not in joins:
+            raise OLAPQueryError(f"La dimensión '{name}' no está disponible para los hechos '{fact}'.")
+        while alias is not None and alias not in required:
+            required.add(alias)
+            alias = joins[alias][0]
+
+    select = []
+    columns = []
+    for i, name in enumerate(query['dimensions']):
+        select.append(f"{DIMENSIONS[name][1]} AS c{i}")
+        columns.append(name)
+    offset = len(columns)
+    for i, name in enumerate(query['measures']):
+        select.append(f"{MEASURES[name][1]} AS c{offset + i}")
+        columns.append(name)
+
+    where = []
+    params = []
+    for f in query['filters']:
+        col = DIMENSIONS[f['dimension']][1]
+        where.append(FILTER_OPERATORS[f['op']].format(col=col))
+        if f['op'] == 'between':
+            params.extend(f['value'])
+        elif f['op'] == 'in':
+            params.append(tuple(f['value']))
+        else:
+            params.append(f['value'])
+
+    order = []
+    for o in query['order_by']:
+        if o['field'] not in columns:
+            raise OLAPQueryError(f"Solo se puede ordenar por columnas seleccionadas ('{o['field']}').")
+        order.append(f"c{columns.index(o['field'])} {'DESC' if o['desc'] else 'ASC'}")
+    if not order:
+        order = [f"c{i}" for i in range(len(query['dimensions']))]
+
+    # Los joins se emiten en el orden de declaración (las dependencias van primero)
+    join_sql = [clause for alias, (_, clause) in joins.items() if alias in required]
+
+    sql = f"SELECT {', '.join(select)} FROM {FACTS[fact]['table']} f"
+    if join_sql:
+        sql += ' ' + ' '.join(join_sql)
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    if query['dimensions']:
+        sql += ' GROUP BY ' + ', '.join(str(i + 1) for i in range(len(query['dimensions'])))
+    if order:
+        sql += ' ORDER BY ' + ', '.join(order)
+    sql += ' LIMIT %s'
+    params.append(query['limit'])
+
+    return sql, params, columns
+
+
+def _estimated_cost(cursor, sql, params):
+    cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+    plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]['Plan']['Total Cost']
+
+
+def _to_json_value(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return float(value)
+
+
+def cache_key(query):
+    digest = hashlib.sha256(json.dumps(query, sort_keys=True, default=str).encode()).hexdigest()
+    return f'olap:{digest}'
+
+
+def run_query(query):
+    """
+    Ejecuta una consulta (ya validada) con caché por consulta normalizada y
+    rechaza los planes cuyo costo estimado supera ``OLAP_MAX_PLAN_COST``.
+    """
+    normalized = normalize(query)
+    key = cache_key(normalized)
+    cached = cache.get(key)
+    record_cache('olap', cached is not None)
+    if cached is not None:
+        return dict(cached, cached=True)
+
+    sql, params, columns = compile_query(normalized)
+    try:
+        with connections[read_alias('project_dss')].cursor() as cursor:
+            cost = _estimated_cost(cursor, sql, params)
+            if cost > settings.OLAP_MAX_PLAN_COST:
+                raise OLAPQueryError(
+                    f"La consulta es demasiado costosa (costo estimado {cost:.0f}, "
+                    f"máximo {settings.OLAP_MAX_PLAN_COST}). Agregue filtros o reduzca dimensiones."
+                )
+            cursor.execute(sql, params)
+            rows = [
+                {name: _to_json_value(value) for name, value in zip(columns, row)}
+                for row in cursor.fetchall()
+            ]
+    except DataError:
+        # Respaldo de la validación por tipo: el mensaje de Postgres trae el SQL generado
+        raise OLAPQueryError("Un valor de los filtros no es válido para su dimensión.") from None
+
+    result = {'query': normalized, 'columns': columns, 'rows': rows, 'estimated_cost': cost}
+    cache.set(key, result, settings.OLAP_CACHE_SECONDS)
+    return dict(result, cached=False)
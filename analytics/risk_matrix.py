@@ -0,0 +1,113 @@
+"""
+Matriz de riesgos probabilidad x impacto sobre ``dwh.fact_risk``.
+
+Los riesgos se agrupan en Postgres con ``width_bucket`` (probabilidad en
+[0, 1], impacto en [1, 10]) y solo viajan las celdas no vacías con su conteo
+y su exposición (suma de probabilidad x impacto); aquí se arman las matrices
+densas para el mapa de calor.
+
+El resultado se guarda en caché por versión del DWH (run_id de la última
+corrida del ETL, ver analytics/etl_runs.py): una carga nueva cambia la clave,
+así que no hace falta invalidar y el vencimiento solo acota la memoria.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+from core.db_routers import read_alias
+from core.metrics import record_cache
+
+PROBABILITY_RANGE = (0, 1)
+# Impacto entero de 1 a 10: el límite superior de width_bucket es exclusivo
+IMPACT_RANGE = (1, 11)
+
+RISK_MATRIX_SQL = """
+    SELECT GREATEST(1, LEAST(%(probability_buckets)s,
+               width_bucket(f.probability, %(probability_low)s, %(probability_high)s, %(probability_buckets)s))) AS probability_bucket,
+           GREATEST(1, LEAST(%(impact_buckets)s,
+               width_bucket(f.impact_score, %(impact_low)s, %(impact_high)s, %(impact_buckets)s))) AS impact_bucket,
+           COUNT(*) AS risk_count,
+           SUM(f.probability * f.impact_score) AS exposure
+    FROM dwh.fact_risk f
+    JOIN dwh.dim_project p ON p.project_key = f.project_key
+    LEFT JOIN dwh.dim_status s ON s.status_key = f.status_key
+    WHERE f.probability IS NOT NULL AND f.impact_score IS NOT NULL
+      AND (%(project)s::int IS NULL OR p.project_id = %(project)s)
+      AND (%(client)s::int IS NULL OR p.client_id = %(client)s)
+      AND (%(status)s::text IS NULL OR s.status_id = %(status)s)
+    GROUP BY 1, 2
+"""
+
+FILTERS = ('project', 'client', 'status')
+
+
+def bucket_edges(low, high, buckets):
+    width = (high - low) / buckets
+    return [round(low + width * i, 4) for i in range(buckets + 1)]
+
+
+def cache_key(version, params):
+    digest = hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+    return f'risk-matrix:{version}:{digest}'
+
+
+def risk_matrix(params):
+    """
+    Matriz para los parámetros ya validados. Sin bitácora del ETL (versión
+    desconocida) no se usa la caché.
+    """
+    from .etl_runs import dwh_version
+
+    params = {
+        'probability_buckets': params['probability_buckets'],
+        'impact_buckets': params['impact_buckets'],
+        **{name: params.get(name) for name in FILTERS},
+    }
+    alias = read_alias('project_dss')
+    version = dwh_version(alias)
+    key = cache_key(version, params) if version is not None else None
+    if key is not None:
+        cached = cache.get(key)
+        record_cache('risk_matrix', cached is not None)
+        if cached is not None:
+            return dict(cached, cached=True)
+
+    result = _compute(alias, params)
+    result['dwh_version'] = version
+    if key is not None:
+        cache.set(key, result, settings.RISK_MATRIX_CACHE_SECONDS)
+    return dict(result, cached=False)
+
+
+def _compute(alias, params):
+    n_probability, n_impact = params['probability_buckets'], params['impact_buckets']
+    query = {
+        **params,
+        'probability_low': PROBABILITY_RANGE[0], 'probability_high': PROBABILITY_RANGE[1],
+        'impact_low': IMPACT_RANGE[0], 'impact_high': IMPACT_RANGE[1],
+    }
+    with connections[alias].cursor() as cursor:
+        cursor.execute(RISK_MATRIX_SQL, query)
+        cells = cursor.fetchall()
+
+    # Filas = impacto (ascendente), columnas = probabilidad (ascendente)
+    counts = [[0] * n_probability for _ in range(n_impact)]
+    exposure = [[0.0] * n_probability for _ in range(n_impact)]
+    for probability_bucket, impact_bucket, risk_count, cell_exposure in cells:
+        counts[impact_bucket - 1][probability_bucket - 1] = risk_count
+        exposure[impact_bucket - 1][probability_bucket - 1] = round(float(cell_exposure or 0), 2)
+
+    return {
+        'filters': {name: params[name] for name in FILTERS if params[name] is not None},
+        'probability_edges': bucket_edges(*PROBABILITY_RANGE, n_probability),
+        'impact_edges': bucket_edges(*IMPACT_RANGE, n_impact),
+        'counts': counts,
+        'exposure': exposure,
+        'totals': {
+            'risk_count': sum(map(sum, counts)),
+            'exposure': round(sum(map(sum, exposure)), 2),
+        },
+    }
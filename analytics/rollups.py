@@ -0,0 +1,282 @@
+"""
+Tablas de agregados (rollups) del DWH que mantiene el ETL.
+
+Las consultas se ejecutan dentro de la base DSS (INSERT ... SELECT), de modo que
+el ETL no necesita traer los hechos a memoria para agregarlos.
+
+- El cubo BSC se reconstruye completo en cada carga.
+- Los agregados de horas (empleado x semana, proyecto x mes) se actualizan de
+  forma incremental: se calculan en una tabla temporal y solo se escriben las
+  filas que cambiaron o desaparecieron. Usan los IDs de negocio (employee_id,
+  project_id) porque el ETL reinicia las claves sustitutas en cada carga.
+"""
+from sqlalchemy import text
+
+# --- CUBO BSC: cliente x proyecto x mes ---
+# Medidas aditivas: cualquier combinación de cliente, proyecto y periodo (y
+# los totales generales) se obtiene sumando filas de esta tabla.
+#
+# * earned_value: el EV actual de cada proyecto (BAC x % avance del último
+#   snapshot) se reparte entre los meses en proporción a las horas trabajadas;
+#   los proyectos sin horas lo imputan al mes del snapshot.
+# * available_hours: la capacidad mensual de cada empleado
+#   (available_hours_per_week x 4, igual que el BSC) se reparte entre los
+#   proyectos según sus horas de ese mes.
+BSC_MONTHLY_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS dwh.agg_bsc_monthly (
+        project_key integer NOT NULL,
+        month_start date NOT NULL,
+        client_key integer,
+        year integer NOT NULL,
+        quarter integer NOT NULL,
+        month integer NOT NULL,
+        earned_value numeric(14, 2) NOT NULL DEFAULT 0,
+        cost_actual numeric(14, 2) NOT NULL DEFAULT 0,
+        risk_count integer NOT NULL DEFAULT 0,
+        risk_impact_sum numeric(12, 2) NOT NULL DEFAULT 0,
+        defects_new integer NOT NULL DEFAULT 0,
+        defects_resolved integer NOT NULL DEFAULT 0,
+        hours_worked numeric(12, 2) NOT NULL DEFAULT 0,
+        available_hours numeric(12, 2) NOT NULL DEFAULT 0,
+        PRIMARY KEY (project_key, month_start)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS agg_bsc_monthly_client_month_idx ON dwh.agg_bsc_monthly (client_key, month_start)",
+    "CREATE INDEX IF NOT EXISTS agg_bsc_monthly_month_idx ON dwh.agg_bsc_monthly (month_start)",
+]
+
+BSC_MONTHLY_BUILD_SQL = """
+    INSERT INTO dwh.agg_bsc_monthly (
+        project_key, month_start, client_key, year, quarter, month,
+        earned_value, cost_actual, risk_count, risk_impact_sum,
+        defects_new, defects_resolved, hours_worked, available_hours
+    )
+    WITH emp_project_hours AS (
+        SELECT t.project_key, date_trunc('month', f.date_key)::date AS month_start,
+               f.employee_key, SUM(f.hours_worked) AS hours
+        FROM dwh.fact_timelog f
+        JOIN dwh.dim_task t ON t.task_key = f.task_key
+        WHERE t.project_key IS NOT NULL
+        GROUP BY 1, 2, 3
+    ),
+    emp_hours AS (
+        SELECT employee_key, month_start, SUM(hours) AS hours
+        FROM emp_project_hours
+        GROUP BY 1, 2
+    ),
+    utilization AS (
+        SELECT ph.project_key, ph.month_start,
+               SUM(ph.hours) AS hours_worked,
+               SUM(COALESCE(e.available_hours_per_week, 0) * 4 * ph.hours / NULLIF(eh.hours, 0)) AS available_hours
+        FROM emp_project_hours ph
+        JOIN emp_hours eh ON eh.employee_key = ph.employee_key AND eh.month_start = ph.month_start
+        JOIN dwh.dim_employee e ON e.employee_key = ph.employee_key
+        GROUP BY 1, 2
+    ),
+    latest AS (
+        SELECT MAX(date_key) AS snapshot_date FROM dwh.fact_progress_snapshot
+    ),
+    progress AS (
+        SELECT t.project_key,
+               SUM(COALESCE(t.planned_hours, 0) * COALESCE(s.percent_complete, 0) / 100.0)
+                   / NULLIF(SUM(COALESCE(t.planned_hours, 0)), 0) AS pct_complete
+        FROM dwh.dim_task t
+        LEFT JOIN dwh.fact_progress_snapshot s
+               ON s.task_key = t.task_key AND s.date_key = (SELECT snapshot_date FROM latest)
+        WHERE t.project_key IS NOT NULL
+        GROUP BY 1
+    ),
+    project_ev AS (
+        SELECT b.project_key, MAX(b.budget_allocated) * COALESCE(MAX(pr.pct_complete), 0) AS ev
+        FROM dwh.fact_budget b
+        LEFT JOIN progress pr ON pr.project_key = b.project_key
+        GROUP BY 1
+    ),
+    project_hours AS (
+        SELECT project_key, SUM(hours_worked) AS hours FROM utilization GROUP BY 1
+    ),
+    earned AS (
+        SELECT u.project_key, u.month_start, pe.ev * u.hours_worked / ph.hours AS earned_value
+        FROM utilization u
+        JOIN project_hours ph ON ph.project_key = u.project_key AND ph.hours > 0
+        JOIN project_ev pe ON pe.project_key = u.project_key
+        UNION ALL
+        SELECT pe.project_key,
+               date_trunc('month', COALESCE((SELECT snapshot_date FROM latest), CURRENT_DATE))::date,
+               pe.ev
+        FROM project_ev pe
+        LEFT JOIN project_hours ph ON ph.project_key = pe.project_key
+        WHERE COALESCE(ph.hours, 0) = 0 AND pe.ev > 0
+    ),
+    costs AS (
+        SELECT project_key, date_trunc('month', date_key)::date AS month_start,
+               SUM(cost_actual) AS cost_actual
+        FROM dwh.fact_budget
+        GROUP BY 1, 2
+    ),
+    risks AS (
+        SELECT project_key, date_trunc('month', date_key)::date AS month_start,
+               COUNT(impact_score) AS risk_count, SUM(impact_score) AS risk_impact_sum
+        FROM dwh.fact_risk
+        WHERE project_key IS NOT NULL
+        GROUP BY 1, 2
+    ),
+    defects AS (
+        SELECT project_key, date_trunc('month', date_key)::date AS month_start,
+               SUM(defect_count_new) AS defects_new, SUM(defect_count_resolved) AS defects_resolved
+        FROM dwh.fact_defect_summary
+        GROUP BY 1, 2
+    ),
+    cells AS (
+        SELECT project_key, month_start FROM utilization
+        UNION SELECT project_key, month_start FROM earned
+        UNION SELECT project_key, month_start FROM costs
+        UNION SELECT project_key, month_start FROM risks
+        UNION SELECT project_key, month_start FROM defects
+    )
+    SELECT k.project_key, k.month_start, c.client_key,
+           EXTRACT(YEAR FROM k.month_start)::int,
+           EXTRACT(QUARTER FROM k.month_start)::int,
+           EXTRACT(MONTH FROM k.month_start)::int,
+           COALESCE(ev.earned_value, 0), COALESCE(co.cost_actual, 0),
+           COALESCE(r.risk_count, 0), COALESCE(r.risk_impact_sum, 0),
+           COALESCE(d.defects_new, 0), COALESCE(d.defects_resolved, 0),
+           COALESCE(u.hours_worked, 0), COALESCE(u.available_hours, 0)
+    FROM cells k
+    JOIN dwh.dim_project p ON p.project_key = k.project_key
+    LEFT JOIN dwh.dim_client c ON c.client_id = p.client_id
+    LEFT JOIN (SELECT project_key, month_start, SUM(earned_value) AS earned_value
+               FROM earned GROUP BY 1, 2) ev
+           ON ev.project_key = k.project_key AND ev.month_start = k.month_start
+    LEFT JOIN costs co ON co.project_key = k.project_key AND co.month_start = k.month_start
+    LEFT JOIN risks r ON r.project_key = k.project_key AND r.month_start = k.month_start
+    LEFT JOIN defects d ON d.project_key = k.project_key AND d.month_start = k.month_start
+    LEFT JOIN utilization u ON u.project_key = k.project_key AND u.month_start = k.month_start
+"""
+
+
+# --- HORAS: empleado x semana y proyecto x mes ---
+# * agg_timelog_employee_week: horas, días con registro y tareas distintas
+#   de cada empleado por semana (lunes, date_trunc('week')). La capacidad
+#   no se guarda: sale de dim_employee al consultar (analytics/utilization.py),
+#   así las semanas sin horas también cuentan.
+# * agg_timelog_project_month: horas por proyecto y mes, con la capacidad de
+#   cada empleado (available_hours_per_week x 4, igual que el BSC) repartida
+#   entre los proyectos según sus horas del mes.
+TIMELOG_ROLLUP_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS dwh.agg_timelog_employee_week (
+        employee_id integer NOT NULL,
+        week_start date NOT NULL,
+        hours_worked numeric(12, 2) NOT NULL DEFAULT 0,
+        days_worked integer NOT NULL DEFAULT 0,
+        task_count integer NOT NULL DEFAULT 0,
+        PRIMARY KEY (employee_id, week_start)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS agg_timelog_employee_week_week_idx ON dwh.agg_timelog_employee_week (week_start)",
+    """
+    CREATE TABLE IF NOT EXISTS dwh.agg_timelog_project_month (
+        project_id integer NOT NULL,
+        month_start date NOT NULL,
+        hours_worked numeric(14, 2) NOT NULL DEFAULT 0,
+        available_hours numeric(14, 2) NOT NULL DEFAULT 0,
+        employee_count integer NOT NULL DEFAULT 0,
+        PRIMARY KEY (project_id, month_start)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS agg_timelog_project_month_month_idx ON dwh.agg_timelog_project_month (month_start)",
+]
+
+EMPLOYEE_WEEK_SQL = """
+    SELECT e.employee_id, date_trunc('week', f.date_key)::date AS week_start,
+           SUM(f.hours_worked)::numeric(12, 2) AS hours_worked,
+           COUNT(DISTINCT f.date_key)::int AS days_worked,
+           COUNT(DISTINCT f.task_key)::int AS task_count
+    FROM dwh.fact_timelog f
+    JOIN dwh.dim_employee e ON e.employee_key = f.employee_key
+    GROUP BY 1, 2
+"""
+
+PROJECT_MONTH_SQL = """
+    WITH emp_project_hours AS (
+        SELECT p.project_id, date_trunc('month', f.date_key)::date AS month_start,
+               f.employee_key, SUM(f.hours_worked) AS hours
+        FROM dwh.fact_timelog f
+        JOIN dwh.dim_task t ON t.task_key = f.task_key
+        JOIN dwh.dim_project p ON p.project_key = t.project_key
+        GROUP BY 1, 2, 3
+    ),
+    emp_hours AS (
+        SELECT employee_key, month_start, SUM(hours) AS hours
+        FROM emp_project_hours
+        GROUP BY 1, 2
+    )
+    SELECT ph.project_id, ph.month_start,
+           SUM(ph.hours)::numeric(14, 2) AS hours_worked,
+           SUM(COALESCE(e.available_hours_per_week, 0) * 4 * ph.hours / NULLIF(eh.hours, 0))::numeric(14, 2) AS available_hours,
+           COUNT(*)::int AS employee_count
+    FROM emp_project_hours ph
+    JOIN emp_hours eh ON eh.employee_key = ph.employee_key AND eh.month_start = ph.month_start
+    JOIN dwh.dim_employee e ON e.employee_key = ph.employee_key
+    GROUP BY 1, 2
+"""
+
+# tabla -> (columnas clave, columnas de medida, SELECT que la calcula desde los hechos)
+TIMELOG_ROLLUPS = {
+    'dwh.agg_timelog_employee_week': (
+        ('employee_id', 'week_start'), ('hours_worked', 'days_worked', 'task_count'), EMPLOYEE_WEEK_SQL,
+    ),
+    'dwh.agg_timelog_project_month': (
+        ('project_id', 'month_start'), ('hours_worked', 'available_hours', 'employee_count'), PROJECT_MONTH_SQL,
+    ),
+}
+
+
+def refresh_timelog_rollups(conn):
+    """
+    Actualiza los agregados de horas (conexión SQLAlchemy al DWH) escribiendo
+    solo las celdas que cambiaron: upsert de las filas nuevas o distintas y
+    borrado de las que ya no existen en los hechos. Devuelve, por tabla, las
+    filas escritas, las borradas y los periodos afectados.
+    """
+    stats = {}
+    for table, (keys, values, select_sql) in TIMELOG_ROLLUPS.items():
+        columns = ', '.join(keys + values)
+        period = keys[1]
+        conn.execute(text("DROP TABLE IF EXISTS rollup_stage"))
+        conn.execute(text(f"CREATE TEMP TABLE rollup_stage ON COMMIT DROP AS {select_sql}"))
+        upserted = conn.execute(text(f"""
+            WITH changed AS (
+                INSERT INTO {table} AS r ({columns})
+                SELECT {columns} FROM rollup_stage
+                ON CONFLICT ({', '.join(keys)}) DO UPDATE
+                SET {', '.join(f'{v} = EXCLUDED.{v}' for v in values)}
+                WHERE ({', '.join(f'r.{v}' for v in values)}) IS DISTINCT FROM ({', '.join(f'EXCLUDED.{v}' for v in values)})
+                RETURNING r.{period}
+            )
+            SELECT COUNT(*), ARRAY(SELECT DISTINCT {period} FROM changed) FROM changed
+        """)).one()
+        deleted = conn.execute(text(f"""
+            WITH changed AS (
+                DELETE FROM {table} r
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM rollup_stage s WHERE {' AND '.join(f's.{k} = r.{k}' for k in keys)}
+                )
+                RETURNING r.{period}
+            )
+            SELECT COUNT(*), ARRAY(SELECT DISTINCT {period} FROM changed) FROM changed
+        """)).one()
+        conn.commit()
+        stats[table] = {
+            'upserted': upserted[0],
+            'deleted': deleted[0],
+            'periods': len(set(upserted[1]) | set(deleted[1])),
+        }
+    return stats
+
+
+# El ETL vacía y reconstruye ROLLUP_TABLES; los agregados de horas no se vacían
+ROLLUP_TABLES = ['dwh.agg_bsc_monthly']
+ROLLUP_DDL = BSC_MONTHLY_DDL + TIMELOG_ROLLUP_DDL
@@ -1,5 +1,10 @@
+from datetime import date, timedelta
+
+from django.conf import settings
 from rest_framework import serializers
 from .models import FactBudget, DimProject
+from . import olap
+from . import defect_trend, utilization
 
 
 class DashboardKPISerializer(serializers.Serializer):
@@ -43,3 +48,277 @@ class BSCResponseSerializer(serializers.Serializer):
     customer = BSCPerspectiveSerializer()
     internal = BSCPerspectiveSerializer()
     learning = BSCPerspectiveSerializer()
+
+
+class ForecastInputSerializer(serializers.Serializer):
+    iterations = serializers.IntegerField(default=10000, min_value=100, max_value=100000, help_text="Número de iteraciones Monte Carlo")
+    seed = serializers.IntegerField(required=False, min_value=0, help_text="Semilla para reproducir una corrida (si se omite se genera una)")
+    window_days = serializers.IntegerField(default=90, min_value=7, max_value=730, help_text="Ventana en días para estimar el ritmo de horas trabajadas")
+
+class ProjectForecastSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    budget_allocated = serializers.FloatField()
+    actual_cost = serializers.FloatField()
+    earned_value = serializers.FloatField()
+    remaining_hours = serializers.FloatField()
+    cpi_median = serializers.FloatField(help_text="CPI mediano simulado")
+    eac_p50 = serializers.FloatField()
+    eac_p80 = serializers.FloatField()
+    eac_p95 = serializers.FloatField()
+    finish_p50 = serializers.DateField(allow_null=True)
+    finish_p80 = serializers.DateField(allow_null=True)
+    finish_p95 = serializers.DateField(allow_null=True)
+
+class PortfolioForecastSerializer(serializers.Serializer):
+    budget_allocated = serializers.FloatField()
+    eac_p50 = serializers.FloatField()
+    eac_p80 = serializers.FloatField()
+    eac_p95 = serializers.FloatField()
+
+class ForecastOutputSerializer(serializers.Serializer):
+    as_of = serializers.DateField()
+    iterations = serializers.IntegerField()
+    seed = serializers.IntegerField()
+    portfolio = PortfolioForecastSerializer()
+    projects = ProjectForecastSerializer(many=True)
+
+
+class BSCDrilldownInputSerializer(serializers.Serializer):
+    GROUP_CHOICES = ('client', 'project')
+
+    group_by = serializers.CharField(default='client', allow_blank=True, help_text="Dimensiones separadas por coma: 'client', 'project' o 'client,project'")
+    period = serializers.ChoiceField(choices=['month', 'quarter', 'year', 'all'], default='month', help_text="Granularidad temporal")
+    client = serializers.IntegerField(required=False, help_text="Filtrar por client_id")
+    project = serializers.IntegerField(required=False, help_text="Filtrar por project_id")
+    date_from = serializers.DateField(required=False, help_text="Incluye desde el mes de esta fecha")
+    date_to = serializers.DateField(required=False, help_text="Incluye hasta el mes de esta fecha")
+
+    def validate_group_by(self, value):
+        groups = [g.strip() for g in value.split(',') if g.strip()]
+        invalid = [g for g in groups if g not in self.GROUP_CHOICES]
+        if invalid:
+            raise serializers.ValidationError(f"Dimensiones no soportadas: {', '.join(invalid)}")
+        return groups
+
+class BSCKPIValuesSerializer(serializers.Serializer):
+    cpi = serializers.FloatField()
+    avg_risk_impact = serializers.FloatField()
+    defect_resolution_rate = serializers.FloatField()
+    utilization_rate = serializers.FloatField()
+
+class BSCDrilldownRowSerializer(BSCKPIValuesSerializer):
+    client_id = serializers.IntegerField(required=False, allow_null=True)
+    client_name = serializers.CharField(required=False, allow_null=True)
+    project_id = serializers.IntegerField(required=False)
+    project_name = serializers.CharField(required=False)
+    period = serializers.CharField(required=False)
+    earned_value = serializers.FloatField()
+    actual_cost = serializers.FloatField()
+    hours_worked = serializers.FloatField()
+
+class BSCDrilldownOutputSerializer(serializers.Serializer):
+    group_by = serializers.ListField(child=serializers.CharField())
+    period = serializers.CharField()
+    rows = BSCDrilldownRowSerializer(many=True)
+    totals = BSCKPIValuesSerializer()
+    scorecard = BSCResponseSerializer()
+
+
+class DateRangeInputMixin:
+    """
+    Rango date_from/date_to de un reporte, validado con los valores por
+    defecto ya aplicados (date_to = hoy, date_from = la ventana del periodo
+    antes de date_to): un rango abierto también respeta el máximo de 10 años.
+    """
+    MAX_RANGE_DAYS = 10 * 366
+    # Fechas que el calendario del DWH y la aritmética de periodos soportan de sobra
+    MIN_DATE = date(1900, 1, 1)
+    MAX_DATE = date(2100, 12, 31)
+
+    def validate_date_range(self, attrs, window_days):
+        for name in ('date_from', 'date_to'):
+            value = attrs.get(name)
+            if value is not None and not self.MIN_DATE <= value <= self.MAX_DATE:
+                raise serializers.ValidationError({name: f"Debe estar entre {self.MIN_DATE} y {self.MAX_DATE}."})
+        date_to = attrs.setdefault('date_to', date.today())
+        date_from = attrs.setdefault('date_from', date_to - timedelta(days=window_days))
+        if date_from > date_to:
+            raise serializers.ValidationError({"date_from": "Debe ser anterior o igual a date_to."})
+        if (date_to - date_from).days > self.MAX_RANGE_DAYS:
+            raise serializers.ValidationError({"date_from": "El rango no puede superar 10 años."})
+        return attrs
+
+
+class UtilizationInputSerializer(DateRangeInputMixin, serializers.Serializer):
+    group_by = serializers.ChoiceField(choices=['employee', 'role', 'project'], default='employee', help_text="Agrupación de las filas")
+    period = serializers.ChoiceField(choices=['week', 'month', 'quarter', 'year'], default='week', help_text="Granularidad temporal (proyecto: desde mes)")
+    date_from = serializers.DateField(required=False, help_text="Incluye desde el periodo de esta fecha (por defecto según el periodo)")
+    date_to = serializers.DateField(required=False, help_text="Incluye hasta el periodo de esta fecha (por defecto hoy)")
+    employee = serializers.IntegerField(required=False, help_text="Filtrar por employee_id")
+    role = serializers.CharField(required=False, help_text="Filtrar por rol")
+    project = serializers.IntegerField(required=False, help_text="Filtrar por project_id (group_by=project)")
+    layout = serializers.ChoiceField(choices=['rows', 'heatmap'], default='rows', help_text="'rows': una fila por grupo y periodo; 'heatmap': una serie por grupo")
+    limit = serializers.IntegerField(default=50, min_value=1, max_value=500, help_text="Grupos más utilizados a devolver")
+
+    def validate(self, attrs):
+        if attrs['group_by'] == 'project' and attrs['period'] == 'week':
+            raise serializers.ValidationError({"period": "La utilización por proyecto es mensual: use month, quarter o year."})
+        return self.validate_date_range(attrs, utilization.DEFAULT_WINDOW_DAYS[attrs['period']])
+
+class UtilizationMeasuresSerializer(serializers.Serializer):
+    hours_worked = serializers.FloatField()
+    available_hours = serializers.FloatField()
+    utilization_rate = serializers.FloatField(help_text="Horas trabajadas / capacidad (%)")
+
+class UtilizationGroupSerializer(UtilizationMeasuresSerializer):
+    employee_id = serializers.IntegerField(required=False)
+    employee_name = serializers.CharField(required=False, allow_null=True)
+    role = serializers.CharField(required=False, allow_null=True)
+    employee_count = serializers.IntegerField(required=False, help_text="Empleados del rol")
+    project_id = serializers.IntegerField(required=False)
+    project_name = serializers.CharField(required=False, allow_null=True)
+
+class UtilizationRowSerializer(UtilizationGroupSerializer):
+    period = serializers.CharField()
+    period_start = serializers.DateField()
+
+class UtilizationSeriesSerializer(UtilizationGroupSerializer):
+    values = serializers.ListField(child=serializers.FloatField(), help_text="Utilización (%) de cada periodo, en el orden de 'periods'")
+    hours = serializers.ListField(child=serializers.FloatField(), help_text="Horas trabajadas de cada periodo")
+
+class UtilizationOutputSerializer(serializers.Serializer):
+    group_by = serializers.CharField()
+    period = serializers.CharField()
+    date_from = serializers.DateField()
+    date_to = serializers.DateField()
+    totals = UtilizationMeasuresSerializer()
+    rows = UtilizationRowSerializer(many=True, required=False, help_text="layout=rows")
+    periods = serializers.ListField(child=serializers.CharField(), required=False, help_text="layout=heatmap")
+    series = UtilizationSeriesSerializer(many=True, required=False, help_text="layout=heatmap")
+
+
+class RiskMatrixInputSerializer(serializers.Serializer):
+    project = serializers.IntegerField(required=False, help_text="Filtrar por project_id")
+    client = serializers.IntegerField(required=False, help_text="Filtrar por client_id")
+    status = serializers.ChoiceField(choices=['Open', 'Mitigated', 'Closed'], required=False, help_text="Estado del riesgo")
+    probability_buckets = serializers.IntegerField(default=5, min_value=1, max_value=20, help_text="Intervalos de probabilidad (0 a 1)")
+    impact_buckets = serializers.IntegerField(default=5, min_value=1, max_value=10, help_text="Intervalos de impacto (1 a 10)")
+
+class RiskMatrixTotalsSerializer(serializers.Serializer):
+    risk_count = serializers.IntegerField()
+    exposure = serializers.FloatField(help_text="Suma de probabilidad x impacto")
+
+class RiskMatrixOutputSerializer(serializers.Serializer):
+    filters = serializers.DictField(help_text="Filtros aplicados")
+    probability_edges = serializers.ListField(child=serializers.FloatField(), help_text="Límites de los intervalos de probabilidad (columnas)")
+    impact_edges = serializers.ListField(child=serializers.FloatField(), help_text="Límites de los intervalos de impacto (filas)")
+    counts = serializers.ListField(child=serializers.ListField(child=serializers.IntegerField()), help_text="Riesgos por celda [impacto][probabilidad]")
+    exposure = serializers.ListField(child=serializers.ListField(child=serializers.FloatField()), help_text="Exposición por celda [impacto][probabilidad]")
+    totals = RiskMatrixTotalsSerializer()
+    dwh_version = serializers.IntegerField(allow_null=True, help_text="run_id de la carga del DWH usada")
+    cached = serializers.BooleanField()
+
+
+class DefectTrendInputSerializer(DateRangeInputMixin, serializers.Serializer):
+    grain = serializers.ChoiceField(choices=['day', 'week', 'month'], default='week', help_text="Granularidad de la serie")
+    group_by = serializers.ChoiceField(choices=['portfolio', 'project'], default='portfolio', help_text="Una serie para todo el portafolio o una por proyecto")
+    date_from = serializers.DateField(required=False, help_text="Inicio del rango (por defecto según la granularidad)")
+    date_to = serializers.DateField(required=False, help_text="Fin del rango (por defecto hoy)")
+    project = serializers.IntegerField(required=False, help_text="Filtrar por project_id")
+    client = serializers.IntegerField(required=False, help_text="Filtrar por client_id")
+    max_points = serializers.IntegerField(default=120, min_value=10, max_value=1000, help_text="Máximo de puntos por serie; si el rango tiene más periodos se agrupan (downsampling)")
+    limit = serializers.IntegerField(default=20, min_value=1, max_value=200, help_text="Proyectos con mayor backlog a devolver (group_by=project)")
+
+    def validate(self, attrs):
+        return self.validate_date_range(attrs, defect_trend.DEFAULT_WINDOW_DAYS[attrs['grain']])
+
+class DefectTrendPointSerializer(serializers.Serializer):
+    period_start = serializers.DateField()
+    days = serializers.IntegerField(help_text="Días del calendario que cubre el punto")
+    new = serializers.IntegerField(help_text="Defectos detectados")
+    resolved = serializers.IntegerField(help_text="Defectos resueltos")
+    arrival_rate = serializers.FloatField(help_text="Defectos detectados por día")
+    resolution_rate = serializers.FloatField(help_text="Defectos resueltos por día")
+    backlog = serializers.IntegerField(help_text="Defectos abiertos al cierre del punto")
+    mttr_days = serializers.FloatField(allow_null=True, help_text="Días promedio hasta la resolución de los resueltos en el punto")
+
+class DefectTrendTotalsSerializer(serializers.Serializer):
+    new = serializers.IntegerField()
+    resolved = serializers.IntegerField()
+    backlog = serializers.IntegerField(help_text="Defectos abiertos al final del rango")
+    mttr_days = serializers.FloatField(allow_null=True)
+
+class DefectTrendSeriesSerializer(serializers.Serializer):
+    project_id = serializers.IntegerField(required=False)
+    project_name = serializers.CharField(required=False, allow_null=True)
+    points = DefectTrendPointSerializer(many=True)
+    totals = DefectTrendTotalsSerializer()
+
+class DefectTrendOutputSerializer(serializers.Serializer):
+    grain = serializers.CharField()
+    group_by = serializers.CharField()
+    date_from = serializers.DateField()
+    date_to = serializers.DateField()
+    stride = serializers.IntegerField(help_text="Periodos de la granularidad agrupados en cada punto")
+    series = DefectTrendSeriesSerializer(many=True)
+
+
+class OLAPFilterSerializer(serializers.Serializer):
+    # Campo que valida y convierte los valores según el tipo de la dimensión (olap.DIMENSIONS)
+    VALUE_FIELDS = {
+        'date': serializers.DateField,
+        'int': serializers.IntegerField,
+        'bool': serializers.BooleanField,
+        'text': lambda: serializers.CharField(allow_blank=True, trim_whitespace=False),
+    }
+
+    dimension = serializers.ChoiceField(choices=olap.DIMENSION_CHOICES)
+    op = serializers.ChoiceField(choices=sorted(olap.FILTER_OPERATORS), default='eq')
+    value = serializers.JSONField(help_text="Escalar, o lista para 'in' y [desde, hasta] para 'between', del tipo de la dimensión")
+
+    def validate(self, attrs):
+        value = attrs['value']
+        if attrs['op'] == 'in' and not (isinstance(value, list) and value):
+            raise serializers.ValidationError({"value": "El operador 'in' requiere una lista no vacía."})
+        if attrs['op'] == 'between' and not (isinstance(value, list) and len(value) == 2):
+            raise serializers.ValidationError({"value": "El operador 'between' requiere una lista [desde, hasta]."})
+        if attrs['op'] not in ('in', 'between') and isinstance(value, (list, dict)):
+            raise serializers.ValidationError({"value": "Se esperaba un valor escalar."})
+
+        field = self.VALUE_FIELDS[olap.DIMENSIONS[attrs['dimension']][2]]()
+        if not isinstance(value, list):
+            try:
+                attrs['value'] = field.run_validation(value)
+            except serializers.ValidationError as e:
+                raise serializers.ValidationError({"value": e.detail})
+            return attrs
+
+        values, errors = [], {}
+        for index, item in enumerate(value):
+            try:
+                values.append(field.run_validation(item))
+            except serializers.ValidationError as e:
+                errors[index] = e.detail
+        if errors:
+            raise serializers.ValidationError({"value": errors})
+        attrs['value'] = values
+        return attrs
+
+class OLAPOrderSerializer(serializers.Serializer):
+    field = serializers.CharField()
+    desc = serializers.BooleanField(default=False)
+
+class OLAPQuerySerializer(serializers.Serializer):
+    measures = serializers.ListField(child=serializers.ChoiceField(choices=sorted(olap.MEASURES)), min_length=1)
+    dimensions = serializers.ListField(child=serializers.ChoiceField(choices=olap.DIMENSION_CHOICES), default=list)
+    filters = OLAPFilterSerializer(many=True, default=list)
+    order_by = OLAPOrderSerializer(many=True, default=list)
+    limit = serializers.IntegerField(default=100, min_value=1, max_value=settings.OLAP_MAX_LIMIT)
+
+class OLAPQueryResultSerializer(serializers.Serializer):
+    query = serializers.DictField()
+    columns = serializers.ListField(child=serializers.CharField())
+    rows = serializers.ListField(child=serializers.DictField())
+    estimated_cost = serializers.FloatField()
+    cached = serializers.BooleanField()
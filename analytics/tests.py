@@ -1,3 +1,390 @@
-from django.test import TestCase
+"""
+Pruebas de los endpoints de análisis contra PostgreSQL.
 
-# Create your tests here.
+Los modelos de analytics no son administrados (el ETL crea y llena el esquema
+``dwh``), así que ``DWHTestCase`` crea las tablas en la base de pruebas del
+DSS a partir de los modelos y del DDL de los agregados y la bitácora del ETL.
+"""
+import unittest
+from datetime import date, timedelta
+
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connections
+from django.test import SimpleTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from analytics import defect_trend, olap, utilization
+from analytics.etl_runs import ETL_RUN_LOG_DDL, dwh_version
+from analytics.rollups import ROLLUP_DDL
+from analytics.serializers import DefectTrendInputSerializer, OLAPQuerySerializer, UtilizationInputSerializer
+
+DSS = 'project_dss'
+
+# Un proyecto con dos tareas y dos empleados, y horas en dos días
+SEED_SQL = [
+    """
+    INSERT INTO dwh.dim_date (date_key, year, quarter, month, day, week, is_workday)
+    SELECT d, EXTRACT(year FROM d), EXTRACT(quarter FROM d), EXTRACT(month FROM d), EXTRACT(day FROM d),
+           EXTRACT(week FROM d), EXTRACT(isodow FROM d) < 6
+    FROM generate_series(DATE '2024-01-01', DATE '2024-12-31', INTERVAL '1 day') d
+    """,
+    "INSERT INTO dwh.dim_status (status_key, status_id, category) VALUES (1, 'Active', 'Activo')",
+    "INSERT INTO dwh.dim_project (project_key, project_id, name, client_id, status_key) VALUES (1, 7, 'Proyecto 7', 3, 1)",
+    "INSERT INTO dwh.dim_task (task_key, task_id, project_key, name) VALUES (1, 70, 1, 'Tarea 70'), (2, 71, 1, 'Tarea 71')",
+    "INSERT INTO dwh.dim_employee (employee_key, employee_id, name, role) VALUES (1, 1, 'Ana', 'Developer'), (2, 2, 'Luis', 'QA')",
+    """
+    INSERT INTO dwh.fact_timelog (date_key, task_key, employee_key, hours_worked)
+    VALUES ('2024-03-04', 1, 1, 6), ('2024-03-04', 2, 2, 2), ('2024-03-05', 1, 2, 4)
+    """,
+]
+
+
+def create_dwh_schema():
+    """Crea el esquema dwh en la base de pruebas del DSS (una vez por corrida)."""
+    connection = connections[DSS]
+    with connection.cursor() as cursor:
+        cursor.execute('CREATE SCHEMA IF NOT EXISTS dwh')
+        cursor.execute("SELECT to_regclass('dwh.dim_date')")
+        if cursor.fetchone()[0] is not None:
+            return
+
+    with connection.schema_editor() as editor:
+        for model in apps.get_app_config('analytics').get_models():
+            editor.create_model(model)
+
+    with connection.cursor() as cursor:
+        # Las tablas que ya creó el modelo (agg_bsc_monthly) quedan como están
+        for sql in ROLLUP_DDL + [ETL_RUN_LOG_DDL]:
+            cursor.execute(sql)
+
+
+@unittest.skipUnless(connections[DSS].vendor == 'postgresql', 'El esquema dwh requiere PostgreSQL.')
+class DWHTestCase(APITestCase):
+    databases = {'default', DSS}
+
+    @classmethod
+    def setUpClass(cls):
+        # Fuera de la transacción de la clase: las tablas quedan para toda la corrida
+        create_dwh_schema()
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('analista', password='analista')
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+        cache.clear()
+
+    def assertParamsRejected(self, params, field):
+        """GET a ``self.URL`` con 400 en ``field`` y sin consultar el DWH."""
+        with CaptureQueriesContext(connections[DSS]) as queries:
+            response = self.client.get(self.URL, params)
+        self.assertEqual(response.status_code, 400, response.content)
+        self.assertIn(field, response.data)
+        self.assertEqual(len(queries), 0)
+
+
+# --- CONSULTAS OLAP ---
+
+class OLAPCompilerTests(SimpleTestCase):
+    """El SQL que arma ``compile_query`` a partir de una consulta normalizada."""
+
+    def compile(self, **query):
+        return olap.compile_query(olap.normalize({'limit': 100, **query}))
+
+    def test_joins_follow_dependencies(self):
+        sql, params, columns = self.compile(
+            measures=['hours_worked_sum'], dimensions=['project.name'],
+            filters=[{'dimension': 'date.year', 'op': 'eq', 'value': 2024}],
+        )
+        self.assertEqual(sql, (
+            'SELECT p.name AS c0, SUM(f.hours_worked) AS c1 FROM dwh.fact_timelog f '
+            'JOIN dwh.dim_date d ON d.date_key = f.date_key '
+            'JOIN dwh.dim_task t ON t.task_key = f.task_key '
+            'LEFT JOIN dwh.dim_project p ON p.project_key = t.project_key '
+            'WHERE d.year = %s GROUP BY 1 ORDER BY c0 LIMIT %s'
+        ))
+        self.assertEqual(params, [2024, 100])
+        self.assertEqual(columns, ['project.name', 'hours_worked_sum'])
+
+    def test_filter_values_are_parameters(self):
+        sql, params, _ = self.compile(
+            measures=['risk_count'],
+            filters=[
+                {'dimension': 'status.id', 'op': 'in', 'value': ['Open', 'Closed', 'Open']},
+                {'dimension': 'date.date', 'op': 'between', 'value': [date(2024, 1, 1), date(2024, 6, 30)]},
+            ],
+        )
+        self.assertIn('d.date_key BETWEEN %s AND %s', sql)
+        self.assertIn('s.status_id IN %s', sql)
+        self.assertNotIn('Open', sql)
+        self.assertEqual(params, [date(2024, 1, 1), date(2024, 6, 30), ('Closed', 'Open'), 100])
+
+    def test_order_by(self):
+        sql, _, _ = self.compile(
+            measures=['hours_worked_sum'], dimensions=['employee.role'],
+            order_by=[{'field': 'hours_worked_sum', 'desc': True}],
+        )
+        self.assertTrue(sql.endswith('GROUP BY 1 ORDER BY c1 DESC LIMIT %s'))
+
+    def test_normalized_queries_share_cache_key(self):
+        first = olap.normalize({
+            'measures': ['timelog_count', 'hours_worked_sum'], 'dimensions': ['date.month'], 'limit': 10,
+            'filters': [{'dimension': 'employee.id', 'op': 'in', 'value': [2, 1]}],
+        })
+        second = olap.normalize({
+            'measures': ['hours_worked_sum', 'timelog_count'], 'dimensions': ['date.month'], 'limit': 10,
+            'filters': [{'dimension': 'employee.id', 'op': 'in', 'value': [1, 2, 2]}],
+        })
+        self.assertEqual(olap.cache_key(first), olap.cache_key(second))
+
+    def test_measures_from_different_facts(self):
+        with self.assertRaises(olap.OLAPQueryError):
+            self.compile(measures=['hours_worked_sum', 'risk_count'])
+
+    def test_dimension_not_joined_to_fact(self):
+        with self.assertRaises(olap.OLAPQueryError):
+            self.compile(measures=['cost_actual_sum'], dimensions=['employee.name'])
+
+    def test_order_by_unselected_column(self):
+        with self.assertRaises(olap.OLAPQueryError):
+            self.compile(measures=['risk_count'], order_by=[{'field': 'project.name'}])
+
+
+class OLAPQueryTests(DWHTestCase):
+    URL = '/api/analytics/query/'
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        with connections[DSS].cursor() as cursor:
+            for sql in SEED_SQL:
+                cursor.execute(sql)
+
+    def post(self, query):
+        return self.client.post(self.URL, query, format='json')
+
+    def assertRejected(self, query, *path):
+        """400 sin tocar el DWH; ``path`` lleva al error dentro de la respuesta."""
+        with CaptureQueriesContext(connections[DSS]) as queries:
+            response = self.post(query)
+        self.assertEqual(response.status_code, 400, response.content)
+        self.assertEqual(len(queries), 0)
+        self.assertNotIn(b'SELECT', response.content)
+        detail = response.data
+        for key in path:
+            detail = detail[key]
+        return detail
+
+    def test_query(self):
+        query = {
+            'measures': ['hours_worked_sum'], 'dimensions': ['employee.name'],
+            'filters': [{'dimension': 'project.id', 'op': 'eq', 'value': '7'}],
+        }
+        response = self.post(query)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.data['rows'], [
+            {'employee.name': 'Ana', 'hours_worked_sum': 6.0},
+            {'employee.name': 'Luis', 'hours_worked_sum': 6.0},
+        ])
+        self.assertFalse(response.data['cached'])
+        with CaptureQueriesContext(connections[DSS]) as queries:
+            self.assertTrue(self.post(query).data['cached'])
+        self.assertEqual(len(queries), 0)
+
+    def test_date_filters(self):
+        response = self.post({
+            'measures': ['timelog_count'], 'dimensions': ['date.date'],
+            'filters': [
+                {'dimension': 'date.date', 'op': 'between', 'value': ['2024-03-01', '2024-03-04']},
+                {'dimension': 'date.is_workday', 'op': 'eq', 'value': 'true'},
+            ],
+        })
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.data['rows'], [{'date.date': '2024-03-04', 'timelog_count': 2}])
+
+    def test_unknown_names_rejected(self):
+        self.assertRejected({'measures': ['SUM(1); DROP TABLE dwh.dim_date']}, 'measures', 0)
+        self.assertRejected({'measures': ['risk_count'], 'dimensions': ['p.name']}, 'dimensions', 0)
+        self.assertRejected(
+            {'measures': ['risk_count'], 'filters': [{'dimension': 'd.date_key', 'value': 1}]},
+            'filters', 0, 'dimension',
+        )
+        self.assertRejected(
+            {'measures': ['risk_count'], 'filters': [{'dimension': 'date.year', 'op': 'like', 'value': 1}]},
+            'filters', 0, 'op',
+        )
+
+    def test_compiler_errors_rejected(self):
+        error = self.assertRejected({'measures': ['hours_worked_sum', 'risk_count']}, 'error')
+        self.assertIn('misma tabla de hechos', error)
+
+    def test_value_of_wrong_type(self):
+        self.assertRejected(
+            {'measures': ['risk_count'], 'filters': [{'dimension': 'project.id', 'op': 'eq', 'value': 'abc'}]},
+            'filters', 0, 'value',
+        )
+
+    def test_list_element_of_wrong_type(self):
+        errors = self.assertRejected(
+            {'measures': ['risk_count'],
+             'filters': [{'dimension': 'date.date', 'op': 'between', 'value': ['2026-01-01', 'x']}]},
+            'filters', 0, 'value',
+        )
+        self.assertEqual(list(errors), [1])
+
+    def test_unorderable_list_elements(self):
+        errors = self.assertRejected(
+            {'measures': ['risk_count'],
+             'filters': [{'dimension': 'project.id', 'op': 'in', 'value': [{'a': 1}, {'b': 2}]}]},
+            'filters', 0, 'value',
+        )
+        self.assertEqual(sorted(errors), [0, 1])
+        self.assertRejected(
+            {'measures': ['risk_count'],
+             'filters': [{'dimension': 'project.name', 'op': 'in', 'value': ['Proyecto 7', ['x']]}]},
+            'filters', 0, 'value', 1,
+        )
+
+    def test_values_coerced_to_dimension_type(self):
+        serializer = OLAPQuerySerializer(data={'measures': ['risk_count'], 'filters': [
+            {'dimension': 'project.id', 'op': 'in', 'value': ['7', 3]},
+            {'dimension': 'date.date', 'op': 'gte', 'value': '2024-01-01'},
+            {'dimension': 'status.id', 'op': 'eq', 'value': ' Open'},
+        ]})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        values = [f['value'] for f in serializer.validated_data['filters']]
+        self.assertEqual(values, [[7, 3], date(2024, 1, 1), ' Open'])
+
+    def test_data_error_without_sql(self):
+        # Sin pasar por el serializer: la base rechaza el valor y no se devuelve su mensaje
+        query = {
+            'measures': ['risk_count'], 'limit': 10,
+            'filters': [{'dimension': 'project.id', 'op': 'eq', 'value': 'abc'}],
+        }
+        with self.assertRaises(olap.OLAPQueryError) as raised:
+            olap.run_query(query)
+        self.assertNotIn('SELECT', str(raised.exception))
+        self.assertNotIn('project_id', str(raised.exception))
+
+
+# --- UTILIZACIÓN ---
+
+class UtilizationRangeTests(DWHTestCase):
+    """El rango se valida con los valores por defecto ya aplicados, antes de tocar el DWH."""
+    URL = '/api/analytics/utilization/'
+
+    def test_defaults_applied(self):
+        serializer = UtilizationInputSerializer(data={'period': 'month'})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        today = date.today()
+        self.assertEqual(serializer.validated_data['date_to'], today)
+        self.assertEqual(serializer.validated_data['date_from'], today - timedelta(days=utilization.DEFAULT_WINDOW_DAYS['month']))
+
+    def test_open_range_limited(self):
+        # Solo date_from: el rango llega hasta hoy
+        self.assertParamsRejected({'period': 'year', 'date_from': '0001-01-01'}, 'date_from')
+        self.assertParamsRejected({'period': 'year', 'date_from': '2001-01-01'}, 'date_from')
+        self.assertParamsRejected({'date_from': date.today() + timedelta(days=1)}, 'date_from')
+
+    def test_dates_out_of_bounds(self):
+        self.assertParamsRejected({'date_to': '9999-12-31'}, 'date_to')
+        self.assertParamsRejected({'period': 'year', 'date_from': '9999-01-01', 'date_to': '9999-12-31'}, 'date_from')
+        self.assertParamsRejected({'date_to': '0001-01-01'}, 'date_to')
+
+    def test_valid_range(self):
+        response = self.client.get(self.URL, {'period': 'month', 'date_from': '2024-03-10', 'date_to': '2024-04-02'})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual((response.data['date_from'], response.data['date_to']), (date(2024, 3, 1), date(2024, 4, 30)))
+
+
+# --- TENDENCIA DE DEFECTOS ---
+
+class DefectTrendTests(DWHTestCase):
+    URL = '/api/analytics/defect-trend/'
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        with connections[DSS].cursor() as cursor:
+            for sql in SEED_SQL:
+                cursor.execute(sql)
+            # Un defecto nuevo cada lunes de 2024 (el calendario de prueba es solo 2024)
+            cursor.execute("""
+                INSERT INTO dwh.fact_defect_summary (date_key, project_key, defect_count_new, defect_count_resolved, resolution_days)
+                SELECT date_key, 1, 1, 0, 0 FROM dwh.dim_date WHERE EXTRACT(isodow FROM date_key) = 1
+            """)
+
+    def test_range_and_stride_follow_calendar(self):
+        # Pedido desde 2023: 106 semanas, pero el calendario solo tiene las 53 de 2024
+        response = self.client.get(self.URL, {'date_from': '2023-01-01', 'date_to': '2024-12-31', 'max_points': 10})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual((response.data['date_from'], response.data['date_to']), (date(2024, 1, 1), date(2024, 12, 31)))
+        self.assertEqual(response.data['stride'], 6)
+        points = response.data['series'][0]['points']
+        self.assertEqual(len(points), 9)
+        self.assertEqual(points[0]['period_start'], date(2024, 1, 1))
+        self.assertEqual([point['days'] for point in points], [42] * 8 + [30])
+        self.assertEqual(points[-1]['backlog'], 53)
+
+    def test_range_outside_calendar(self):
+        response = self.client.get(self.URL, {'grain': 'month', 'date_from': '2020-01-01', 'date_to': '2020-12-31'})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.data['series'], [])
+        self.assertEqual((response.data['date_from'], response.data['date_to']), (date(2020, 1, 1), date(2020, 12, 31)))
+
+    def test_defaults_applied(self):
+        serializer = DefectTrendInputSerializer(data={'grain': 'day'})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        today = date.today()
+        self.assertEqual(serializer.validated_data['date_to'], today)
+        self.assertEqual(serializer.validated_data['date_from'], today - timedelta(days=defect_trend.DEFAULT_WINDOW_DAYS['day']))
+
+    def test_open_range_limited(self):
+        self.assertParamsRejected({'grain': 'month', 'date_from': '0001-01-01'}, 'date_from')
+        self.assertParamsRejected({'date_from': date.today() + timedelta(days=1)}, 'date_from')
+
+    def test_dates_out_of_bounds(self):
+        self.assertParamsRejected({'date_to': '9999-12-31'}, 'date_to')
+        self.assertParamsRejected({'grain': 'month', 'date_from': '9999-01-01', 'date_to': '9999-12-31'}, 'date_from')
+
+
+# --- MATRIZ DE RIESGOS ---
+
+class RiskMatrixTests(DWHTestCase):
+    URL = '/api/analytics/risk-matrix/'
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        with connections[DSS].cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO dwh.etl_run_log (started_at, finished_at, duration_seconds, success)
+                VALUES (now(), now(), 1, true), (now(), now(), 1, true)
+                RETURNING run_id
+            """)
+            cls.run_id = max(run_id for run_id, in cursor.fetchall())
+
+    def get(self):
+        with CaptureQueriesContext(connections[DSS]) as queries:
+            response = self.client.get(self.URL)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.data, len(queries)
+
+    def test_version_in_one_query(self):
+        data, queries = self.get()
+        # Versión del DWH y matriz; con la caché solo la versión
+        self.assertEqual((data['dwh_version'], data['cached'], queries), (self.run_id, False, 2))
+        data, queries = self.get()
+        self.assertEqual((data['dwh_version'], data['cached'], queries), (self.run_id, True, 1))
+
+    def test_version_without_run_log(self):
+        with connections[DSS].cursor() as cursor:
+            cursor.execute('DROP TABLE dwh.etl_run_log')
+        with CaptureQueriesContext(connections[DSS]) as queries:
+            self.assertIsNone(dwh_version(DSS))
+        self.assertEqual(len(queries), 1)
@@ -1,12 +1,32 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import DashboardKPIViewSet, PredictionViewSet, BSCViewSet
+from .views import DashboardKPIViewSet, PredictionViewSet, BSCViewSet, ForecastViewSet, OLAPQueryViewSet, UtilizationViewSet, RiskMatrixViewSet, DefectTrendViewSet
+from . import async_views
 
 router = DefaultRouter()
 router.register(r'mission-kpis', DashboardKPIViewSet, basename='mission-kpis')
 router.register(r'predictions', PredictionViewSet, basename='predictions')
 router.register(r'bsc', BSCViewSet, basename='bsc')
+router.register(r'forecast', ForecastViewSet, basename='forecast')
+router.register(r'query', OLAPQueryViewSet, basename='olap-query')
+router.register(r'utilization', UtilizationViewSet, basename='utilization')
+router.register(r'risk-matrix', RiskMatrixViewSet, basename='risk-matrix')
+router.register(r'defect-trend', DefectTrendViewSet, basename='defect-trend')
 
+# Versiones asíncronas: consultas independientes en paralelo
 urlpatterns = [
+    path('async/mission-kpis/', async_views.mission_kpis, name='mission-kpis-async'),
+    path('async/bsc/dashboard/', async_views.bsc_dashboard, name='bsc-dashboard-async'),
+]
+
+# En modo ASGI las rutas canónicas se atienden con las vistas asíncronas
+if settings.ASGI_MODE:
+    urlpatterns += [
+        path('mission-kpis/', async_views.mission_kpis, name='mission-kpis-list'),
+        path('bsc/dashboard/', async_views.bsc_dashboard, name='bsc-dashboard'),
+    ]
+
+urlpatterns += [
     path('', include(router.urls)),
-]
\ No newline at end of file
+]
@@ -0,0 +1,246 @@
+"""
+Utilización de recursos por empleado, rol o proyecto y periodo, servida desde
+los agregados de horas que mantiene el ETL (analytics/rollups.py).
+
+- Empleado y rol: horas de ``agg_timelog_employee_week`` contra la capacidad
+  de ``dim_employee`` (available_hours_per_week por cada semana del rango, con
+  o sin horas registradas). Cada semana pertenece al mes / trimestre / año de
+  su lunes.
+- Proyecto: horas y capacidad repartida de ``agg_timelog_project_month``
+  (mismo criterio que el cubo BSC); no admite periodo semanal.
+
+Una sola consulta calcula las celdas grupo x periodo, la utilización de cada
+grupo para ordenarlos (los ``limit`` más utilizados) y los totales de todos
+los grupos filtrados.
+"""
+from datetime import timedelta
+
+from django.db import connections
+
+from core.db_routers import read_alias
+
+# Rango por defecto (días hacia atrás desde date_to) según el periodo; lo aplica UtilizationInputSerializer
+DEFAULT_WINDOW_DAYS = {'week': 7 * 11, 'month': 365, 'quarter': 2 * 365, 'year': 3 * 365}
+
+EMPLOYEE_CELLS_SQL = """
+    WITH weeks AS (
+        SELECT w::date AS week_start, date_trunc(%(period)s, w)::date AS period_start
+        FROM generate_series(%(date_from)s::date, %(date_to)s::date, interval '1 week') AS w
+    ),
+    periods AS (
+        SELECT period_start, COUNT(*) AS weeks FROM weeks GROUP BY 1
+    ),
+    employees AS (
+        SELECT employee_id, name, role, COALESCE(available_hours_per_week, 0) AS weekly_hours
+        FROM dwh.dim_employee
+        WHERE (%(employee)s::int IS NULL OR employee_id = %(employee)s)
+          AND (%(role)s::text IS NULL OR role = %(role)s)
+    ),
+    hours AS (
+        SELECT r.employee_id, k.period_start, SUM(r.hours_worked) AS hours
+        FROM dwh.agg_timelog_employee_week r
+        JOIN weeks k ON k.week_start = r.week_start
+        JOIN employees e ON e.employee_id = r.employee_id
+        WHERE r.week_start BETWEEN %(date_from)s AND %(date_to)s
+        GROUP BY 1, 2
+    ),
+    cells AS (
+        SELECT {group_columns}, p.period_start,
+               COUNT(*) AS employee_count,
+               SUM(COALESCE(h.hours, 0)) AS hours_worked,
+               SUM(e.weekly_hours * p.weeks) AS available_hours
+        FROM employees e
+        CROSS JOIN periods p
+        LEFT JOIN hours h ON h.employee_id = e.employee_id AND h.period_start = p.period_start
+        GROUP BY {group_positions}, p.period_start
+    )
+"""
+
+PROJECT_CELLS_SQL = """
+    WITH cells AS (
+        SELECT r.project_id AS group_id, p.name AS project_name,
+               date_trunc(%(period)s, r.month_start)::date AS period_start,
+               NULL::bigint AS employee_count,
+               SUM(r.hours_worked) AS hours_worked,
+               SUM(r.available_hours) AS available_hours
+        FROM dwh.agg_timelog_project_month r
+        LEFT JOIN dwh.dim_project p ON p.project_id = r.project_id
+        WHERE r.month_start BETWEEN %(date_from)s AND %(date_to)s
+          AND (%(project)s::int IS NULL OR r.project_id = %(project)s)
+        GROUP BY 1, 2, 3
+    )
+"""
+
+# Columnas de cada agrupación: (SELECT de la celda, posiciones del GROUP BY)
+GROUPS = {
+    'employee': ('e.employee_id AS group_id, e.name AS employee_name, e.role', '1, 2, 3'),
+    'role': ('e.role AS group_id', '1'),
+}
+
+RANKED_SQL = """
+    SELECT * FROM (
+        SELECT c.*,
+               DENSE_RANK() OVER (ORDER BY c.group_rate DESC NULLS LAST, c.group_id) AS group_rank,
+               SUM(c.hours_worked) OVER () AS total_hours,
+               SUM(c.available_hours) OVER () AS total_available
+        FROM (
+            SELECT cells.*,
+                   SUM(hours_worked) OVER g / NULLIF(SUM(available_hours) OVER g, 0) AS group_rate
+            FROM cells
+            WINDOW g AS (PARTITION BY group_id)
+        ) c
+    ) ranked
+    WHERE group_rank <= %(limit)s
+    ORDER BY group_rank, period_start
+"""
+
+
+def period_start(period, day):
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    if period == 'month':
+        return day.replace(day=1)
+    if period == 'quarter':
+        return day.replace(month=(day.month - 1) // 3 * 3 + 1, day=1)
+    return day.replace(month=1, day=1)
+
+
+def next_period_start(period, day):
+    start = period_start(period, day)
+    if period == 'week':
+        return start + timedelta(days=7)
+    months = {'month': 1, 'quarter': 3, 'year': 12}[period]
+    month = start.month - 1 + months
+    return start.replace(year=start.year + month // 12, month=month % 12 + 1)
+
+
+def period_label(period, start):
+    if period == 'week':
+        year, week, _ = start.isocalendar()
+        return f"{year}-W{week:02d}"
+    if period == 'month':
+        return f"{start.year}-{start.month:02d}"
+    if period == 'quarter':
+        return f"{start.year}-Q{(start.month - 1) // 3 + 1}"
+    return str(start.year)
+
+
+def period_starts(period, date_from, date_to):
+    """Inicio de cada periodo entre date_from y date_to (ambos ya alineados)."""
+    starts = []
+    current = period_start(period, date_from)
+    while current <= date_to:
+        starts.append(current)
+        current = next_period_start(period, current)
+    return starts
+
+
+def _rate(hours, available):
+    return round(hours / available * 100, 1) if available > 0 else 0
+
+
+def utilization_report(params):
+    """Filas o mapa de calor de utilización para los parámetros ya validados."""
+    group_by, period = params['group_by'], params['period']
+    date_from, date_to = params['date_from'], params['date_to']
+    # Periodos completos: del inicio del periodo de date_from al fin del de date_to
+    first = period_start(period, date_from)
+    last = next_period_start(period, date_to) - timedelta(days=1)
+
+    query = {
+        'period': period,
+        'employee': params.get('employee'),
+        'role': params.get('role'),
+        'project': params.get('project'),
+        'limit': params['limit'],
+    }
+    if group_by == 'project':
+        cells_sql = PROJECT_CELLS_SQL
+        query.update(date_from=first, date_to=last)
+    else:
+        group_columns, group_positions = GROUPS[group_by]
+        cells_sql = EMPLOYEE_CELLS_SQL.format(group_columns=group_columns, group_positions=group_positions)
+        # Semanas (lunes) que caen dentro del rango
+        query.update(date_from=period_start('week', first + timedelta(days=6)), date_to=period_start('week', last))
+
+    with connections[read_alias('project_dss')].cursor() as cursor:
+        cursor.execute(cells_sql + RANKED_SQL, query)
+        columns = [col[0] for col in cursor.description]
+        cells = [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    totals_hours = float(cells[0]['total_hours'] or 0) if cells else 0.0
+    totals_available = float(cells[0]['total_available'] or 0) if cells else 0.0
+    result = {
+        'group_by': group_by,
+        'period': period,
+        'date_from': first,
+        'date_to': last,
+        'totals': {
+            'hours_worked': round(totals_hours, 2),
+            'available_hours': round(totals_available, 2),
+            'utilization_rate': _rate(totals_hours, totals_available),
+        },
+    }
+
+    if params['layout'] == 'heatmap':
+        starts = period_starts(period, first, last)
+        result['periods'] = [period_label(period, start) for start in starts]
+        result['series'] = _heatmap_series(group_by, cells, {start: i for i, start in enumerate(starts)})
+    else:
+        result['rows'] = [
+            {
+                **_group_fields(group_by, cell),
+                'period': period_label(period, cell['period_start']),
+                'period_start': cell['period_start'],
+                **_measures(cell['hours_worked'], cell['available_hours']),
+            }
+            for cell in cells
+        ]
+    return result
+
+
+def _group_fields(group_by, cell):
+    if group_by == 'employee':
+        return {'employee_id': cell['group_id'], 'employee_name': cell['employee_name'], 'role': cell['role']}
+    if group_by == 'role':
+        return {'role': cell['group_id'], 'employee_count': cell['employee_count']}
+    return {'project_id': cell['group_id'], 'project_name': cell['project_name']}
+
+
+def _measures(hours, available):
+    hours, available = float(hours or 0), float(available or 0)
+    return {
+        'hours_worked': round(hours, 2),
+        'available_hours': round(available, 2),
+        'utilization_rate': _rate(hours, available),
+    }
+
+
+def _heatmap_series(group_by, cells, index):
+    """Una serie por grupo con la utilización (%) y las horas de cada periodo (0 si no hay celda)."""
+    series = {}
+    for cell in cells:
+        item = series.get(cell['group_id'])
+        if item is None:
+            item = series[cell['group_id']] = {
+                **_group_fields(group_by, cell),
+                'values': [0] * len(index),
+                'hours': [0.0] * len(index),
+                '_hours': 0.0,
+                '_available': 0.0,
+            }
+        position = index.get(cell['period_start'])
+        if position is None:
+            continue
+        measures = _measures(cell['hours_worked'], cell['available_hours'])
+        item['values'][position] = measures['utilization_rate']
+        item['hours'][position] = measures['hours_worked']
+        item['_hours'] += measures['hours_worked']
+        item['_available'] += measures['available_hours']
+
+    result = []
+    for item in series.values():
+        hours, available = item.pop('_hours'), item.pop('_available')
+        item.update(_measures(hours, available))
+        result.append(item)
+    return result
@@ -1,30 +1,125 @@
 from django.shortcuts import render
 from rest_framework import viewsets
 from rest_framework.response import Response
+from django.db import connections
+from core.db_routers import read_alias
 from django.db.models import Sum, Max, F, Avg, Count
 from django.utils.timezone import now
 from datetime import timedelta
-import numpy as np
-from scipy.stats import rayleigh
+import secrets
 
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.exceptions import PermissionDenied
+from core.permissions import IsProjectManager
 
 # --- IMPORTACIONES PARA DOCUMENTACIÓN ---
 from drf_spectacular.utils import extend_schema
 from .serializers import (
     DashboardKPISerializer, 
     PredictionInputSerializer, PredictionOutputSerializer,
-    BSCResponseSerializer
+    BSCResponseSerializer,
+    BSCDrilldownInputSerializer, BSCDrilldownOutputSerializer,
+    ForecastInputSerializer, ForecastOutputSerializer,
+    OLAPQuerySerializer, OLAPQueryResultSerializer,
+    UtilizationInputSerializer, UtilizationOutputSerializer,
+    RiskMatrixInputSerializer, RiskMatrixOutputSerializer,
+    DefectTrendInputSerializer, DefectTrendOutputSerializer
 )
+from . import olap
+from .defect_trend import defect_trend
+from .risk_matrix import risk_matrix
+from .utilization import utilization_report
 
 from .models import (
     FactBudget, FactRisk, FactDefectSummary, 
     FactTimelog, DimEmployee, DimProject, 
-    DimTask, FactProgressSnapshot
+    DimTask, FactProgressSnapshot, AggBscMonthly
 )
 
+# --- EVM POR PROYECTO (Dashboard de Misión) ---
+# Las consultas están separadas para poder ejecutarse en paralelo desde las
+# vistas asíncronas (ver async_views.py).
+
+def latest_snapshot_progress():
+    try:
+        latest_snapshot_date = FactProgressSnapshot.objects.aggregate(
+            max_date=Max('date_key')
+        )['max_date'] or now().date()
+    except Exception:
+        latest_snapshot_date = now().date()
+
+    return list(FactProgressSnapshot.objects.filter(
+        date_key=latest_snapshot_date
+    ).values('task_key', 'percent_complete'))
+
+
+def project_financials():
+    return list(DimProject.objects.annotate(
+        bac=Max('factbudget__budget_allocated'),
+        ac=Sum('factbudget__cost_actual')
+    ).values('project_key', 'project_id', 'name', 'bac', 'ac'))
+
+
+def task_planned_hours():
+    return list(DimTask.objects.values('task_key', 'project_key', 'planned_hours'))
+
+
+def compute_mission_kpis(financials, tasks, snapshots):
+    """Calcula Budget, Cost, CV y CPI por proyecto (cálculo puro, sin consultas)."""
+    fin_map = {p['project_key']: p for p in financials}
+    snapshot_map = {s['task_key']: s['percent_complete'] for s in snapshots}
+
+    project_progress = {}
+
+    for task in tasks:
+        p_key = task['project_key']
+        t_key = task['task_key']
+        planned = float(task['planned_hours'] or 0)
+        
+        pct = snapshot_map.get(t_key, 0)
+        earned = planned * (pct / 100.0)
+
+        if p_key not in project_progress:
+            project_progress[p_key] = {'planned': 0.0, 'earned': 0.0}
+        
+        project_progress[p_key]['planned'] += planned
+        project_progress[p_key]['earned'] += earned
+
+    results = []
+    for p_key, p_data in fin_map.items():
+        budget = float(p_data['bac'] or 0)
+        ac = float(p_data['ac'] or 0)
+        
+        prog = project_progress.get(p_key, {'planned': 0.0, 'earned': 0.0})
+        total_planned = prog['planned']
+        total_earned = prog['earned']
+
+        
+        if total_planned > 0:
+            percent_complete = total_earned / total_planned
+        else:
+            percent_complete = 0.0
+
+        ev = budget * percent_complete
+        cv = ev - ac 
+        
+        if ac > 0:
+            cpi = round(ev / ac, 2)
+        else:
+            cpi = 1.0 if ev > 0 else 0.0
+        
+        results.append({
+            'id': p_data['project_id'], 
+            'name': p_data['name'],
+            'budget_allocated': budget,
+            'actual_cost': ac,
+            'cost_variance': round(cv, 2),
+            'cpi': cpi
+        })
+
+    return results
+
+
 class DashboardKPIViewSet(viewsets.ViewSet):
     """
     Endpoint para calcular KPIs de alto nivel para el Dashboard de Misión.
@@ -38,77 +133,11 @@ class DashboardKPIViewSet(viewsets.ViewSet):
     )
     def list(self, request):
         try:
-            try:
-                latest_snapshot_date = FactProgressSnapshot.objects.aggregate(
-                    max_date=Max('date_key')
-                )['max_date'] or now().date()
-            except Exception:
-                latest_snapshot_date = now().date()
-
-            financials = DimProject.objects.annotate(
-                bac=Max('factbudget__budget_allocated'),
-                ac=Sum('factbudget__cost_actual')
-            ).values('project_key', 'project_id', 'name', 'bac', 'ac')
-            
-            fin_map = {p['project_key']: p for p in financials}
-
-            tasks = DimTask.objects.values('task_key', 'project_key', 'planned_hours')
-            
-            snapshots = FactProgressSnapshot.objects.filter(
-                date_key=latest_snapshot_date
-            ).values('task_key', 'percent_complete')
-            
-            snapshot_map = {s['task_key']: s['percent_complete'] for s in snapshots}
-
-            project_progress = {}
-
-            for task in tasks:
-                p_key = task['project_key']
-                t_key = task['task_key']
-                planned = float(task['planned_hours'] or 0)
-                
-                pct = snapshot_map.get(t_key, 0)
-                earned = planned * (pct / 100.0)
-
-                if p_key not in project_progress:
-                    project_progress[p_key] = {'planned': 0.0, 'earned': 0.0}
-                
-                project_progress[p_key]['planned'] += planned
-                project_progress[p_key]['earned'] += earned
-
-            results = []
-            for p_key, p_data in fin_map.items():
-                budget = float(p_data['bac'] or 0)
-                ac = float(p_data['ac'] or 0)
-                
-                prog = project_progress.get(p_key, {'planned': 0.0, 'earned': 0.0})
-                total_planned = prog['planned']
-                total_earned = prog['earned']
-
-                
-                if total_planned > 0:
-                    percent_complete = total_earned / total_planned
-                else:
-                    percent_complete = 0.0
-
-                ev = budget * percent_complete
-                cv = ev - ac 
-                
-                if ac > 0:
-                    cpi = round(ev / ac, 2)
-                else:
-                    cpi = 1.0 if ev > 0 else 0.0
-                
-                results.append({
-                    'id': p_data['project_id'], 
-                    'name': p_data['name'],
-                    'budget_allocated': budget,
-                    'actual_cost': ac,
-                    'cost_variance': round(cv, 2),
-                    'cpi': cpi
-                })
-
-            return Response(results)
+            snapshots = latest_snapshot_progress()
+            financials = project_financials()
+            tasks = task_planned_hours()
+
+            return Response(compute_mission_kpis(financials, tasks, snapshots))
 
         except Exception as e:
             import traceback
@@ -120,7 +149,7 @@ class PredictionViewSet(viewsets.ViewSet):
     """
     Endpoint para simulación predictiva de defectos.
     """
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated, IsProjectManager]
 
     @extend_schema(
         request=PredictionInputSerializer,
@@ -130,12 +159,10 @@ class PredictionViewSet(viewsets.ViewSet):
     )
     @action(detail=False, methods=['post'])
     def predict_defects(self, request):
-        is_manager = request.user.groups.filter(name='Project Managers').exists()
-        
-        if not is_manager and not request.user.is_superuser:
-            raise PermissionDenied(
-                detail="Acceso denegado: Esta herramienta es exclusiva para el rol de 'Project Managers'."
-            )
+        # NumPy/SciPy al primer uso: importarlos con las URLs cuesta ~0,7 s y
+        # memoria en cada worker, aunque la mayoría solo atiende gestión
+        import numpy as np
+        from scipy.stats import rayleigh
 
         input_serializer = PredictionInputSerializer(data=request.data)
         input_serializer.is_valid(raise_exception=True)
@@ -163,6 +190,194 @@ class PredictionViewSet(viewsets.ViewSet):
         })
 
 
+# --- CONSULTAS DEL BALANCED SCORECARD ---
+# Cada perspectiva es un SELECT independiente que devuelve una sola fila.
+# BSC_DASHBOARD_SQL las combina como CTEs para resolver el tablero completo
+# en un único viaje a la base DSS.
+
+BSC_EVM_SQL = """
+    WITH latest AS (
+        SELECT COALESCE(MAX(date_key), %(today)s) AS snapshot_date
+        FROM dwh.fact_progress_snapshot
+    ),
+    financials AS (
+        SELECT p.project_key,
+               MAX(b.budget_allocated) AS bac,
+               SUM(b.cost_actual) AS ac
+        FROM dwh.dim_project p
+        LEFT JOIN dwh.fact_budget b ON b.project_key = p.project_key
+        GROUP BY p.project_key
+    ),
+    progress AS (
+        SELECT t.project_key,
+               SUM(COALESCE(t.planned_hours, 0)) AS planned,
+               SUM(COALESCE(t.planned_hours, 0) * COALESCE(s.percent_complete, 0) / 100.0) AS earned
+        FROM dwh.dim_task t
+        LEFT JOIN dwh.fact_progress_snapshot s
+               ON s.task_key = t.task_key
+              AND s.date_key = (SELECT snapshot_date FROM latest)
+        GROUP BY t.project_key
+    )
+    SELECT COALESCE(SUM(COALESCE(f.bac, 0) * CASE WHEN pr.planned > 0 THEN pr.earned / pr.planned ELSE 0 END), 0)::float8 AS total_ev,
+           COALESCE(SUM(COALESCE(f.ac, 0)), 0)::float8 AS total_ac
+    FROM financials f
+    LEFT JOIN progress pr ON pr.project_key = f.project_key
+"""
+
+BSC_RISK_SQL = """
+    SELECT AVG(impact_score)::float8 AS avg_impact
+    FROM dwh.fact_risk
+"""
+
+BSC_QUALITY_SQL = """
+    SELECT COALESCE(SUM(defect_count_new), 0) AS total_new,
+           COALESCE(SUM(defect_count_resolved), 0) AS total_resolved
+    FROM dwh.fact_defect_summary
+"""
+
+BSC_TIME_SQL = """
+    SELECT COALESCE(SUM(hours_worked), 0)::float8 AS total_worked
+    FROM dwh.fact_timelog
+    WHERE date_key >= %(start_date)s
+"""
+
+BSC_CAPACITY_SQL = """
+    SELECT COALESCE(SUM(available_hours_per_week), 0)::float8 AS total_available
+    FROM dwh.dim_employee
+"""
+
+BSC_DASHBOARD_SQL = f"""
+    WITH evm AS ({BSC_EVM_SQL}),
+         risk AS ({BSC_RISK_SQL}),
+         quality AS ({BSC_QUALITY_SQL}),
+         worked AS ({BSC_TIME_SQL}),
+         capacity AS ({BSC_CAPACITY_SQL})
+    SELECT evm.total_ev, evm.total_ac, risk.avg_impact,
+           quality.total_new, quality.total_resolved,
+           worked.total_worked, capacity.total_available
+    FROM evm, risk, quality, worked, capacity
+"""
+
+
+def bsc_kpi_values(total_ev, total_ac, avg_impact, total_new, total_resolved, total_worked, monthly_available):
+    """Calcula los 4 KPIs del BSC a partir de totales aditivos."""
+    total_ev = total_ev or 0.0
+    total_ac = total_ac or 0.0
+
+    # Cálculo Final CPI Global
+    if total_ac > 0:
+        cpi = round(total_ev / total_ac, 2)
+    else:
+        cpi = 1.0 if total_ev > 0 else 0.0
+
+    avg_risk_impact = round(avg_impact or 0, 2)
+
+    t_new = total_new or 0
+    t_res = total_resolved or 0
+    resolution_rate = round((t_res / t_new) * 100, 1) if t_new > 0 else 100
+
+    total_worked = total_worked or 0
+    monthly_available = monthly_available or 0
+    utilization_rate = round((total_worked / monthly_available) * 100, 1) if monthly_available > 0 else 0
+
+    return {
+        'cpi': cpi,
+        'avg_risk_impact': avg_risk_impact,
+        'defect_resolution_rate': resolution_rate,
+        'utilization_rate': utilization_rate,
+    }
+
+
+def build_bsc_perspectives(totals):
+    """
+    Arma las 4 perspectivas del BSC a partir de los totales agregados
+    (total_ev, total_ac, avg_impact, total_new, total_resolved,
+    total_worked, total_available semanal).
+    """
+    kpis = bsc_kpi_values(
+        totals['total_ev'], totals['total_ac'], totals['avg_impact'],
+        totals['total_new'], totals['total_resolved'],
+        totals['total_worked'], (totals['total_available'] or 0) * 4
+    )
+    return bsc_perspectives_from_kpis(kpis)
+
+
+def bsc_perspectives_from_kpis(kpis):
+    cpi_global = kpis['cpi']
+    avg_risk_impact = kpis['avg_risk_impact']
+    resolution_rate = kpis['defect_resolution_rate']
+    utilization_rate = kpis['utilization_rate']
+
+    return {
+        "financial": {
+            "title": "Financiera",
+            "okr": "Liderazgo en Eficiencia",
+            "kpis": [
+                {"name": "CPI Global", "value": cpi_global, "target": 1.0, "unit": "Idx"}
+            ],
+            "status": "success" if cpi_global >= 1 else "warning"
+        },
+        "customer": {
+            "title": "Cliente",
+            "okr": "Confianza y Solidez",
+            "kpis": [
+                {"name": "Impacto de Riesgo Promedio", "value": avg_risk_impact, "target": 5.0, "unit": "Pts"}
+            ],
+            "status": "success" if avg_risk_impact < 5 else "warning"
+        },
+        "internal": {
+            "title": "Procesos Internos",
+            "okr": "Calidad y Trazabilidad",
+            "kpis": [
+                {"name": "Tasa Resolución Defectos", "value": resolution_rate, "target": 90, "unit": "%"}
+            ],
+            "status": "success" if resolution_rate >= 90 else "error"
+        },
+        "learning": {
+            "title": "Aprendizaje",
+            "okr": "Gestión del Conocimiento",
+            "kpis": [
+                {"name": "Utilización de Recursos", "value": utilization_rate, "target": 80, "unit": "%"}
+            ],
+            "status": "success" if utilization_rate >= 80 else "warning"
+        }
+    }
+
+
+# Columnas del cubo BSC usadas para cada dimensión / granularidad del drill-down
+BSC_DRILLDOWN_GROUPS = {
+    'client': {'client_id': 'client_key__client_id', 'client_name': 'client_key__name'},
+    'project': {'project_id': 'project_key__project_id', 'project_name': 'project_key__name'},
+}
+BSC_DRILLDOWN_PERIODS = {
+    'month': ('year', 'month'),
+    'quarter': ('year', 'quarter'),
+    'year': ('year',),
+    'all': (),
+}
+
+
+def _period_label(period, row):
+    if period == 'month':
+        return f"{row['year']}-{row['month']:02d}"
+    if period == 'quarter':
+        return f"{row['year']}-Q{row['quarter']}"
+    if period == 'year':
+        return str(row['year'])
+    return None
+
+
+def _cube_kpis(sums):
+    """KPIs del BSC a partir de las medidas sumadas del cubo."""
+    risk_count = sums['risk_count'] or 0
+    return bsc_kpi_values(
+        float(sums['earned_value'] or 0), float(sums['cost_actual'] or 0),
+        float(sums['risk_impact_sum'] or 0) / risk_count if risk_count else None,
+        sums['defects_new'], sums['defects_resolved'],
+        float(sums['hours_worked'] or 0), float(sums['available_hours'] or 0)
+    )
+
+
 class BSCViewSet(viewsets.ViewSet):
     """
     Endpoint que consolida los KPIs para el Balanced Scorecard.
@@ -177,143 +392,227 @@ class BSCViewSet(viewsets.ViewSet):
     @action(detail=False, methods=['get'])
     def dashboard(self, request):
         try:
-            
-            try:
-                latest_snapshot_date = FactProgressSnapshot.objects.aggregate(
-                    max_date=Max('date_key')
-                )['max_date'] or now().date()
-            except Exception:
-                latest_snapshot_date = now().date()
-
-            
-            financials_query = DimProject.objects.annotate(
-                bac=Max('factbudget__budget_allocated'),
-                ac=Sum('factbudget__cost_actual')
-            ).values('project_key', 'bac', 'ac')
-            
-            fin_map = {p['project_key']: p for p in financials_query}
-
-            
-            tasks = DimTask.objects.values('task_key', 'project_key', 'planned_hours')
-            snapshots = FactProgressSnapshot.objects.filter(
-                date_key=latest_snapshot_date
-            ).values('task_key', 'percent_complete')
-            
-            snapshot_map = {s['task_key']: s['percent_complete'] for s in snapshots}
-
-            # Calcular EV Global Acumulando Proyectos
-            total_ev_global = 0.0
-            total_ac_global = 0.0
-            
-            
-            project_hours = {}
-
-            
-            for task in tasks:
-                p_key = task['project_key']
-                t_key = task['task_key']
-                planned = float(task['planned_hours'] or 0)
-                pct = snapshot_map.get(t_key, 0)
-                earned = planned * (pct / 100.0)
-
-                if p_key not in project_hours:
-                    project_hours[p_key] = {'planned': 0.0, 'earned': 0.0}
-                
-                project_hours[p_key]['planned'] += planned
-                project_hours[p_key]['earned'] += earned
-
-            # Calcular EV monetario por proyecto y sumar al global
-            for p_key, fin_data in fin_map.items():
-                bac = float(fin_data['bac'] or 0)
-                ac = float(fin_data['ac'] or 0)
-                
-                total_ac_global += ac
-                
-                phoda = project_hours.get(p_key, {'planned': 0.0, 'earned': 0.0})
-                t_planned = phoda['planned']
-                t_earned = phoda['earned']
-                
-                if t_planned > 0:
-                    pct_proj = t_earned / t_planned
-                else:
-                    pct_proj = 0.0
-                
-                ev_proj = bac * pct_proj
-                total_ev_global += ev_proj
-
-            # Cálculo Final CPI Global
-            if total_ac_global > 0:
-                cpi_global = round(total_ev_global / total_ac_global, 2)
-            else:
-                cpi_global = 1.0 if total_ev_global > 0 else 0.0
-
-            
-            risk_agg = FactRisk.objects.aggregate(
-                avg_impact=Avg('impact_score')
-            )
-            avg_risk_impact = round(risk_agg['avg_impact'] or 0, 2)
-
-          
-            quality_agg = FactDefectSummary.objects.aggregate(
-                total_new=Sum('defect_count_new'),
-                total_resolved=Sum('defect_count_resolved')
-            )
-            t_new = quality_agg['total_new'] or 0
-            t_res = quality_agg['total_resolved'] or 0
-            resolution_rate = round((t_res / t_new) * 100, 1) if t_new > 0 else 100
+            params = {'today': now().date(), 'start_date': now().date() - timedelta(days=30)}
+            with connections[read_alias('project_dss')].cursor() as cursor:
+                cursor.execute(BSC_DASHBOARD_SQL, params)
+                columns = [col[0] for col in cursor.description]
+                row = dict(zip(columns, cursor.fetchone()))
 
-        
-            start_date = now().date() - timedelta(days=30)
-            time_agg = FactTimelog.objects.filter(date_key__gte=start_date).aggregate(
-                total_worked=Sum('hours_worked')
-            )
-            total_worked = time_agg['total_worked'] or 0
-
-            emp_agg = DimEmployee.objects.aggregate(total_available=Sum('available_hours_per_week'))
-            total_available = emp_agg['total_available'] or 0
-            
-            monthly_available = (total_available or 0) * 4
-            
-            utilization_rate = round((total_worked / monthly_available) * 100, 1) if monthly_available > 0 else 0
-
-            data = {
-                "financial": {
-                    "title": "Financiera",
-                    "okr": "Liderazgo en Eficiencia",
-                    "kpis": [
-                        {"name": "CPI Global", "value": cpi_global, "target": 1.0, "unit": "Idx"}
-                    ],
-                    "status": "success" if cpi_global >= 1 else "warning"
-                },
-                "customer": {
-                    "title": "Cliente",
-                    "okr": "Confianza y Solidez",
-                    "kpis": [
-                        {"name": "Impacto de Riesgo Promedio", "value": avg_risk_impact, "target": 5.0, "unit": "Pts"}
-                    ],
-                    "status": "success" if avg_risk_impact < 5 else "warning"
-                },
-                "internal": {
-                    "title": "Procesos Internos",
-                    "okr": "Calidad y Trazabilidad",
-                    "kpis": [
-                        {"name": "Tasa Resolución Defectos", "value": resolution_rate, "target": 90, "unit": "%"}
-                    ],
-                    "status": "success" if resolution_rate >= 90 else "error"
-                },
-                "learning": {
-                    "title": "Aprendizaje",
-                    "okr": "Gestión del Conocimiento",
-                    "kpis": [
-                        {"name": "Utilización de Recursos", "value": utilization_rate, "target": 80, "unit": "%"}
-                    ],
-                    "status": "success" if utilization_rate >= 80 else "warning"
-                }
+            return Response(build_bsc_perspectives(row))
+
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            return Response({"error": str(e)}, status=500)
+
+    @extend_schema(
+        parameters=[BSCDrilldownInputSerializer],
+        responses=BSCDrilldownOutputSerializer,
+        summary="Drill-down del BSC",
+        description="KPIs del BSC por cliente, proyecto y periodo (mes/trimestre/año), servidos desde el cubo agregado que construye el ETL."
+    )
+    @action(detail=False, methods=['get'])
+    def drilldown(self, request):
+        input_serializer = BSCDrilldownInputSerializer(data=request.query_params)
+        input_serializer.is_valid(raise_exception=True)
+        params = input_serializer.validated_data
+
+        try:
+            cube = AggBscMonthly.objects.all()
+            if 'client' in params:
+                cube = cube.filter(client_key__client_id=params['client'])
+            if 'project' in params:
+                cube = cube.filter(project_key__project_id=params['project'])
+            if 'date_from' in params:
+                cube = cube.filter(month_start__gte=params['date_from'].replace(day=1))
+            if 'date_to' in params:
+                cube = cube.filter(month_start__lte=params['date_to'])
+
+            measures = {
+                name: Sum(name) for name in (
+                    'earned_value', 'cost_actual', 'risk_count', 'risk_impact_sum',
+                    'defects_new', 'defects_resolved', 'hours_worked', 'available_hours'
+                )
             }
 
-            return Response(data)
+            group_columns = {}
+            for group in params['group_by']:
+                group_columns.update(BSC_DRILLDOWN_GROUPS[group])
+            period_columns = BSC_DRILLDOWN_PERIODS[params['period']]
+            group_fields = list(group_columns.values()) + list(period_columns)
+
+            rows = []
+            if group_fields:
+                grouped = cube.values(*group_fields).annotate(**measures).order_by(*group_fields)
+                for sums in grouped:
+                    row = {key: sums[field] for key, field in group_columns.items()}
+                    if period_columns:
+                        row['period'] = _period_label(params['period'], sums)
+                    row.update(_cube_kpis(sums))
+                    row['earned_value'] = round(float(sums['earned_value'] or 0), 2)
+                    row['actual_cost'] = round(float(sums['cost_actual'] or 0), 2)
+                    row['hours_worked'] = round(float(sums['hours_worked'] or 0), 2)
+                    rows.append(row)
+
+            # Totales generales derivados del mismo cubo
+            totals = _cube_kpis(cube.aggregate(**measures))
+
+            return Response({
+                'group_by': params['group_by'],
+                'period': params['period'],
+                'rows': rows,
+                'totals': totals,
+                'scorecard': bsc_perspectives_from_kpis(totals),
+            })
 
         except Exception as e:
             import traceback
             traceback.print_exc()
-            return Response({"error": str(e)}, status=500)
\ No newline at end of file
+            return Response({"error": str(e)}, status=500)
+
+
+class ForecastViewSet(viewsets.ViewSet):
+    """
+    Endpoint de pronóstico Monte Carlo del EAC y fecha de término del portafolio.
+    """
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        parameters=[ForecastInputSerializer],
+        responses=ForecastOutputSerializer,
+        summary="Pronóstico Monte Carlo de EAC",
+        description="Simula la distribución del Estimate At Completion y la fecha de término de todos los proyectos (P50/P80/P95). Use 'seed' para reproducir una corrida."
+    )
+    @action(detail=False, methods=['get'])
+    def eac(self, request):
+        input_serializer = ForecastInputSerializer(data=request.query_params)
+        input_serializer.is_valid(raise_exception=True)
+        data = input_serializer.validated_data
+
+        iterations = data['iterations']
+        seed = data.get('seed')
+        if seed is None:
+            seed = secrets.randbits(32)
+
+        try:
+            from . import forecasting  # importa NumPy (ver predict_defects)
+
+            inputs = forecasting.load_portfolio_inputs(throughput_window_days=data['window_days'])
+            simulation = forecasting.simulate_portfolio(inputs, iterations, seed)
+            return Response(forecasting.build_forecast_response(inputs, simulation, iterations, seed))
+
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            return Response({"error": str(e)}, status=500)
+
+
+class UtilizationViewSet(viewsets.ViewSet):
+    """
+    Endpoint de utilización de recursos por empleado, rol o proyecto.
+    """
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        parameters=[UtilizationInputSerializer],
+        responses=UtilizationOutputSerializer,
+        summary="Utilización de recursos",
+        description="Horas trabajadas contra capacidad por empleado, rol o proyecto y periodo (semana/mes/trimestre/año), como filas o mapa de calor. Se sirve desde los agregados semanales y mensuales que mantiene el ETL."
+    )
+    def list(self, request):
+        input_serializer = UtilizationInputSerializer(data=request.query_params)
+        input_serializer.is_valid(raise_exception=True)
+
+        try:
+            return Response(utilization_report(input_serializer.validated_data))
+
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            return Response({"error": str(e)}, status=500)
+
+
+class RiskMatrixViewSet(viewsets.ViewSet):
+    """
+    Endpoint de la matriz de riesgos (probabilidad x impacto).
+    """
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        parameters=[RiskMatrixInputSerializer],
+        responses=RiskMatrixOutputSerializer,
+        summary="Matriz de riesgos",
+        description="Conteo de riesgos y exposición (probabilidad x impacto) por celda de la matriz, calculados en el DWH y en caché hasta la siguiente carga del ETL."
+    )
+    def list(self, request):
+        input_serializer = RiskMatrixInputSerializer(data=request.query_params)
+        input_serializer.is_valid(raise_exception=True)
+
+        try:
+            return Response(risk_matrix(input_serializer.validated_data))
+
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            return Response({"error": str(e)}, status=500)
+
+
+class DefectTrendViewSet(viewsets.ViewSet):
+    """
+    Endpoint de la tendencia del backlog de defectos.
+    """
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        parameters=[DefectTrendInputSerializer],
+        responses=DefectTrendOutputSerializer,
+        summary="Tendencia del backlog de defectos",
+        description="Backlog abierto, tasas de llegada y resolución y MTTR por día, semana o mes, para el portafolio o por proyecto. Con rangos largos los periodos se agrupan hasta max_points puntos por serie."
+    )
+    def list(self, request):
+        input_serializer = DefectTrendInputSerializer(data=request.query_params)
+        input_serializer.is_valid(raise_exception=True)
+
+        try:
+            return Response(defect_trend(input_serializer.validated_data))
+
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            return Response({"error": str(e)}, status=500)
+
+
+class OLAPQueryViewSet(viewsets.ViewSet):
+    """
+    Endpoint genérico de consultas OLAP sobre el esquema estrella del DWH.
+    """
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        responses=dict,
+        summary="Catálogo OLAP",
+        description="Lista las medidas y dimensiones permitidas para cada tabla de hechos."
+    )
+    def list(self, request):
+        return Response(olap.catalog())
+
+    @extend_schema(
+        request=OLAPQuerySerializer,
+        responses=OLAPQueryResultSerializer,
+        summary="Ejecutar consulta OLAP",
+        description="Compila medidas, dimensiones, filtros y límite en una sola consulta agrupada sobre el DWH. Los resultados se guardan en caché por consulta normalizada."
+    )
+    def create(self, request):
+        input_serializer = OLAPQuerySerializer(data=request.data)
+        input_serializer.is_valid(raise_exception=True)
+
+        try:
+            return Response(olap.run_query(input_serializer.validated_data))
+
+        except olap.OLAPQueryError as e:
+            return Response({"error": str(e)}, status=400)
+
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            return Response({"error": str(e)}, status=500)
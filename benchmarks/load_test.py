@@ -0,0 +1,394 @@
+"""
+Benchmark de carga HTTP de la API.
+
+Levanta la aplicación con gunicorn contra la base Postgres local (opcionalmente
+repoblada a una escala dada), obtiene un JWT y lanza tráfico concurrente a los
+endpoints críticos. Reporta latencias p50/p95/p99, throughput y consultas por
+petición (leídas de la cabecera Server-Timing) y guarda el resultado en JSON
+para compararlo con una corrida base.
+
+Uso:
+    python benchmarks/load_test.py --scale 5 --concurrency 16 --requests 400
+    python benchmarks/load_test.py --baseline benchmarks/base.json --max-regression 15
+
+``--scale`` TRUNCA y repuebla la base OLTP (con el sesgo de ``--profile``,
+por defecto el de producción) y vuelve a correr el ETL: solo se permite
+contra un Postgres local. Sin ``--scale`` se usan los datos existentes.
+Los escenarios de creación insertan filas reales en la base.
+"""
+import argparse
+import json
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+LOCAL_HOSTS = {'localhost', '127.0.0.1', '::1', ''}
+BENCH_GROUP = 'Project Managers'
+SERVER_TIMING_DB = re.compile(r'db-([\w-]+);dur=([\d.]+);desc="(\d+) queries"')
+
+
+# --- PREPARACIÓN DE DATOS ---
+
+def _check_local_databases():
+    from django.conf import settings
+
+    for alias, conf in settings.DATABASES.items():
+        if conf.get('HOST', '') not in LOCAL_HOSTS:
+            raise SystemExit(f"--scale solo se permite contra Postgres local ('{alias}' apunta a {conf['HOST']}).")
+
+
+def seed_database(scale, seed, profile):
+    """Repuebla la base OLTP con populate_db escalado y recarga el DWH."""
+    from django.core.management import call_command
+
+    _check_local_databases()
+    call_command('populate_db', scale=scale, seed=seed, profile=profile)
+    call_command('run_etl')
+
+
+def ensure_user(username, password):
+    from django.contrib.auth.models import Group, User
+
+    user, _ = User.objects.get_or_create(username=username)
+    user.set_password(password)
+    user.save()
+    group, _ = Group.objects.get_or_create(name=BENCH_GROUP)
+    user.groups.add(group)
+
+
+# --- SERVIDOR ---
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workers, asgi):
+    port = _free_port()
+    command = [
+        sys.executable, '-m', 'gunicorn',
+        '--bind', f'127.0.0.1:{port}',
+        '--workers', str(workers),
+        '--log-level', 'warning',
+    ]
+    if asgi:
+        command += ['--worker-class', 'uvicorn_worker.UvicornWorker', 'core.asgi:application']
+    else:
+        command += ['core.wsgi:application']
+    env = dict(os.environ, PERFORMANCE_LOG_LEVEL='WARNING')
+    process = subprocess.Popen(command, cwd=BASE_DIR, env=env)
+    return process, f'http://127.0.0.1:{port}'
+
+
+def wait_ready(base_url, process, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise SystemExit('El servidor terminó antes de estar listo.')
+        try:
+            urllib.request.urlopen(f'{base_url}/api/schema/', timeout=5).read()
+            return
+        except urllib.error.HTTPError:
+            return
+        except OSError:
+            time.sleep(0.5)
+    raise SystemExit(f'El servidor no respondió en {timeout} s.')
+
+
+# --- CLIENTE HTTP ---
+
+def request(base_url, method, path, token=None, body=None):
+    """Devuelve (status, segundos, cabeceras, cuerpo)."""
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(f'{base_url}{path}', data=data, method=method)
+    req.add_header('Accept', 'application/json')
+    if data is not None:
+        req.add_header('Content-Type', 'application/json')
+    if token:
+        req.add_header('Authorization', f'Bearer {token}')
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=120) as response:
+            payload = response.read()
+            status, headers = response.status, response.headers
+    except urllib.error.HTTPError as e:
+        payload, status, headers = e.read(), e.code, e.headers
+    return status, time.perf_counter() - start, headers, payload
+
+
+def get_token(base_url, username, password):
+    status, _, _, payload = request(
+        base_url, 'POST', '/api/token/', body={'username': username, 'password': password}
+    )
+    if status != 200:
+        raise SystemExit(f'No se pudo obtener el token ({status}): {payload[:200]!r}')
+    return json.loads(payload)['access']
+
+
+def _first_id(base_url, token, path, key):
+    status, _, _, payload = request(base_url, 'GET', path, token)
+    data = json.loads(payload) if status == 200 else []
+    items = data.get('results', []) if isinstance(data, dict) else data
+    if not items:
+        raise SystemExit(f'{path} no devolvió registros: ejecute con --scale para poblar la base.')
+    return items[0][key]
+
+
+# --- ESCENARIOS ---
+
+# Registros por petición del escenario de carga masiva
+BULK_BATCH = 500
+
+GESTION_RESOURCES = [
+    'clients', 'projects', 'employees', 'tasks', 'timeentries', 'risks', 'defects', 'resources',
+]
+
+
+def build_scenarios(base_url, token):
+    """Lista de (nombre, método, ruta, generador del cuerpo o None)."""
+    scenarios = [
+        ('mission-kpis', 'GET', '/api/analytics/mission-kpis/', None),
+        ('bsc-dashboard', 'GET', '/api/analytics/bsc/dashboard/', None),
+        ('predict-defects', 'POST', '/api/analytics/predictions/predict_defects/',
+         lambda i: {'estimated_duration': 12, 'peak_month': 4, 'total_defects_estimate': 150}),
+    ]
+    for resource in GESTION_RESOURCES:
+        scenarios.append((f'gestion-{resource}-list', 'GET', f'/api/gestion/{resource}/', None))
+    # Expansión de relaciones y respuestas parciales: mismas consultas que el listado simple
+    scenarios += [
+        ('gestion-tasks-expand', 'GET', '/api/gestion/tasks/?expand=project,assigned_to,parent_task', None),
+        ('gestion-timeentries-expand-fields', 'GET',
+         '/api/gestion/timeentries/?expand=task.project,employee'
+         '&fields=entry_id,entry_timestamp,hours_worked,employee.name,task.name,task.project.name', None),
+    ]
+
+    project_id = _first_id(base_url, token, '/api/gestion/projects/', 'project_id')
+    task_id = _first_id(base_url, token, '/api/gestion/tasks/', 'task_id')
+    employee_id = _first_id(base_url, token, '/api/gestion/employees/', 'employee_id')
+    scenarios += [
+        ('gestion-clients-create', 'POST', '/api/gestion/clients/',
+         lambda i: {'name': f'Cliente Benchmark {i}', 'sector': 'Tecnología', 'contact_email': f'bench{i}@example.com'}),
+        ('gestion-risks-create', 'POST', '/api/gestion/risks/',
+         lambda i: {'project': project_id, 'description': 'Riesgo de benchmark', 'probability': '0.40',
+                    'impact_score': 5, 'status': 'Open', 'detected_date': '2025-01-15'}),
+        ('gestion-timeentries-create', 'POST', '/api/gestion/timeentries/',
+         lambda i: {'employee': employee_id, 'task': task_id, 'entry_timestamp': '2025-01-15T10:00:00Z',
+                    'hours_worked': '2.50', 'activity_type': 'Desarrollo'}),
+        (f'gestion-timeentries-bulk-{BULK_BATCH}', 'POST', '/api/gestion/timeentries/bulk/',
+         lambda i: [{'employee': employee_id, 'task': task_id, 'entry_timestamp': '2025-01-15T10:00:00Z',
+                     'hours_worked': '2.50', 'activity_type': 'Desarrollo'}] * BULK_BATCH),
+    ]
+    return scenarios
+
+
+def run_scenario(base_url, token, scenario, requests_count, concurrency, warmup):
+    name, method, path, body_factory = scenario
+    counter = iter(range(10 ** 9))
+    lock = threading.Lock()
+
+    def one(_):
+        with lock:
+            i = next(counter)
+        body = body_factory(i) if body_factory else None
+        status, elapsed, headers, _ = request(base_url, method, path, token, body)
+        queries = {
+            alias: (int(count), float(dur))
+            for alias, dur, count in SERVER_TIMING_DB.findall(headers.get('Server-Timing', ''))
+        }
+        return status, elapsed, queries
+
+    for _ in range(warmup):
+        one(None)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(one, range(requests_count)))
+    wall = time.perf_counter() - start
+    return summarize(name, method, path, samples, wall)
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def summarize(name, method, path, samples, wall):
+    latencies = sorted(elapsed * 1000 for status, elapsed, _ in samples if status < 400)
+    errors = {}
+    for status, _, _ in samples:
+        if status >= 400:
+            errors[str(status)] = errors.get(str(status), 0) + 1
+
+    aliases = sorted({alias for _, _, queries in samples for alias in queries})
+    queries_per_request = {
+        alias: {
+            'count': round(statistics.fmean(q.get(alias, (0, 0.0))[0] for _, _, q in samples), 2),
+            'ms': round(statistics.fmean(q.get(alias, (0, 0.0))[1] for _, _, q in samples), 2),
+        }
+        for alias in aliases
+    }
+
+    def ms(value):
+        return round(value, 2) if value is not None else None
+
+    return {
+        'name': name,
+        'method': method,
+        'path': path,
+        'requests': len(samples),
+        'errors': errors,
+        'p50_ms': ms(_percentile(latencies, 50)),
+        'p95_ms': ms(_percentile(latencies, 95)),
+        'p99_ms': ms(_percentile(latencies, 99)),
+        'mean_ms': ms(statistics.fmean(latencies)) if latencies else None,
+        'throughput_rps': round(len(samples) / wall, 2) if wall else None,
+        'queries_per_request': queries_per_request,
+    }
+
+
+# --- REPORTE ---
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results):
+    header = f"{'escenario':32} {'p50':>8} {'p95':>8} {'p99':>8} {'req/s':>8} {'errores':>8}  consultas"
+    print(header)
+    print('-' * len(header))
+    for r in results['endpoints']:
+        queries = ' '.join(f"{alias}={q['count']}" for alias, q in r['queries_per_request'].items())
+        errors = sum(r['errors'].values())
+        print(f"{r['name']:32} {r['p50_ms'] or 0:8.1f} {r['p95_ms'] or 0:8.1f} {r['p99_ms'] or 0:8.1f} "
+              f"{r['throughput_rps'] or 0:8.1f} {errors:8d}  {queries}")
+
+
+def compare(results, baseline, max_regression):
+    """Compara p95 y consultas con la corrida base; devuelve las regresiones."""
+    base = {r['name']: r for r in baseline['endpoints']}
+    regressions = []
+    print(f"\nComparación con la base ({baseline['meta'].get('revision')}, {baseline['meta'].get('timestamp')}):")
+    for r in results['endpoints']:
+        b = base.get(r['name'])
+        if b is None or not b['p95_ms'] or r['p95_ms'] is None:
+            continue
+        delta = (r['p95_ms'] - b['p95_ms']) / b['p95_ms'] * 100
+        base_queries = sum(q['count'] for q in b['queries_per_request'].values())
+        queries = sum(q['count'] for q in r['queries_per_request'].values())
+        print(f"  {r['name']:32} p95 {b['p95_ms']:8.1f} -> {r['p95_ms']:8.1f} ms ({delta:+6.1f}%)"
+              f"  consultas {base_queries:g} -> {queries:g}")
+        if max_regression is not None and delta > max_regression:
+            regressions.append(r['name'])
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--scale', type=float, help='Repoblar la base a esta escala de populate_db (trunca la base).')
+    parser.add_argument('--seed', type=int, default=42, help='Semilla de la generación de datos.')
+    parser.add_argument('--profile', default='production', choices=['uniform', 'production'],
+                        help='Perfil de distribución de populate_db (por defecto el sesgo de producción).')
+    parser.add_argument('--url', help='Usar un servidor ya levantado en lugar de iniciar gunicorn.')
+    parser.add_argument('--workers', type=int, default=4, help='Workers de gunicorn.')
+    parser.add_argument('--asgi', action='store_true', help='Levantar la aplicación ASGI (uvicorn worker).')
+    parser.add_argument('--concurrency', type=int, default=8, help='Peticiones simultáneas por escenario.')
+    parser.add_argument('--requests', type=int, default=200, help='Peticiones medidas por escenario.')
+    parser.add_argument('--warmup', type=int, default=5, help='Peticiones de calentamiento por escenario.')
+    parser.add_argument('--only', help='Ejecutar solo los escenarios cuyo nombre contenga este texto.')
+    parser.add_argument('--username', default='benchmark')
+    parser.add_argument('--password', default='benchmark')
+    parser.add_argument('--output', help='Archivo JSON de resultados (por defecto benchmarks/results-<fecha>.json).')
+    parser.add_argument('--baseline', help='Resultados JSON de una corrida base para comparar.')
+    parser.add_argument('--max-regression', type=float,
+                        help='Falla (código 1) si el p95 de algún escenario empeora más de este porcentaje.')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    import django
+
+    django.setup()
+    if args.scale:
+        seed_database(args.scale, args.seed, args.profile)
+    ensure_user(args.username, args.password)
+
+    from django.db import connections
+    connections.close_all()
+
+    process = None
+    base_url = args.url
+    if base_url is None:
+        process, base_url = start_server(args.workers, args.asgi)
+    try:
+        wait_ready(base_url, process)
+        token = get_token(base_url, args.username, args.password)
+        scenarios = build_scenarios(base_url, token)
+        if args.only:
+            scenarios = [s for s in scenarios if args.only in s[0]]
+
+        endpoints = []
+        for scenario in scenarios:
+            print(f'> {scenario[0]} ...', flush=True)
+            endpoints.append(run_scenario(base_url, token, scenario, args.requests, args.concurrency, args.warmup))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+
+    timestamp = datetime.now(timezone.utc)
+    results = {
+        'meta': {
+            'timestamp': timestamp.isoformat(),
+            'revision': _git_revision(),
+            'scale': args.scale,
+            'seed': args.seed,
+            'profile': args.profile if args.scale else None,
+            'server': 'external' if args.url else ('gunicorn-asgi' if args.asgi else 'gunicorn-wsgi'),
+            'workers': None if args.url else args.workers,
+            'concurrency': args.concurrency,
+            'requests': args.requests,
+        },
+        'endpoints': endpoints,
+    }
+
+    print()
+    print_results(results)
+    output = Path(args.output or BASE_DIR / 'benchmarks' / f"results-{timestamp:%Y%m%d-%H%M%S}.json")
+    output.write_text(json.dumps(results, indent=2, ensure_ascii=False))
+    print(f'\nResultados guardados en {output}')
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressions = compare(results, baseline, args.max_regression)
+        if regressions:
+            print(f"\nRegresión de p95 mayor a {args.max_regression}% en: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""
+Benchmark del listado rápido de gestión (gestion_oltp/fastlist.py).
+
+Llama en proceso al ``list()`` de cada viewset con una página grande, primero
+con el serializer de DRF y después con el camino rápido (values_list +
+conversores + orjson), verifica que ambas respuestas sean idénticas byte a
+byte y reporta filas/s de cada uno (consulta + serialización + render).
+
+Uso:
+    python benchmarks/serialization.py --page-size 100000
+    python benchmarks/serialization.py --only timeentries --repeat 5 --query "fields=entry_id,hours_worked"
+
+Sale con código 1 si alguna respuesta difiere.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+
+def viewsets():
+    from gestion_oltp import views
+
+    return {
+        'timeentries': views.TimeEntryViewSet,
+        'defects': views.DefectViewSet,
+        'tasks': views.TaskViewSet,
+        'risks': views.RiskViewSet,
+        'projects': views.ProjectViewSet,
+        'employees': views.EmployeeViewSet,
+        'clients': views.ClientViewSet,
+        'resources': views.ResourceViewSet,
+    }
+
+
+def run_list(viewset, user, path, params, fast):
+    """(segundos, filas, cuerpo) de un GET al listado."""
+    from rest_framework.test import APIRequestFactory, force_authenticate
+
+    request = APIRequestFactory().get(path, params, HTTP_ACCEPT='application/json')
+    force_authenticate(request, user=user)
+    viewset.fast_list = fast
+    start = time.perf_counter()
+    response = viewset.as_view({'get': 'list'})(request)
+    response.render()
+    elapsed = time.perf_counter() - start
+    if response.status_code != 200:
+        raise SystemExit(f'{path}: HTTP {response.status_code} {response.content[:300]!r}')
+    return elapsed, len(response.data['results']), response.content
+
+
+def measure(viewset, user, path, params, fast, repeat):
+    run_list(viewset, user, path, params, fast)  # calentamiento
+    samples = [run_list(viewset, user, path, params, fast) for _ in range(repeat)]
+    times = [elapsed for elapsed, _, _ in samples]
+    return min(times), statistics.mean(times), samples[-1][1], samples[-1][2]
+
+
+def first_difference(a, b):
+    for index, (x, y) in enumerate(zip(a, b)):
+        if x != y:
+            return index
+    return min(len(a), len(b))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serializer de DRF vs listado rápido (values_list + orjson).')
+    parser.add_argument('--page-size', type=int, default=100_000, help='Filas por página.')
+    parser.add_argument('--repeat', type=int, default=3, help='Corridas medidas por variante.')
+    parser.add_argument('--only', help='Solo los recursos cuyo nombre contenga este texto.')
+    parser.add_argument('--query', default='', help='Parámetros extra del listado (ej. "status=Abierto").')
+    args = parser.parse_args()
+
+    import django
+    from urllib.parse import parse_qsl
+
+    django.setup()
+    from django.contrib.auth.models import User
+    from django.db import reset_queries
+    from gestion_oltp.pagination import KeysetPagination
+
+    user = User.objects.filter(is_active=True).order_by('-is_superuser', 'pk').first()
+    if user is None:
+        raise SystemExit('No hay usuarios: cree uno con createsuperuser.')
+    # El benchmark pide páginas más grandes que el máximo del API
+    KeysetPagination.max_page_size = max(args.page_size, KeysetPagination.max_page_size)
+    params = {'page_size': args.page_size, **dict(parse_qsl(args.query))}
+
+    print(f"{'recurso':<12} {'filas':>8} {'serializer s':>13} {'filas/s':>10} "
+          f"{'rápido s':>10} {'filas/s':>10} {'mejora':>7}  salida")
+    print('-' * 86)
+    mismatches = 0
+    for name, viewset in viewsets().items():
+        if args.only and args.only not in name:
+            continue
+        path = f'/api/gestion/{name}/'
+        original = viewset.fast_list
+        try:
+            slow_best, _, rows, slow_body = measure(viewset, user, path, params, False, args.repeat)
+            fast_best, _, _, fast_body = measure(viewset, user, path, params, True, args.repeat)
+        finally:
+            viewset.fast_list = original
+        reset_queries()
+
+        if slow_body == fast_body:
+            verdict = 'idéntica'
+        else:
+            mismatches += 1
+            offset = first_difference(slow_body, fast_body)
+            verdict = f'DIFIERE en el byte {offset}'
+            print(f'   serializer: {slow_body[max(0, offset - 60):offset + 60]!r}', file=sys.stderr)
+            print(f'   rápido:     {fast_body[max(0, offset - 60):offset + 60]!r}', file=sys.stderr)
+        print(f"{name:<12} {rows:>8} {slow_best:>13.3f} {rows / slow_best:>10,.0f} "
+              f"{fast_best:>10.3f} {rows / fast_best:>10,.0f} {slow_best / fast_best:>6.1f}x  {verdict}")
+
+    if mismatches:
+        raise SystemExit(f'{mismatches} listados no coinciden con el serializer.')
+
+
+if __name__ == '__main__':
+    main()
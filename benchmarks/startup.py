@@ -0,0 +1,106 @@
+"""
+Benchmark de arranque de un worker.
+
+Lanza procesos nuevos con ``python -X importtime`` que hacen lo mismo que un
+worker de gunicorn antes de su primera petición: cargar ``core.wsgi``
+(django.setup + middlewares) y el URLconf completo (todas las vistas). Reporta
+el tiempo de importación, el RSS máximo y los módulos más caros, y verifica
+el presupuesto:
+
+- ningún módulo de ``--forbid`` (NumPy, SciPy, pandas) se importa al arrancar;
+  deben cargarse al primer uso (ver analytics/views.py);
+- el tiempo de importación y el RSS no superan ``--budget-ms`` / ``--max-rss-mb``.
+
+Uso:
+    python benchmarks/startup.py
+    python benchmarks/startup.py --repeat 5 --top 30 --budget-ms 800
+
+Sale con código 1 si no se cumple el presupuesto.
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+WORKER_SNIPPET = """
+import resource, time
+start = time.perf_counter()
+from core.wsgi import application
+from django.urls import get_resolver
+get_resolver().url_patterns
+elapsed = time.perf_counter() - start
+print(f'{elapsed:.6f} {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}')
+"""
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def run_worker():
+    """(segundos, RSS en MB, [(módulo, self µs, acumulado µs, nivel)]) de un arranque."""
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'core.settings')}
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', WORKER_SNIPPET],
+        cwd=BASE_DIR, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise SystemExit(f'El worker no arrancó:\n{result.stderr[-3000:]}')
+    elapsed, maxrss = result.stdout.split()[-2:]
+    modules = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            own, cumulative, indent, name = match.groups()
+            modules.append((name, int(own), int(cumulative), len(indent) // 2))
+    # ru_maxrss viene en KB en Linux
+    return float(elapsed), int(maxrss) / 1024, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tiempo de importación y RSS al arrancar un worker.')
+    parser.add_argument('--repeat', type=int, default=3, help='Arranques medidos (se reporta la mediana).')
+    parser.add_argument('--top', type=int, default=15, help='Módulos más caros a mostrar.')
+    parser.add_argument('--budget-ms', type=float, default=1000, help='Máximo del tiempo de arranque (mediana).')
+    parser.add_argument('--max-rss-mb', type=float, default=90, help='Máximo del RSS tras arrancar (mediana).')
+    parser.add_argument('--forbid', default='numpy,scipy,pandas',
+                        help='Paquetes que no se deben importar al arrancar (separados por coma).')
+    args = parser.parse_args()
+
+    runs = [run_worker() for _ in range(args.repeat)]
+    elapsed_ms = statistics.median(elapsed for elapsed, _, _ in runs) * 1000
+    rss_mb = statistics.median(rss for _, rss, _ in runs)
+    # El detalle de módulos es del arranque más cercano a la mediana
+    _, _, modules = min(runs, key=lambda run: abs(run[0] * 1000 - elapsed_ms))
+
+    print(f'Arranque: {elapsed_ms:.0f} ms (mediana de {args.repeat}), RSS {rss_mb:.1f} MB, '
+          f'{len(modules)} módulos importados')
+    print()
+    print(f"{'acumulado ms':>13} {'propio ms':>10}  módulo")
+    print('-' * 60)
+    for name, own, cumulative, level in sorted(modules, key=lambda m: m[2], reverse=True)[:args.top]:
+        print(f'{cumulative / 1000:>13.1f} {own / 1000:>10.1f}  {"  " * level}{name}')
+
+    failures = []
+    forbidden = {package.strip() for package in args.forbid.split(',') if package.strip()}
+    loaded = sorted({name.split('.')[0] for name, _, _, _ in modules} & forbidden)
+    if loaded:
+        failures.append(f'se importan al arrancar: {", ".join(loaded)} (deben cargarse al primer uso)')
+    if elapsed_ms > args.budget_ms:
+        failures.append(f'arranque de {elapsed_ms:.0f} ms > presupuesto de {args.budget_ms:.0f} ms')
+    if rss_mb > args.max_rss_mb:
+        failures.append(f'RSS de {rss_mb:.1f} MB > máximo de {args.max_rss_mb:.0f} MB')
+
+    print()
+    if failures:
+        for failure in failures:
+            print(f'FALLA: {failure}', file=sys.stderr)
+        raise SystemExit(1)
+    print('Presupuesto de arranque: OK')
+
+
+if __name__ == '__main__':
+    main()
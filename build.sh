@@ -8,4 +8,13 @@ pip install -r requirements.txt
 python manage.py collectstatic --no-input
 
 # Ejecutar migraciones en la base de datos por defecto (OLTP)
-python manage.py migrate
\ No newline at end of file
+python manage.py migrate
+
+# Tabla de la caché compartida entre workers (CACHES['shared'], idempotente)
+python manage.py createcachetable
+
+# Índices de los filtros y la paginación de gestión (CONCURRENTLY, idempotente)
+python manage.py gestion_indexes
+
+# Esquema OpenAPI precompilado que sirve /api/schema/ (core/schema.py)
+python manage.py build_openapi --fail-on-warn
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    name = 'core'
+
+    def ready(self):
+        # Revocación de tokens al cambiar usuarios o grupos
+        from . import authentication  # noqa: F401
@@ -3,6 +3,11 @@ ASGI config for core project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Modo ASGI: un worker atiende muchas peticiones concurrentes del dashboard
+mientras espera a la base DSS. Despliegue (ver gunicorn.conf.py):
+
+    SERVER_PROFILE=asgi gunicorn
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -12,5 +17,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+os.environ.setdefault('ASGI_MODE', '1')
 
 application = get_asgi_application()
@@ -0,0 +1,236 @@
+"""
+Autenticación JWT sin estado.
+
+``ClaimsJWTAuthentication`` arma el usuario con los claims del access token
+(``user_id``, ``username``, ``groups``, ``is_superuser``, que agrega
+``MyTokenObtainPairSerializer``) en lugar de leer ``auth_user`` en cada
+petición, y los permisos de ``core.permissions`` miran esos mismos claims: una
+llamada autenticada no hace ninguna consulta de autenticación.
+
+Lo que se pierde es la revocación inmediata, y se compensa así:
+
+- Access tokens de vida corta (``JWT_ACCESS_MINUTES``); el refresh sí consulta
+  la base y revisa que el usuario siga activo.
+- Una lista de revocación (modelo ``core.models.JwtRevocation``) que cada proceso mantiene
+  en memoria y relee cada ``JWT_REVOCATION_REFRESH_SECONDS``. Se puede revocar
+  una sesión (claim ``sid``, compartido por el refresh y todos sus access
+  tokens) o todos los tokens de un usuario emitidos hasta ese momento. Los
+  cambios de grupos, contraseña o estado del usuario revocan sus tokens, para
+  que los claims no queden desactualizados.
+
+Con ``JWT_STATELESS_AUTH=0`` se usa ``RevocableJWTAuthentication`` (usuario de
+la base, un SELECT por petición) y los permisos consultan los grupos en la base.
+"""
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.db import transaction
+from django.db.models.functions import Now
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.functional import cached_property
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework_simplejwt.authentication import JWTAuthentication, JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from .middleware import uncounted_queries
+from .models import JwtRevocation
+
+logger = logging.getLogger(__name__)
+
+
+class ClaimsUser(TokenUser):
+    """Usuario armado con los claims del JWT (sin fila de auth_user)."""
+
+    @cached_property
+    def group_names(self):
+        return frozenset(self.token.get('groups', ()))
+
+    def in_group(self, *names):
+        return self.is_superuser or not self.group_names.isdisjoint(names)
+
+
+# --- LISTA DE REVOCACIÓN ---
+
+class RevocationList:
+    """Revocaciones vigentes en memoria, releídas de la base cada ``refresh_interval`` segundos."""
+
+    def __init__(self, refresh_interval):
+        self.refresh_interval = refresh_interval
+        self.lock = threading.Lock()
+        self.loaded_at = None
+        self.jtis = frozenset()
+        self.users = {}
+
+    def load(self):
+        rows = JwtRevocation.objects.using('default').filter(expires_at__gt=Now()).values_list(
+            'jti', 'user_id', 'revoked_at',
+        )
+        jtis, users = set(), {}
+        for jti, user_id, revoked_at in rows:
+            if jti:
+                jtis.add(jti)
+            if user_id:
+                users[user_id] = max(users.get(user_id, 0), revoked_at.timestamp())
+        return frozenset(jtis), users
+
+    def refresh(self, force=False):
+        now = time.monotonic()
+        if not force and self.loaded_at is not None and now - self.loaded_at < self.refresh_interval:
+            return
+        with self.lock:
+            if not force and self.loaded_at is not None and now - self.loaded_at < self.refresh_interval:
+                return
+            try:
+                # Le toca a la petición que llega al vencer el intervalo, pero es del proceso
+                with uncounted_queries():
+                    self.jtis, self.users = self.load()
+            except Exception:
+                # Sin base no se puede revocar nada nuevo: se sigue con la última lista
+                logger.exception('No se pudo leer la lista de revocación de JWT')
+            self.loaded_at = time.monotonic()
+
+    def is_revoked(self, token):
+        self.refresh()
+        if token.get('jti') in self.jtis or token.get('sid') in self.jtis:
+            return True
+        cutoff = self.users.get(str(token.get(jwt_settings.USER_ID_CLAIM)))
+        # ``iat`` tiene resolución de segundos: un token del mismo segundo sigue valiendo
+        return cutoff is not None and token.get('iat', 0) < int(cutoff)
+
+    def revoke(self, jti=None, user_ids=()):
+        """Revoca una sesión/token (``jti``) y/o todos los tokens actuales de estos usuarios."""
+        user_ids = [str(user_id) for user_id in user_ids]
+        # Después de esto ningún token revocado puede seguir vigente
+        lifetime = max(jwt_settings.ACCESS_TOKEN_LIFETIME, jwt_settings.REFRESH_TOKEN_LIFETIME)
+        revoked_at = timezone.now()
+        expires_at = revoked_at + lifetime + timedelta(minutes=1)
+        rows = ([(jti, None)] if jti else []) + [(None, user_id) for user_id in user_ids]
+        if not rows:
+            return
+        JwtRevocation.objects.using('default').bulk_create([
+            JwtRevocation(jti=row_jti, user_id=user_id, revoked_at=revoked_at, expires_at=expires_at)
+            for row_jti, user_id in rows
+        ])
+        # En este proceso la revocación aplica de inmediato; en los demás, al releer
+        with self.lock:
+            if jti:
+                self.jtis = self.jtis | {jti}
+            if user_ids:
+                self.users = {**self.users, **dict.fromkeys(user_ids, revoked_at.timestamp())}
+
+
+revocations = RevocationList(settings.JWT_REVOCATION_REFRESH_SECONDS)
+
+
+def revoke_user_tokens(user_ids):
+    user_ids = list(user_ids)
+    if user_ids:
+        # Después del commit: un rollback no debe cerrar las sesiones
+        transaction.on_commit(lambda: revocations.revoke(user_ids=user_ids))
+
+
+# --- AUTENTICACIÓN ---
+
+class ClaimsJWTAuthentication(JWTStatelessUserAuthentication):
+    """JWT sin consultas: el usuario sale de los claims y se revisa la lista de revocación."""
+
+    def get_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+        if revocations.is_revoked(token):
+            raise InvalidToken({'detail': 'El token fue revocado.', 'code': 'token_revoked'})
+        return token
+
+    def get_user(self, validated_token):
+        if jwt_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken('El token no identifica al usuario.')
+        return ClaimsUser(validated_token)
+
+
+class RevocableJWTAuthentication(JWTAuthentication):
+    """Modo con estado (JWT_STATELESS_AUTH=0): usuario de la base + lista de revocación."""
+
+    def get_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+        if revocations.is_revoked(token):
+            raise InvalidToken({'detail': 'El token fue revocado.', 'code': 'token_revoked'})
+        return token
+
+
+# Mismo esquema de seguridad (Bearer JWT) en la documentación OpenAPI
+class ClaimsJWTScheme(SimpleJWTScheme):
+    target_class = ClaimsJWTAuthentication
+
+
+class RevocableJWTScheme(SimpleJWTScheme):
+    target_class = RevocableJWTAuthentication
+
+
+# --- INVALIDACIÓN DE CLAIMS ---
+# Los claims copian username, email, grupos y is_superuser: si cambian (o el
+# usuario se desactiva o cambia su contraseña) se revocan sus tokens y el
+# cliente tiene que volver a iniciar sesión.
+
+CLAIM_FIELDS = ('username', 'email', 'is_superuser', 'is_active', 'password')
+
+
+def _claim_values(instance):
+    return tuple(instance.__dict__.get(name) for name in CLAIM_FIELDS)
+
+
+@receiver(post_init, sender=User)
+def remember_claims(sender, instance, **kwargs):
+    instance._claim_values = _claim_values(instance)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, **kwargs):
+    if not created and instance._claim_values != _claim_values(instance):
+        revoke_user_tokens([instance.pk])
+    instance._claim_values = _claim_values(instance)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    revoke_user_tokens([instance.pk])
+
+
+def revoke_group_members(group):
+    revoke_user_tokens(group.user_set.values_list('pk', flat=True))
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        # user.groups.add/remove/clear/set
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            revoke_user_tokens([instance.pk])
+    elif action == 'pre_clear':
+        # group.user_set.clear(): después pk_set no trae los usuarios
+        revoke_group_members(instance)
+    elif action in ('post_add', 'post_remove'):
+        revoke_user_tokens(pk_set)
+
+
+@receiver(post_init, sender=Group)
+def remember_group_name(sender, instance, **kwargs):
+    instance._claim_name = instance.__dict__.get('name')
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, **kwargs):
+    if not created and instance._claim_name != instance.name:
+        revoke_group_members(instance)
+    instance._claim_name = instance.name
+
+
+@receiver(pre_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    revoke_group_members(instance)
@@ -1,19 +1,193 @@
+import contextvars
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+
+# --- SELECCIÓN DE RÉPLICAS ---
+
+LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+class RequestRouting:
+    """Estado de enrutamiento de una petición: réplica fijada por primario y escrituras."""
+
+    def __init__(self):
+        self.pinned = {}
+        self.wrote = set()
+
+
+_request_routing = contextvars.ContextVar('request_routing', default=None)
+
+
+class ReplicaPool:
+    """
+    Réplicas de un primario con su salud, retraso y carga (peticiones en curso
+    fijadas a cada una). Se elige la de menor carga relativa a su peso entre las
+    sanas y con retraso aceptable; si no hay ninguna, se usa el primario.
+    """
+
+    def __init__(self, primary, replicas):
+        self.primary = primary
+        self.weights = dict(replicas)
+        self.in_flight = {alias: 0 for alias in self.weights}
+        self.health = {}  # alias -> (disponible, retraso, momento de la comprobación)
+        self.lock = threading.Lock()
+
+    def _check(self, alias):
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute(LAG_SQL)
+                lag = float(cursor.fetchone()[0])
+            healthy = lag <= settings.REPLICA_MAX_LAG_SECONDS
+        except DatabaseError:
+            connections[alias].close()
+            lag, healthy = None, False
+        self.health[alias] = (healthy, lag, time.monotonic())
+        return healthy
+
+    def is_available(self, alias):
+        healthy, _, checked_at = self.health.get(alias, (False, None, None))
+        if checked_at is None or time.monotonic() - checked_at > settings.REPLICA_CHECK_INTERVAL:
+            return self._check(alias)
+        return healthy
+
+    def choose(self):
+        candidates = [alias for alias in self.weights if self.is_available(alias)]
+        if not candidates:
+            return self.primary
+        with self.lock:
+            lowest = min(self.in_flight[a] / self.weights[a] for a in candidates)
+            least_loaded = [a for a in candidates if self.in_flight[a] / self.weights[a] == lowest]
+        return random.choices(least_loaded, weights=[self.weights[a] for a in least_loaded])[0]
+
+    def acquire(self, alias):
+        if alias in self.in_flight:
+            with self.lock:
+                self.in_flight[alias] += 1
+
+    def release(self, alias):
+        if alias in self.in_flight:
+            with self.lock:
+                self.in_flight[alias] -= 1
+
+    def status(self):
+        return {
+            alias: {
+                'weight': self.weights[alias],
+                'in_flight': self.in_flight[alias],
+                'healthy': self.health.get(alias, (None,))[0],
+                'lag_seconds': self.health.get(alias, (None, None))[1],
+            }
+            for alias in self.weights
+        }
+
+
+_pools = {
+    primary: ReplicaPool(primary, replicas)
+    for primary, replicas in settings.DATABASE_REPLICAS.items()
+}
+
+# alias (primario o réplica) -> primario
+PRIMARY_OF = {alias: alias for alias in settings.DATABASES}
+for _pool in _pools.values():
+    for _alias in _pool.weights:
+        PRIMARY_OF[_alias] = _pool.primary
+
+
+def read_alias(primary):
+    """
+    Alias desde el que leer para ``primary``: una réplica sana o el propio
+    primario. Dentro de una petición la elección se fija (todas las lecturas
+    ven el mismo estado) y tras una escritura se vuelve al primario.
+    Las consultas SQL directas deben usarlo: ``connections[read_alias('project_dss')]``.
+    """
+    pool = _pools.get(primary)
+    if pool is None:
+        return primary
+
+    # Dentro de una transacción se lee lo que la propia transacción escribió
+    if connections[primary].in_atomic_block:
+        return primary
+    routing = _request_routing.get()
+    if routing is None:
+        return pool.choose()
+    if primary in routing.wrote:
+        return primary
+    alias = routing.pinned.get(primary)
+    if alias is None:
+        # setdefault: las vistas asíncronas comparten el estado entre hilos
+        chosen = pool.choose()
+        alias = routing.pinned.setdefault(primary, chosen)
+        if alias == chosen:
+            pool.acquire(alias)
+    return alias
+
+
+def mark_write(primary):
+    routing = _request_routing.get()
+    if routing is not None:
+        routing.wrote.add(primary)
+
+
+def begin_request():
+    return _request_routing.set(RequestRouting())
+
+
+def end_request(token):
+    routing = _request_routing.get()
+    _request_routing.reset(token)
+    for primary, alias in routing.pinned.items():
+        _pools[primary].release(alias)
+
+
+def replica_status():
+    return {primary: pool.status() for primary, pool in _pools.items()}
+
+
 class AnalyticsRouter:
     """
     Un router para controlar todas las operaciones de base de datos
-    para la aplicación 'analytics' (hacia project_dss).
+    para la aplicación 'analytics' (hacia project_dss) y repartir las
+    lecturas de 'analytics' y 'gestion_oltp' entre las réplicas configuradas.
     """
     route_app_labels = {'analytics'}
+    oltp_app_labels = {'gestion_oltp'}
 
-    def db_for_read(self, model, **hints):
+    def _primary_for(self, model):
         if model._meta.app_label in self.route_app_labels:
             return 'project_dss'
+        if model._meta.app_label in self.oltp_app_labels:
+            return 'default'
         return None
 
+    def db_for_read(self, model, **hints):
+        primary = self._primary_for(model)
+        if primary is None:
+            return None
+        # Las relaciones se leen de la misma base que la instancia de origen
+        instance = hints.get('instance')
+        if instance is not None and PRIMARY_OF.get(instance._state.db) == primary:
+            return instance._state.db
+        return read_alias(primary)
+
     def db_for_write(self, model, **hints):
         # El DSS es de SOLO LECTURA desde Django (el ETL lo llena)
         if model._meta.app_label in self.route_app_labels:
-            return False 
+            return False
+        if model._meta.app_label in self.oltp_app_labels:
+            # El resto de la petición lee del primario (lee sus propias escrituras)
+            mark_write('default')
+            return 'default'
         return None
 
     def allow_relation(self, obj1, obj2, **hints):
@@ -22,10 +196,15 @@ class AnalyticsRouter:
             obj2._meta.app_label in self.route_app_labels
         ):
             return True
+        # Un primario y sus réplicas contienen los mismos datos
+        if PRIMARY_OF.get(obj1._state.db) == PRIMARY_OF.get(obj2._state.db) is not None:
+            return True
         return None
 
     def allow_migrate(self, db, app_label, model_name=None, **hints):
-        # No se hacen migraciones de Django en el DWH
+        # No se hacen migraciones de Django en el DWH ni en las réplicas
         if app_label in self.route_app_labels:
             return False
-        return None
\ No newline at end of file
+        if PRIMARY_OF.get(db, db) != db:
+            return False
+        return None
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from drf_spectacular.drainage import GENERATOR_STATS
+from drf_spectacular.validation import validate_schema
+
+from core.schema import generate_schema, write_artifacts
+
+
+class Command(BaseCommand):
+    help = 'Genera el esquema OpenAPI (YAML y JSON con gzip) que sirve /api/schema/ (core/schema.py).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fail-on-warn', action='store_true',
+                            help='Falla si drf_spectacular emite warnings o errores.')
+        parser.add_argument('--validate', action='store_true',
+                            help='Valida el esquema contra la especificación OpenAPI 3.')
+
+    def handle(self, *args, **options):
+        GENERATOR_STATS.enable_trace_lineno()
+        schema = generate_schema()
+        GENERATOR_STATS.emit_summary()
+        if options['fail_on_warn'] and GENERATOR_STATS:
+            raise CommandError('El esquema tiene warnings (ver arriba).')
+        if options['validate']:
+            try:
+                validate_schema(schema)
+            except Exception as e:
+                raise CommandError(f'Esquema inválido: {e}')
+
+        for fmt, (path, size) in write_artifacts(schema).items():
+            self.stdout.write(f'   > {path} ({size:,} bytes, {path.stat().st_size:,} con gzip)')
+        self.stdout.write(self.style.SUCCESS('Esquema OpenAPI generado.'))
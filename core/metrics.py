@@ -0,0 +1,136 @@
+"""
+Métricas de ejecución en formato Prometheus (endpoint ``/metrics``).
+
+Con gunicorn multi-proceso cada worker tiene sus propios contadores: definiendo
+``PROMETHEUS_MULTIPROC_DIR`` (un directorio vacío al arrancar, compartido por
+todos los workers) prometheus_client escribe los valores en archivos mmap y la
+vista los agrega al momento del scrape.
+
+Ejemplos de alertas sobre las rutas críticas::
+
+    histogram_quantile(0.95, sum by (le, route) (rate(
+        http_request_duration_seconds_bucket{route=~"mission-kpis-list|bsc-dashboard|.*-list"}[5m])))
+    sum(rate(cache_requests_total{result="hit"}[5m])) by (cache)
+        / sum(rate(cache_requests_total[5m])) by (cache)
+"""
+import os
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest,
+)
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.multiprocess import MultiProcessCollector
+
+UNMATCHED_ROUTE = '<unmatched>'
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Latencia de las peticiones por ruta',
+    ['method', 'route'],
+)
+REQUESTS = Counter(
+    'http_requests', 'Peticiones atendidas por ruta y código de estado',
+    ['method', 'route', 'status'],
+)
+IN_FLIGHT = Gauge(
+    'http_requests_in_flight', 'Peticiones en curso',
+    multiprocess_mode='livesum',
+)
+RESPONSE_SIZE = Histogram(
+    'http_response_size_bytes', 'Tamaño del cuerpo de la respuesta por ruta',
+    ['route'],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, float('inf')),
+)
+DB_QUERIES = Counter(
+    'db_queries', 'Consultas ejecutadas por ruta y alias de base de datos',
+    ['route', 'alias'],
+)
+DB_QUERY_SECONDS = Counter(
+    'db_query_seconds', 'Tiempo acumulado en consultas por ruta y alias de base de datos',
+    ['route', 'alias'],
+)
+CACHE_REQUESTS = Counter(
+    'cache_requests', 'Lecturas de caché por uso y resultado (hit/miss)',
+    ['cache', 'result'],
+)
+
+
+def record_cache(name, hit):
+    """Cuenta una lectura de la caché ``name`` (para el ratio de aciertos)."""
+    CACHE_REQUESTS.labels(cache=name, result='hit' if hit else 'miss').inc()
+
+
+def observe_request(request, response, duration):
+    route = request.resolver_match.view_name if getattr(request, 'resolver_match', None) else UNMATCHED_ROUTE
+    method = request.method
+    REQUEST_LATENCY.labels(method=method, route=route).observe(duration)
+    REQUESTS.labels(method=method, route=route, status=str(response.status_code)).inc()
+    if not response.streaming:
+        RESPONSE_SIZE.labels(route=route).observe(len(response.content))
+
+    stats = getattr(request, 'query_stats', None)
+    if stats is not None:
+        for alias, (count, seconds) in stats.queries.items():
+            DB_QUERIES.labels(route=route, alias=alias).inc(count)
+            DB_QUERY_SECONDS.labels(route=route, alias=alias).inc(seconds)
+
+
+class ETLRunCollector:
+    """Expone la última corrida del ETL, leída de dwh.etl_run_log en cada scrape."""
+
+    def describe(self):
+        # Sin describe(), REGISTRY.register() llamaría a collect() (una consulta) al importar
+        return []
+
+    def collect(self):
+        from analytics.etl_runs import latest_run
+
+        try:
+            run = latest_run()
+        except Exception:
+            run = None
+        if run is None:
+            return
+
+        duration = GaugeMetricFamily('etl_last_run_duration_seconds', 'Duración de la última corrida del ETL')
+        duration.add_metric([], run['duration_seconds'])
+        yield duration
+
+        finished = GaugeMetricFamily('etl_last_run_timestamp_seconds', 'Fin de la última corrida del ETL (epoch)')
+        finished.add_metric([], run['finished_at'].timestamp())
+        yield finished
+
+        success = GaugeMetricFamily('etl_last_run_success', '1 si la última corrida del ETL terminó bien')
+        success.add_metric([], 1 if run['success'] else 0)
+        yield success
+
+        rows = GaugeMetricFamily('etl_last_run_rows', 'Filas cargadas por tabla en la última corrida del ETL', labels=['table'])
+        for table, count in sorted(run['row_counts'].items()):
+            rows.add_metric([table], count)
+        yield rows
+
+
+_etl_collector = ETLRunCollector()
+
+
+def _multiprocess_mode():
+    return bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+
+if not _multiprocess_mode():
+    REGISTRY.register(_etl_collector)
+
+
+def metrics_view(request):
+    token = settings.METRICS_TOKEN
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponseForbidden()
+
+    if _multiprocess_mode():
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+        registry.register(_etl_collector)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
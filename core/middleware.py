@@ -0,0 +1,249 @@
+"""
+Middleware de contabilidad de consultas y métricas por petición.
+
+Registra cuántas consultas se ejecutaron y cuánto tardaron por alias de base de
+datos (default / project_dss), el tiempo de la vista y el de serialización
+(render de la respuesta DRF). Los resultados se envían en la cabecera
+``Server-Timing`` y como una línea JSON en el logger ``core.performance``.
+Las consultas de mantenimiento del proceso que caen en una petición (ver
+``uncounted_queries``) no se le atribuyen.
+"""
+import contextlib
+import contextvars
+import json
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from . import db_routers
+
+logger = logging.getLogger('core.performance')
+
+_current_stats = contextvars.ContextVar('request_query_stats', default=None)
+
+
+class RequestStats:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = {}
+        self.view_start = None
+        self.view_end = None
+        self.render_end = None
+        self.end = None
+
+    def record_query(self, alias, elapsed):
+        count, total = self.queries.get(alias, (0, 0.0))
+        self.queries[alias] = (count + 1, total + elapsed)
+
+    @property
+    def query_count(self):
+        return sum(count for count, _ in self.queries.values())
+
+    def durations_ms(self):
+        """Duraciones en milisegundos: total, vista y serialización."""
+        def ms(a, b):
+            return round((b - a) * 1000, 2) if a is not None and b is not None else None
+
+        return {
+            'total': ms(self.start, self.end),
+            'view': ms(self.view_start, self.view_end),
+            'serialize': ms(self.view_end, self.render_end),
+        }
+
+
+def _record_query(execute, sql, params, many, context):
+    stats = _current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.record_query(context['connection'].alias, time.perf_counter() - start)
+
+
+def _install_wrapper(connection):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    _install_wrapper(connection)
+
+
+# Cada conexión nueva (en cualquier hilo) queda instrumentada; las consultas
+# se atribuyen a la petición activa mediante un ContextVar, que asgiref copia
+# a los hilos de sync_to_async.
+connection_created.connect(_on_connection_created, dispatch_uid='core.middleware.query_timing')
+
+
+def current_request_stats():
+    return _current_stats.get()
+
+
+@contextlib.contextmanager
+def uncounted_queries():
+    """
+    Consultas que no son de la petición en curso aunque se ejecuten durante
+    ella (p. ej. la relectura periódica de la lista de revocación de JWT): no
+    cuentan para su presupuesto ni su Server-Timing.
+    """
+    token = _current_stats.set(None)
+    try:
+        yield
+    finally:
+        _current_stats.reset(token)
+
+
+class QueryTimingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        for connection in connections.all(initialized_only=True):
+            _install_wrapper(connection)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        stats = RequestStats()
+        request.query_stats = stats
+        token = _current_stats.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_stats.reset(token)
+        return self._finish(request, response, stats)
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        request.query_stats = stats
+        token = _current_stats.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_stats.reset(token)
+        return self._finish(request, response, stats)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_stats.view_start = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # Las respuestas DRF se serializan (render) después de este punto
+        stats = request.query_stats
+        stats.view_end = time.perf_counter()
+        response.add_post_render_callback(lambda r: setattr(stats, 'render_end', time.perf_counter()))
+        return response
+
+    def _finish(self, request, response, stats):
+        stats.end = time.perf_counter()
+        if stats.view_start is not None and stats.view_end is None:
+            # Respuesta ya renderizada por la vista: sin fase de serialización separada
+            stats.view_end = stats.end
+        durations = stats.durations_ms()
+        route = request.resolver_match.view_name if getattr(request, 'resolver_match', None) else None
+
+        if settings.SERVER_TIMING_HEADER:
+            metrics = [
+                f'db-{alias};dur={total * 1000:.2f};desc="{count} queries"'
+                for alias, (count, total) in sorted(stats.queries.items())
+            ]
+            for name in ('view', 'serialize', 'total'):
+                if durations[name] is not None:
+                    metrics.append(f'{name};dur={durations[name]:.2f}')
+            response['Server-Timing'] = ', '.join(metrics)
+
+        line = {
+            'event': 'request',
+            'method': request.method,
+            'path': request.path,
+            'route': route,
+            'status': response.status_code,
+            'queries': {
+                alias: {'count': count, 'ms': round(total * 1000, 2)}
+                for alias, (count, total) in stats.queries.items()
+            },
+            'view_ms': durations['view'],
+            'serialize_ms': durations['serialize'],
+            'total_ms': durations['total'],
+        }
+        logger.info(json.dumps(line))
+
+        budget = settings.QUERY_BUDGETS.get(route, settings.QUERY_BUDGET_DEFAULT)
+        if budget is not None and stats.query_count > budget:
+            logger.warning(json.dumps({
+                'event': 'query_budget_exceeded',
+                'route': route,
+                'path': request.path,
+                'queries': stats.query_count,
+                'budget': budget,
+            }))
+
+        return response
+
+
+class MetricsMiddleware:
+    """Latencia, peticiones en curso, tamaño de respuesta y consultas para /metrics."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        from . import metrics
+
+        self.metrics = metrics
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        start = time.perf_counter()
+        with self.metrics.IN_FLIGHT.track_inprogress():
+            response = self.get_response(request)
+        self.metrics.observe_request(request, response, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        with self.metrics.IN_FLIGHT.track_inprogress():
+            response = await self.get_response(request)
+        self.metrics.observe_request(request, response, time.perf_counter() - start)
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """Fija la réplica de lectura por petición y la libera al terminar (core.db_routers)."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = db_routers.begin_request()
+        try:
+            return self.get_response(request)
+        finally:
+            db_routers.end_request(token)
+
+    async def __acall__(self, request):
+        token = db_routers.begin_request()
+        try:
+            return await self.get_response(request)
+        finally:
+            db_routers.end_request(token)
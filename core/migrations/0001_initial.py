@@ -0,0 +1,43 @@
+# Generated by Django 5.2.8 on 2026-10-19 08:05
+
+import django.db.models.functions.datetime
+from django.db import migrations, models
+
+
+def create_table(apps, schema_editor):
+    # Las bases desplegadas antes de este modelo ya tienen la tabla (la creaba
+    # core/authentication.py con la primera revocación), con las mismas columnas
+    model = apps.get_model('core', 'JwtRevocation')
+    if model._meta.db_table not in schema_editor.connection.introspection.table_names():
+        schema_editor.create_model(model)
+
+
+def drop_table(apps, schema_editor):
+    schema_editor.delete_model(apps.get_model('core', 'JwtRevocation'))
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.CreateModel(
+                name='JwtRevocation',
+                fields=[
+                    ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                    ('jti', models.CharField(blank=True, max_length=64, null=True)),
+                    ('user_id', models.CharField(blank=True, max_length=64, null=True)),
+                    ('revoked_at', models.DateTimeField(db_default=django.db.models.functions.datetime.Now())),
+                    ('expires_at', models.DateTimeField()),
+                ],
+                options={
+                    'db_table': 'jwt_revocation',
+                },
+            ),
+        ]),
+        migrations.RunPython(create_table, drop_table),
+    ]
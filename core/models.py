@@ -0,0 +1,18 @@
+from django.db import models
+from django.db.models.functions import Now
+
+
+class JwtRevocation(models.Model):
+    """
+    Lista de revocación de JWT (core/authentication.py): una sesión o token
+    (``jti``) o todos los tokens de un usuario emitidos hasta ``revoked_at``.
+    """
+    id = models.BigAutoField(primary_key=True)
+    jti = models.CharField(max_length=64, blank=True, null=True)
+    user_id = models.CharField(max_length=64, blank=True, null=True)
+    revoked_at = models.DateTimeField(db_default=Now())
+    # Después de esta fecha ningún token revocado puede seguir vigente
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'jwt_revocation'
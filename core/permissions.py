@@ -0,0 +1,27 @@
+"""
+Permisos por grupo que leen los claims del JWT (``core.authentication.ClaimsUser``)
+sin consultar la base. Con un usuario de la base (``JWT_STATELESS_AUTH=0``,
+sesión del admin) consultan sus grupos como antes.
+"""
+from rest_framework.permissions import BasePermission
+
+
+def user_in_group(user, *names):
+    if not user or not user.is_authenticated:
+        return False
+    if hasattr(user, 'in_group'):
+        return user.in_group(*names)
+    return user.is_superuser or user.groups.filter(name__in=names).exists()
+
+
+class InGroup(BasePermission):
+    """Permite el acceso a los superusuarios y a los miembros de alguno de ``required_groups``."""
+    required_groups = ()
+
+    def has_permission(self, request, view):
+        return user_in_group(request.user, *self.required_groups)
+
+
+class IsProjectManager(InGroup):
+    required_groups = ('Project Managers',)
+    message = "Acceso denegado: Esta herramienta es exclusiva para el rol de 'Project Managers'."
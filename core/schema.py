@@ -0,0 +1,119 @@
+"""
+Esquema OpenAPI precompilado.
+
+Generar el esquema obliga a drf_spectacular a recorrer todos los viewsets y
+serializers, y ``SpectacularAPIView`` lo hace en cada petición. El comando
+``build_openapi`` (lo corre ``build.sh``) lo genera una sola vez y guarda el
+YAML y el JSON comprimidos con gzip en ``OPENAPI_SCHEMA_DIR``.
+``PrebuiltSchemaView`` los carga en memoria la primera vez que se piden y los
+sirve tal cual, comprimidos si el cliente acepta gzip, con ETag (responde 304
+si el cliente ya tiene la versión actual).
+
+Con ``OPENAPI_SCHEMA_LIVE=1`` (por defecto cuando DEBUG) el esquema se genera
+en cada petición, como antes, para ver los cambios sin recompilar.
+"""
+import gzip
+import hashlib
+import logging
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+from drf_spectacular.settings import spectacular_settings
+from drf_spectacular.utils import extend_schema
+from drf_spectacular.views import SCHEMA_KWARGS, SpectacularAPIView
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+# formato -> renderer con el que se genera el archivo
+RENDERERS = {
+    'yaml': OpenApiYamlRenderer,
+    'json': OpenApiJsonRenderer,
+}
+
+
+def artifact_path(fmt):
+    return Path(settings.OPENAPI_SCHEMA_DIR) / f'schema.{fmt}.gz'
+
+
+def generate_schema():
+    """Esquema generado sin petición, igual que ``manage.py spectacular``."""
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    return generator.get_schema(request=None, public=True)
+
+
+def write_artifacts(schema):
+    """Escribe schema.<formato>.gz y devuelve {formato: (ruta, bytes sin comprimir)}."""
+    written = {}
+    Path(settings.OPENAPI_SCHEMA_DIR).mkdir(parents=True, exist_ok=True)
+    for fmt, renderer_class in RENDERERS.items():
+        content = renderer_class().render(schema, renderer_context={})
+        path = artifact_path(fmt)
+        # mtime=0: el mismo esquema produce el mismo archivo en cada build
+        path.write_bytes(gzip.compress(content, compresslevel=9, mtime=0))
+        written[fmt] = (path, len(content))
+    return written
+
+
+class SchemaArtifact:
+    """Un formato del esquema en memoria: contenido plano, comprimido y ETags."""
+
+    def __init__(self, compressed):
+        self.compressed = compressed
+        self.content = gzip.decompress(compressed)
+        digest = hashlib.sha256(self.content).hexdigest()[:32]
+        # Cada codificación es una representación distinta: ETag distinto
+        self.etag = f'"{digest}"'
+        self.gzip_etag = f'"{digest}-gzip"'
+
+
+_artifacts = {}
+
+
+def load_artifact(fmt):
+    """El artefacto del formato, leído del disco una vez por proceso (None si no existe)."""
+    artifact = _artifacts.get(fmt)
+    if artifact is None:
+        try:
+            artifact = SchemaArtifact(artifact_path(fmt).read_bytes())
+        except FileNotFoundError:
+            return None
+        _artifacts[fmt] = artifact
+    return artifact
+
+
+class PrebuiltSchemaView(SpectacularAPIView):
+    """``SpectacularAPIView`` que sirve el esquema generado por ``build_openapi``."""
+
+    @extend_schema(**SCHEMA_KWARGS)
+    def get(self, request, *args, **kwargs):
+        if settings.OPENAPI_SCHEMA_LIVE:
+            return super().get(request, *args, **kwargs)
+
+        renderer = request.accepted_renderer
+        artifact = load_artifact(renderer.format)
+        if artifact is None:
+            logger.error('Falta el esquema OpenAPI precompilado: ejecutar manage.py build_openapi')
+            return Response({"error": "Esquema OpenAPI no generado (manage.py build_openapi)."}, status=503)
+
+        use_gzip = 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '')
+        etag = artifact.gzip_etag if use_gzip else artifact.etag
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            response = HttpResponseNotModified()
+        else:
+            content_type = renderer.media_type
+            if renderer.charset:
+                content_type += f'; charset={renderer.charset}'
+            response = HttpResponse(artifact.compressed if use_gzip else artifact.content, content_type=content_type)
+            if use_gzip:
+                response['Content-Encoding'] = 'gzip'
+            response['Content-Disposition'] = f'inline; filename="{self._get_filename(request, None)}"'
+        response['ETag'] = etag
+        # El esquema solo cambia con un deploy: el cliente revalida con el ETag
+        response['Cache-Control'] = 'no-cache'
+        patch_vary_headers(response, ['Accept', 'Accept-Encoding'])
+        return response
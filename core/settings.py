@@ -4,6 +4,7 @@ Django settings for core project.
 from pathlib import Path
 import dj_database_url
 import os
+from datetime import timedelta
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -22,16 +23,23 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'core',
     'gestion_oltp',
     'analytics',
     'corsheaders',
     'rest_framework',
     'rest_framework_simplejwt',
     'drf_spectacular',
+    'django_filters',
 ]
 
 
 MIDDLEWARE = [
+    # Primero: miden la petición completa (métricas Prometheus, consultas por
+    # alias, vista, serialización)
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.QueryTimingMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -61,6 +69,14 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'core.wsgi.application'
+ASGI_APPLICATION = 'core.asgi.application'
+
+# Modo ASGI (lo activa core/asgi.py): las rutas del Dashboard de Misión y del
+# BSC se atienden con las vistas asíncronas de analytics/async_views.py
+ASGI_MODE = os.environ.get('ASGI_MODE') == '1'
+# Hilos por worker para las consultas de las vistas asíncronas: cada uno
+# conserva sus conexiones, así que también acota las conexiones por base
+ASYNC_DB_THREADS = int(os.environ.get('ASYNC_DB_THREADS', 5))
 
 # --- BASES DE DATOS ---
 DATABASE_ROUTERS = ['core.db_routers.AnalyticsRouter']
@@ -77,6 +93,30 @@ DATABASES = {
     )
 }
 
+# --- RÉPLICAS DE LECTURA ---
+# URLs separadas por comas, con peso opcional tras '|':
+#   DATABASE_REPLICA_URLS="postgres://...@replica1/db|3,postgres://...@replica2/db"
+# Cada réplica queda como alias '<primario>_replica_<n>' y el router
+# (core.db_routers) reparte entre ellas las lecturas de gestion_oltp (OLTP) y
+# de analytics (DSS).
+DATABASE_REPLICAS = {}
+for _primary, _env in (('default', 'DATABASE_REPLICA_URLS'), ('project_dss', 'DATABASE_DSS_REPLICA_URLS')):
+    _entries = [entry.strip() for entry in os.environ.get(_env, '').split(',') if entry.strip()]
+    for _n, _entry in enumerate(_entries, start=1):
+        _url, _, _weight = _entry.partition('|')
+        _alias = f'{_primary}_replica_{_n}'
+        DATABASES[_alias] = dj_database_url.parse(_url, conn_max_age=600)
+        # Una réplica caída no debe bloquear la petición (se marca no disponible)
+        DATABASES[_alias].setdefault('OPTIONS', {}).setdefault('connect_timeout', 3)
+        # En las pruebas la réplica es el mismo primario
+        DATABASES[_alias]['TEST'] = {'MIRROR': _primary}
+        DATABASE_REPLICAS.setdefault(_primary, []).append((_alias, float(_weight or 1)))
+
+# Por encima de este retraso de replicación (segundos) se lee del primario
+REPLICA_MAX_LAG_SECONDS = float(os.environ.get('REPLICA_MAX_LAG_SECONDS', 5))
+# Cada cuánto (segundos) se vuelve a comprobar la salud y el retraso de una réplica
+REPLICA_CHECK_INTERVAL = float(os.environ.get('REPLICA_CHECK_INTERVAL', 10))
+
 # --- VALIDADORES ---
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -107,14 +147,69 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # --- DRF & JWT ---
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'core.authentication.ClaimsJWTAuthentication'
+        if os.environ.get('JWT_STATELESS_AUTH', '1') == '1'
+        else 'core.authentication.RevocableJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # Paginación por cursor (keyset) en los listados de gestion_oltp
+    'DEFAULT_PAGINATION_CLASS': 'gestion_oltp.pagination.KeysetPagination',
+    'PAGE_SIZE': int(os.environ.get('PAGE_SIZE', 50)),
+    # Filtros por query string (gestion_oltp/filters.py) y ?fields= / ?expand= (gestion_oltp/fieldsets.py)
+    'DEFAULT_FILTER_BACKENDS': [
+        'django_filters.rest_framework.DjangoFilterBackend',
+        'gestion_oltp.fieldsets.FieldsetFilterBackend',
+    ],
+}
+
+# Autenticación sin estado (core/authentication.py): el usuario y sus grupos salen
+# de los claims del access token, sin consultar auth_user. Por eso los access tokens
+# duran poco y las revocaciones (logout, cambios de grupos) se releen cada
+# JWT_REVOCATION_REFRESH_SECONDS. JWT_STATELESS_AUTH=0 vuelve a leer el usuario de la base.
+SIMPLE_JWT = {
+    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=int(os.environ.get('JWT_ACCESS_MINUTES', 5))),
+    'REFRESH_TOKEN_LIFETIME': timedelta(hours=int(os.environ.get('JWT_REFRESH_HOURS', 24))),
+    'TOKEN_USER_CLASS': 'core.authentication.ClaimsUser',
+}
+JWT_REVOCATION_REFRESH_SECONDS = float(os.environ.get('JWT_REVOCATION_REFRESH_SECONDS', 30))
+
+# Listados de gestión con values_list + orjson en lugar del serializer por fila
+# (gestion_oltp/fastlist.py); la salida es idéntica, desactivar solo para comparar
+FAST_LIST_SERIALIZATION = os.environ.get('FAST_LIST_SERIALIZATION', '1') == '1'
+
+# Tamaño máximo de página que puede pedir el cliente (?page_size=)
+PAGINATION_MAX_PAGE_SIZE = int(os.environ.get('PAGINATION_MAX_PAGE_SIZE', 500))
+# Por debajo de esta estimación del planificador el total se calcula con COUNT(*)
+PAGINATION_EXACT_COUNT_THRESHOLD = int(os.environ.get('PAGINATION_EXACT_COUNT_THRESHOLD', 10_000))
+
+# --- CARGA MASIVA (<recurso>/bulk/) ---
+BULK_MAX_ITEMS = int(os.environ.get('BULK_MAX_ITEMS', 5000))
+# Filas por sentencia INSERT/UPDATE en bulk_create / bulk_update
+BULK_BATCH_SIZE = int(os.environ.get('BULK_BATCH_SIZE', 1000))
+
+# --- CACHÉ ---
+# 'default' es por proceso (LocMemCache): para valores cuya clave cambia con los
+# datos (versión del DWH en la matriz de riesgos) o que pueden vencer solos (OLAP).
+# 'shared' la ven todos los workers: para valores que se invalidan al escribir
+# (árbol de tareas), así un worker no sigue sirviendo lo que otro borró. Es la
+# tabla de caché de la base por defecto (manage.py createcachetable, en build.sh).
+CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'django_cache',
+        # Un árbol por proyecto
+        'OPTIONS': {'MAX_ENTRIES': int(os.environ.get('SHARED_CACHE_MAX_ENTRIES', 10_000))},
+    },
 }
 
+# Segundos en caché del árbol de tareas por proyecto (gestion_oltp/tree.py). Las
+# escrituras lo invalidan en la caché compartida; el vencimiento solo acota el espacio.
+TASK_TREE_CACHE_SECONDS = int(os.environ.get('TASK_TREE_CACHE_SECONDS', 300))
+
 
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",
@@ -132,4 +227,92 @@ SPECTACULAR_SETTINGS = {
     'VERSION': '1.0.0',
     'SERVE_INCLUDE_SCHEMA': False,
     'COMPONENT_SPLIT_REQUEST': True,
-}
\ No newline at end of file
+    'ENUM_NAME_OVERRIDES': {
+        'OLAPDimensionEnum': 'analytics.olap.DIMENSION_CHOICES',
+    },
+}
+# /api/schema/ sirve el esquema generado en el build (manage.py build_openapi,
+# core/schema.py). OPENAPI_SCHEMA_LIVE=1 lo genera en cada petición (por defecto en DEBUG).
+OPENAPI_SCHEMA_DIR = Path(os.environ.get('OPENAPI_SCHEMA_DIR', BASE_DIR / 'openapi'))
+OPENAPI_SCHEMA_LIVE = os.environ.get('OPENAPI_SCHEMA_LIVE', '1' if DEBUG else '0') == '1'
+
+# --- PRONÓSTICO MONTE CARLO ---
+# Corridas con más de este número de elementos (iteraciones x proyectos) se
+# reparten en un pool de procesos (uno por worker web, creado con forkserver en
+# la primera corrida grande; ver analytics/forecasting.py). Por defecto usa todos los CPUs.
+FORECAST_PARALLEL_THRESHOLD = int(os.environ.get('FORECAST_PARALLEL_THRESHOLD', 20_000_000))
+FORECAST_MAX_WORKERS = int(os.environ.get('FORECAST_MAX_WORKERS', 0)) or None
+
+# --- CONSULTAS OLAP (/api/analytics/query/) ---
+# Costo máximo estimado por el planificador (EXPLAIN) antes de rechazar una consulta
+OLAP_MAX_PLAN_COST = float(os.environ.get('OLAP_MAX_PLAN_COST', 500_000))
+OLAP_MAX_LIMIT = int(os.environ.get('OLAP_MAX_LIMIT', 5000))
+OLAP_CACHE_SECONDS = int(os.environ.get('OLAP_CACHE_SECONDS', 300))
+
+# Matriz de riesgos (analytics/risk_matrix.py): la clave de caché incluye la
+# versión del DWH, así que el vencimiento solo acota la memoria
+RISK_MATRIX_CACHE_SECONDS = int(os.environ.get('RISK_MATRIX_CACHE_SECONDS', 24 * 3600))
+
+# --- CONTABILIDAD DE CONSULTAS POR PETICIÓN (core.middleware) ---
+SERVER_TIMING_HEADER = os.environ.get('SERVER_TIMING_HEADER', '1') == '1'
+# Presupuesto de consultas por endpoint (nombre de ruta -> máximo de consultas).
+# La autenticación JWT no hace consultas (los claims traen el usuario) y la
+# relectura de revocaciones cada JWT_REVOCATION_REFRESH_SECONDS no se cuenta
+# (core.middleware.uncounted_queries); con JWT_STATELESS_AUTH=0 suma una. Al
+# superarlo se registra un warning en el logger core.performance.
+QUERY_BUDGETS = {
+    'mission-kpis-list': 9,
+    'bsc-dashboard': 5,  # la versión ASGI lanza las 5 consultas en paralelo
+    'bsc-drilldown': 2,  # filas agrupadas del cubo y totales (aggregate)
+    'olap-query-list': 3,  # catálogo (GET) y consultas (POST)
+    'utilization-list': 1,  # agregados de horas (analytics/utilization.py)
+    'risk-matrix-list': 2,  # versión del DWH y la matriz, solo sin caché
+    'defect-trend-list': 1,
+    'schema': 0,  # esquema OpenAPI precompilado, en memoria (core/schema.py)
+    # Listados de gestión: página y conteo (EXPLAIN + COUNT). ?expand= no suma
+    # consultas porque las relaciones se cargan con select_related (gestion_oltp/fieldsets.py)
+    'client-list': 3,
+    'project-list': 3,
+    'employee-list': 3,
+    'task-list': 3,
+    'timeentry-list': 3,
+    'risk-list': 3,
+    'defect-list': 3,
+    'resource-list': 3,
+    # Árbol de tareas: proyecto/tarea y lectura de la caché compartida (2); sin
+    # caché suma la consulta recursiva y la escritura en la tabla de caché (4)
+    'project-task-tree': 7,
+    'task-subtree': 7,
+}
+# Presupuesto para las rutas que no aparecen arriba (None = sin presupuesto)
+QUERY_BUDGET_DEFAULT = int(os.environ['QUERY_BUDGET_DEFAULT']) if os.environ.get('QUERY_BUDGET_DEFAULT') else None
+
+# --- CALENTAMIENTO DE WORKERS (gunicorn.conf.py, core/warmup.py) ---
+# Consultas de los tableros del DWH al arrancar cada worker
+WARMUP_DWH = os.environ.get('WARMUP_DWH', '1') == '1'
+# Importar NumPy/SciPy al arrancar (con preload se comparten entre workers)
+# en lugar de en la primera predicción o pronóstico
+WARMUP_SCIENTIFIC = os.environ.get('WARMUP_SCIENTIFIC', '0') == '1'
+
+# --- MÉTRICAS PROMETHEUS (/metrics) ---
+# Si se define, el scrape debe enviar 'Authorization: Bearer <token>'.
+# Con gunicorn multi-proceso definir además PROMETHEUS_MULTIPROC_DIR (ver core/metrics.py).
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'performance': {'class': 'logging.StreamHandler', 'formatter': 'message'},
+    },
+    'loggers': {
+        'core.performance': {
+            'handlers': ['performance'],
+            'level': os.environ.get('PERFORMANCE_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
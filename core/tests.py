@@ -0,0 +1,53 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.authentication import RevocationList, revocations
+from core.models import JwtRevocation
+
+
+class TokenRevocationTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create_user('revocar', password='revocar')
+
+    def login(self):
+        response = self.client.post('/api/token/', {'username': 'revocar', 'password': 'revocar'})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.data['access']
+
+    def test_revoke_session(self):
+        access = self.login()
+        headers = {'Authorization': f'Bearer {access}'}
+        response = self.client.post('/api/token/revoke/', {}, headers=headers)
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.client.post('/api/token/revoke/', {}, headers=headers).status_code, 401)
+
+        # Otro proceso la ve al releer la tabla
+        token = AccessToken(access)
+        self.assertTrue(JwtRevocation.objects.filter(jti=token['sid']).exists())
+        self.assertTrue(RevocationList(refresh_interval=60).is_revoked(token))
+
+    def test_revoke_all_user_tokens(self):
+        token = AccessToken(self.login())
+        response = self.client.post(
+            '/api/token/revoke/', {'all': True}, headers={'Authorization': f'Bearer {token}'},
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertTrue(JwtRevocation.objects.filter(user_id=str(token['user_id'])).exists())
+        self.assertTrue(RevocationList(refresh_interval=60).is_revoked(token))
+
+    def test_reload_not_counted_in_request(self):
+        access = self.login()
+        # Vence el intervalo: la petición que sigue relee la lista
+        revocations.loaded_at = None
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/analytics/query/', headers={'Authorization': f'Bearer {access}'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 1)
+        self.assertIsNotNone(revocations.loaded_at)
+        # El catálogo OLAP no consulta nada: la relectura no se le atribuye
+        self.assertNotIn('db-', response['Server-Timing'])
@@ -20,22 +20,28 @@ from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
 )
-from gestion_oltp.views import MyTokenObtainPairView
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
+from gestion_oltp.views import MyTokenObtainPairView, MyTokenRefreshView, TokenRevokeView
+from core.metrics import metrics_view
+from drf_spectacular.views import SpectacularSwaggerView
+from core.schema import PrebuiltSchemaView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
 
+    # Métricas Prometheus
+    path('metrics', metrics_view, name='metrics'),
+
     # Endpoints API de gestión
     path('api/gestion/', include('gestion_oltp.urls')),
     # Endpoints API de analiticas
     path('api/analytics/', include('analytics.urls')),
     # Endpoints Autenticación JWT
     path('api/token/', MyTokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('api/token/refresh/', MyTokenRefreshView.as_view(), name='token_refresh'),
+    path('api/token/revoke/', TokenRevokeView.as_view(), name='token_revoke'),
 
     # genera el archivo técnico (schema.yaml) que usan las máquinas
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
+    path('api/schema/', PrebuiltSchemaView.as_view(), name='schema'),
     
     # genera la pagina web visual
     path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
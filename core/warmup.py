@@ -0,0 +1,108 @@
+"""
+Calentamiento de procesos del servidor (lo llaman los hooks de gunicorn.conf.py).
+
+Sin calentar, la primera petición de cada worker paga la importación del
+URLconf y de todas las vistas, la carga del esquema OpenAPI y de la lista de
+revocación de JWT y la conexión a las bases. ``warm_up`` hace ese trabajo antes de aceptar tráfico:
+
+- En el master (con ``preload_app``) se importa y carga todo, y los workers
+  lo heredan al hacer fork (páginas compartidas copy-on-write). Al terminar
+  se cierran las conexiones: un socket heredado por varios workers corrompe
+  el protocolo de Postgres.
+- Se lanzan las consultas de los tableros sobre los agregados más recientes
+  del DWH, para que lleguen al caché de Postgres y recorran el mismo camino
+  que la primera petición real.
+- En cada worker síncrono quedan abiertas las conexiones persistentes
+  (``conn_max_age``) de todas las bases.
+
+Cada paso se registra con su duración en el logger ``core.performance``; un
+paso que falla (p. ej. la base todavía no responde) se registra como warning
+y no impide arrancar.
+"""
+import json
+import logging
+import os
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections
+from django.urls import get_resolver
+from django.utils.timezone import now
+
+from core.db_routers import read_alias
+
+logger = logging.getLogger('core.performance')
+
+
+def load_urlconf():
+    """Importa el URLconf y con él todas las vistas, serializers y filtros."""
+    get_resolver().url_patterns
+
+
+def load_schema():
+    from core.schema import RENDERERS, load_artifact
+
+    if not settings.OPENAPI_SCHEMA_LIVE:
+        for fmt in RENDERERS:
+            load_artifact(fmt)
+
+
+def load_revocations():
+    """Lista de revocación de JWT (core/authentication.py); si no, la lee la primera petición."""
+    from core.authentication import revocations
+
+    revocations.refresh()
+
+
+def load_scientific():
+    """NumPy/SciPy (se importan al primer uso, ver analytics/views.py)."""
+    if settings.WARMUP_SCIENTIFIC:
+        import scipy.stats  # noqa: F401
+
+        from analytics import forecasting  # noqa: F401
+
+
+def open_connections():
+    for alias in settings.DATABASES:
+        connections[alias].ensure_connection()
+
+
+def query_dwh_aggregates():
+    """Las consultas del tablero BSC y del Dashboard de Misión (se descartan los resultados)."""
+    from analytics.views import BSC_DASHBOARD_SQL, latest_snapshot_progress, project_financials, task_planned_hours
+
+    if not settings.WARMUP_DWH:
+        return
+    params = {'today': now().date(), 'start_date': now().date() - timedelta(days=30)}
+    with connections[read_alias('project_dss')].cursor() as cursor:
+        cursor.execute(BSC_DASHBOARD_SQL, params)
+        cursor.fetchall()
+    latest_snapshot_progress()
+    project_financials()
+    task_planned_hours()
+
+
+def _run(step):
+    start = time.perf_counter()
+    line = {'event': 'warmup', 'pid': os.getpid(), 'step': step.__name__}
+    try:
+        step()
+    except Exception as e:
+        logger.warning(json.dumps({**line, 'error': str(e)}))
+    else:
+        logger.info(json.dumps({**line, 'ms': round((time.perf_counter() - start) * 1000, 2)}))
+
+
+def warm_up(keep_connections=True):
+    """
+    Calienta el proceso actual. Con ``keep_connections=False`` (master con
+    preload, workers ASGI o con hilos, donde las conexiones son por hilo) se
+    cierran las conexiones que se abrieron.
+    """
+    for step in (load_urlconf, load_schema, load_revocations, load_scientific, query_dwh_aggregates):
+        _run(step)
+    if keep_connections:
+        _run(open_connections)
+    else:
+        connections.close_all()
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class GestionOltpConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'gestion_oltp'
+
+    def ready(self):
+        # Invalidación de la caché del árbol de tareas
+        from . import tree  # noqa: F401
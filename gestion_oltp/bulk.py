@@ -0,0 +1,182 @@
+"""
+Endpoints de carga masiva (``POST/PATCH <recurso>/bulk/``).
+
+La validación de las claves foráneas se hace por conjuntos: antes de validar
+el lote se cargan con una sola consulta por tabla referenciada todos los IDs
+usados, y cada campo valida contra ese mapa en memoria. Después se inserta o
+actualiza con ``bulk_create`` / ``bulk_update`` en una sola transacción: o se
+guarda el lote completo o nada, con los errores por elemento.
+"""
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.dispatch import Signal
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+# Se envía tras guardar un lote (bulk_create/bulk_update no envían post_save),
+# con sender=modelo, objs=instancias y created=True/False.
+bulk_saved = Signal()
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField que, durante una carga masiva, resuelve los IDs
+    contra el mapa precargado en ``prefetched`` en lugar de un SELECT por
+    elemento. Fuera de un lote se comporta igual que el campo de DRF.
+    """
+    prefetched = None
+
+    def to_pk(self, data):
+        if self.pk_field is not None:
+            data = self.pk_field.to_internal_value(data)
+        if isinstance(data, bool):
+            raise TypeError
+        return self.get_queryset().model._meta.pk.to_python(data)
+
+    def to_internal_value(self, data):
+        if self.prefetched is None:
+            return super().to_internal_value(data)
+        try:
+            pk = self.to_pk(data)
+        except (TypeError, ValueError, DjangoValidationError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        obj = self.prefetched.get(pk)
+        if obj is None:
+            self.fail('does_not_exist', pk_value=data)
+        return obj
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """
+    Valida un lote precargando las relaciones (una consulta por tabla) y, en
+    actualizaciones, las instancias (una consulta) indexadas por PK.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.instance_map = kwargs.pop('instance_map', None)
+        super().__init__(*args, **kwargs)
+
+    def related_fields(self):
+        return [
+            field for field in self.child.fields.values()
+            if isinstance(field, BulkPrimaryKeyRelatedField) and not field.read_only
+        ]
+
+    def prefetch_related_ids(self, data):
+        for field in self.related_fields():
+            ids = set()
+            for item in data:
+                if not isinstance(item, dict) or item.get(field.field_name) is None:
+                    continue
+                try:
+                    ids.add(field.to_pk(item[field.field_name]))
+                except (TypeError, ValueError, DjangoValidationError):
+                    pass
+            field.prefetched = field.get_queryset().in_bulk(ids) if ids else {}
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            self.prefetch_related_ids(data)
+        try:
+            return super().to_internal_value(data)
+        finally:
+            for field in self.related_fields():
+                field.prefetched = None
+
+    def to_pk(self, data):
+        pk_field = self.child.Meta.model._meta.pk
+        try:
+            return pk_field.to_python(data.get(pk_field.name)) if isinstance(data, dict) else None
+        except (DjangoValidationError, TypeError):
+            return None
+
+    def run_validation(self, data=serializers.empty):
+        self.matched_instances = []
+        self.seen_pks = set()
+        return super().run_validation(data)
+
+    def run_child_validation(self, data):
+        if self.instance_map is None:
+            return super().run_child_validation(data)
+        pk_name = self.child.Meta.model._meta.pk.name
+        pk = self.to_pk(data)
+        instance = self.instance_map.get(pk)
+        if instance is None:
+            raise serializers.ValidationError({pk_name: ['El registro no existe.']})
+        if pk in self.seen_pks:
+            raise serializers.ValidationError({pk_name: ['Registro repetido en el lote.']})
+        self.seen_pks.add(pk)
+        self.child.instance = instance
+        self.child.initial_data = data
+        validated = super().run_child_validation(data)
+        self.matched_instances.append(instance)
+        return validated
+
+
+class BulkMixin:
+    """Agrega ``POST /bulk/`` (crear) y ``PATCH /bulk/`` (actualizar) a un ModelViewSet."""
+    bulk_batch_size = settings.BULK_BATCH_SIZE
+    bulk_max_items = settings.BULK_MAX_ITEMS
+
+    @action(detail=False, methods=['post', 'patch'], url_path='bulk')
+    def bulk(self, request):
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response({"error": "Se esperaba una lista no vacía de registros."}, status=400)
+        if len(items) > self.bulk_max_items:
+            return Response(
+                {"error": f"El lote supera el máximo de {self.bulk_max_items} registros."}, status=400
+            )
+
+        model = self.get_queryset().model
+        updating = request.method == 'PATCH'
+
+        # Dentro de la transacción todas las lecturas van al primario (core.db_routers)
+        with transaction.atomic():
+            instance_map = None
+            if updating:
+                pk_field = model._meta.pk
+                ids = set()
+                for item in items:
+                    try:
+                        ids.add(pk_field.to_python(item.get(pk_field.name)))
+                    except (AttributeError, TypeError, DjangoValidationError):
+                        pass
+                ids.discard(None)
+                instance_map = self.get_queryset().in_bulk(ids)
+
+            serializer = BulkListSerializer(
+                child=self.get_serializer(partial=updating),
+                data=items,
+                partial=updating,
+                instance_map=instance_map,
+                context=self.get_serializer_context(),
+            )
+            if not serializer.is_valid():
+                errors = [
+                    {'index': index, 'errors': detail}
+                    for index, detail in enumerate(serializer.errors) if detail
+                ]
+                return Response({
+                    "error": f"{len(errors)} de {len(items)} registros con errores; no se guardó ninguno.",
+                    "errors": errors,
+                }, status=400)
+
+            if updating:
+                objs = serializer.matched_instances
+                fields = set()
+                for obj, attrs in zip(objs, serializer.validated_data):
+                    for name, value in attrs.items():
+                        setattr(obj, name, value)
+                        fields.add(name)
+                if fields:
+                    model.objects.bulk_update(objs, sorted(fields), batch_size=self.bulk_batch_size)
+                    bulk_saved.send(sender=model, objs=objs, created=False)
+                return Response({"updated": len(objs), "ids": [obj.pk for obj in objs]})
+
+            objs = [model(**attrs) for attrs in serializer.validated_data]
+            model.objects.bulk_create(objs, batch_size=self.bulk_batch_size)
+            bulk_saved.send(sender=model, objs=objs, created=True)
+            return Response({"created": len(objs), "ids": [obj.pk for obj in objs]}, status=status.HTTP_201_CREATED)
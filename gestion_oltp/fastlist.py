@@ -0,0 +1,184 @@
+"""
+Listados de solo lectura sin instanciar el ModelSerializer por fila.
+
+En un listado grande el costo está en crear una instancia de modelo por fila y
+recorrer todos los campos del serializer. ``FastListMixin`` arma el listado con
+``values_list()`` (tuplas), convierte cada columna con un conversor elegido una
+sola vez por campo del serializer y renderiza con orjson
+(``FastJSONRenderer``). La salida es byte a byte la misma que la del
+serializer + ``JSONRenderer`` de DRF.
+
+Si algún campo no es una columna simple del modelo (``?expand=``, campos
+calculados, floats) el listado usa el camino normal del serializer.
+"""
+from operator import methodcaller
+
+import orjson
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
+from rest_framework.response import Response
+from rest_framework.settings import ISO_8601, api_settings
+
+_isoformat = methodcaller('isoformat')
+
+
+def _overrides(field, base, method='to_representation'):
+    return getattr(type(field), method) is not getattr(base, method)
+
+
+def _datetime_converter(field):
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    tz = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if output_format is None or output_format.lower() != ISO_8601 or tz is None:
+        return field.to_representation
+
+    def convert(value):
+        if value.tzinfo is None:
+            return field.to_representation(value)
+        value = value.astimezone(tz).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return convert
+
+
+def _date_converter(field):
+    output_format = getattr(field, 'format', api_settings.DATE_FORMAT)
+    if output_format is None or output_format.lower() != ISO_8601:
+        return field.to_representation
+    return _isoformat
+
+
+def _decimal_converter(field):
+    coerce_to_string = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+    places = field.decimal_places
+    if not coerce_to_string or field.localize or field.normalize_output or places is None:
+        return field.to_representation
+
+    def convert(value):
+        # La columna numeric(p, s) ya viene con la escala del campo: quantize no cambia nada
+        text = f'{value:f}'
+        if (text[-places - 1] == '.') if places else ('.' not in text):
+            return text
+        return field.to_representation(value)
+    return convert
+
+
+def _converter(field):
+    """Conversor de una columna (None = el valor de la base se usa tal cual)."""
+    if isinstance(field, serializers.PrimaryKeyRelatedField):
+        if field.pk_field is not None or _overrides(field, serializers.PrimaryKeyRelatedField):
+            return False
+        return None
+    if isinstance(field, serializers.FloatField):
+        # orjson y json no formatean igual todos los floats
+        return False
+    for base, make in (
+        (serializers.DateTimeField, _datetime_converter),
+        (serializers.DateField, _date_converter),
+        (serializers.DecimalField, _decimal_converter),
+    ):
+        if type(field) is base:
+            return make(field)
+    for base in (serializers.CharField, serializers.IntegerField, serializers.BooleanField):
+        if isinstance(field, base) and not _overrides(field, base):
+            return None
+    return field.to_representation
+
+
+def compile_columns(serializer, model):
+    """
+    [(clave, columna, conversor)] en el orden de salida del serializer, o None
+    si algún campo necesita el serializer completo.
+    """
+    plan = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if isinstance(field, serializers.BaseSerializer) or field.source == '*' or '.' in field.source:
+            return None
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            return None
+        if not model_field.concrete or model_field.many_to_many:
+            return None
+        converter = _converter(field)
+        if converter is False:
+            return None
+        plan.append((name, model_field.attname, converter))
+    return plan
+
+
+def rows_to_dicts(rows, plan):
+    keys = [key for key, _, _ in plan]
+    converters = [converter for _, _, converter in plan]
+    if not any(converters):
+        return [dict(zip(keys, row)) for row in rows]
+    return [
+        dict(zip(keys, [
+            value if value is None or convert is None else convert(value)
+            for value, convert in zip(row, converters)
+        ]))
+        for row in rows
+    ]
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer con orjson para las respuestas del listado rápido (solo
+    str/int/bool/None). Cualquier otra respuesta usa el renderer de DRF.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        renderer_context = renderer_context or {}
+        view = renderer_context.get('view')
+        if (
+            data is None or not getattr(view, 'fast_json', False)
+            or self.get_indent(accepted_media_type, renderer_context)
+            or not self.compact or self.ensure_ascii
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data)
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Igual que JSONRenderer: escapar los separadores de línea de JavaScript
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class FastListMixin:
+    """``list()`` con values_list + conversores por columna + orjson."""
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+    fast_list = settings.FAST_LIST_SERIALIZATION
+    fast_json = False
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        plan = compile_columns(self.get_serializer(), queryset.model) if self.fast_list else None
+        if plan is None:
+            return self.list_serialized(queryset)
+
+        # Las columnas del orden se piden aunque no se devuelvan: las usa el cursor
+        columns = [column for _, column, _ in plan]
+        paginator = self.paginator
+        if paginator is not None and hasattr(paginator, 'get_ordering'):
+            columns += [
+                field.attname for field, _ in paginator.get_ordering(queryset) if field.attname not in columns
+            ]
+        rows = queryset.values_list(*columns)
+
+        self.fast_json = True
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(rows_to_dicts(page, plan))
+        return Response(rows_to_dicts(rows, plan))
+
+    def list_serialized(self, queryset):
+        """Camino normal de ListModelMixin (instancias + serializer)."""
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
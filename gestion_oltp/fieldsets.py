@@ -0,0 +1,187 @@
+"""
+Respuestas parciales (``?fields=``) y expansión de relaciones (``?expand=``).
+
+- ``?fields=task_id,name,project`` devuelve solo esas columnas y el queryset
+  carga solo esas columnas (``.only()``).
+- ``?expand=project,assigned_to`` reemplaza el ID de la relación por el objeto
+  serializado. Admite niveles con punto (``?expand=task.project``) y
+  ``fields`` también (``?fields=entry_id,task.name&expand=task``).
+
+El serializer define qué relaciones se pueden expandir (``expandable_fields``)
+y ``FieldsetFilterBackend`` recorre el serializer ya recortado para aplicar
+``select_related`` / ``prefetch_related`` y ``only`` al queryset: una
+expansión nunca agrega consultas por fila.
+
+Solo aplica en lecturas (GET/HEAD/OPTIONS); en escrituras los serializers
+mantienen todos sus campos y las relaciones como IDs.
+"""
+import sys
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+
+def parse_paths(value):
+    """'a,b.c,b.d' -> {'a': {}, 'b': {'c': {}, 'd': {}}}"""
+    tree = {}
+    for path in value.split(','):
+        node = tree
+        for name in filter(None, path.strip().split('.')):
+            node = node.setdefault(name, {})
+    return tree
+
+
+def requested_fieldsets(request):
+    """(fields, expand) pedidos en la query string; fields=None significa todos."""
+    if request is None or request.method not in SAFE_METHODS:
+        return None, {}
+    fields = request.query_params.get(FIELDS_PARAM)
+    expand = request.query_params.get(EXPAND_PARAM)
+    return (parse_paths(fields) or None) if fields else None, parse_paths(expand) if expand else {}
+
+
+class FieldsetMixin:
+    """
+    Mixin de serializer: recorta los campos y expande relaciones según
+    ``fields``/``expand`` (kwargs o, en el serializer raíz, la query string).
+    """
+    # {campo: nombre del serializer (en el mismo módulo) con que se expande}
+    expandable_fields = {}
+
+    def __init__(self, *args, **kwargs):
+        explicit = 'fields' in kwargs or 'expand' in kwargs
+        fields = kwargs.pop('fields', None)
+        expand = kwargs.pop('expand', None) or {}
+        super().__init__(*args, **kwargs)
+        if not explicit:
+            fields, expand = requested_fieldsets(self.context.get('request'))
+        self.apply_fieldsets(fields, expand)
+
+    def get_expandable_serializer(self, name):
+        serializer_class = self.expandable_fields[name]
+        if isinstance(serializer_class, str):
+            serializer_class = getattr(sys.modules[type(self).__module__], serializer_class)
+        return serializer_class
+
+    def apply_fieldsets(self, fields, expand):
+        unknown = [name for name in expand if name not in self.expandable_fields]
+        if unknown:
+            raise serializers.ValidationError({
+                EXPAND_PARAM: f"No se puede expandir: {', '.join(unknown)}. "
+                              f"Opciones: {', '.join(self.expandable_fields) or 'ninguna'}."
+            })
+        if fields is not None:
+            unknown = [name for name in fields if name not in self.fields]
+            if unknown:
+                raise serializers.ValidationError({FIELDS_PARAM: f"Campos desconocidos: {', '.join(unknown)}."})
+
+        for name, nested_expand in expand.items():
+            if fields is not None and name not in fields:
+                continue
+            field = self.fields[name]
+            self.fields[name] = self.get_expandable_serializer(name)(
+                source=field.source if field.source != name else None,
+                read_only=True,
+                many=isinstance(field, serializers.ManyRelatedField),
+                fields=(fields or {}).get(name) or None,
+                expand=nested_expand,
+            )
+
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+# --- OPTIMIZACIÓN DEL QUERYSET ---
+
+def _plan(serializer, model, prefix=''):
+    """(select_related, prefetch_related, only) para los campos del serializer."""
+    select, prefetch, only = [], [], []
+    restrict = True
+    for field in serializer.fields.values():
+        nested = field.child if isinstance(field, serializers.ListSerializer) else field
+        try:
+            if field.source == '*' or '.' in field.source:
+                raise FieldDoesNotExist
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            # Propiedad, método o ruta con punto: puede leer cualquier columna
+            restrict = False
+            continue
+
+        path = prefix + field.source
+        if isinstance(nested, FieldsetMixin) and model_field.is_relation:
+            related_model = model_field.related_model
+            if model_field.many_to_many or model_field.one_to_many:
+                # Cada relación a muchos es una consulta más, con su propio plan
+                prefetch.append(Prefetch(path, queryset=optimize_queryset(
+                    related_model._default_manager.all(), nested, restrict_columns=False,
+                )))
+                continue
+            nested_select, nested_prefetch, nested_only = _plan(nested, related_model, path + '__')
+            select += [path] + nested_select
+            prefetch += nested_prefetch
+            only += nested_only if nested_only else [path]
+        elif model_field.concrete and not model_field.many_to_many:
+            only.append(path)
+        elif model_field.is_relation:
+            # Relación a muchos sin expandir (lista de IDs)
+            prefetch.append(path)
+    return select, prefetch, only if restrict else None
+
+
+def optimize_queryset(queryset, serializer, restrict_columns=True):
+    select, prefetch, only = _plan(serializer, queryset.model)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    if restrict_columns and only is not None:
+        # Las columnas del orden siempre se cargan: la paginación por cursor las lee
+        ordering = [
+            o.lstrip('-') for o in queryset.query.order_by or queryset.model._meta.ordering if isinstance(o, str)
+        ]
+        queryset = queryset.only(*dict.fromkeys(only + ordering))
+    return queryset
+
+
+class FieldsetFilterBackend(BaseFilterBackend):
+    """Aplica ``select_related``/``prefetch_related``/``only`` según ``fields`` y ``expand``."""
+
+    def filter_queryset(self, request, queryset, view):
+        serializer_class = view.get_serializer_class() if hasattr(view, 'get_serializer_class') else None
+        if serializer_class is None or not issubclass(serializer_class, FieldsetMixin):
+            return queryset
+        fields, expand = requested_fieldsets(request)
+        if fields is None and not expand:
+            return queryset
+        return optimize_queryset(queryset, view.get_serializer())
+
+    def get_schema_operation_parameters(self, view):
+        serializer_class = view.get_serializer_class()
+        if not issubclass(serializer_class, FieldsetMixin):
+            return []
+        parameters = [{
+            'name': FIELDS_PARAM,
+            'required': False,
+            'in': 'query',
+            'description': 'Campos a devolver, separados por comas (por defecto todos). '
+                           'Con punto para campos de relaciones expandidas: task.name',
+            'schema': {'type': 'string'},
+        }]
+        if serializer_class.expandable_fields:
+            parameters.append({
+                'name': EXPAND_PARAM,
+                'required': False,
+                'in': 'query',
+                'description': 'Relaciones a incluir como objeto en lugar de ID: '
+                               + ', '.join(serializer_class.expandable_fields),
+                'schema': {'type': 'string'},
+            })
+        return parameters
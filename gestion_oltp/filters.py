@@ -0,0 +1,62 @@
+"""
+Filtros de los endpoints de gestión (django-filter).
+
+Cada filtro tiene un índice compuesto en ``project_mgmt`` que termina en el
+orden del viewset y su PK (ver ``manage.py gestion_indexes``), de modo que
+filtro + paginación por cursor se resuelven con un recorrido de índice.
+"""
+import django_filters
+
+from .models import Defect, Risk, Task, TimeEntry
+
+
+class CharInFilter(django_filters.BaseInFilter, django_filters.CharFilter):
+    """Acepta varios valores separados por comas: ?status=Open,Mitigated"""
+
+
+class TimeEntryFilter(django_filters.FilterSet):
+    project = django_filters.NumberFilter(field_name='task__project_id', help_text='ID del proyecto de la tarea.')
+    entry_timestamp = django_filters.IsoDateTimeFromToRangeFilter(
+        help_text='Rango de fechas: entry_timestamp_after / entry_timestamp_before (ISO 8601).'
+    )
+
+    class Meta:
+        model = TimeEntry
+        fields = ['project', 'task', 'employee', 'entry_timestamp']
+
+
+class DefectFilter(django_filters.FilterSet):
+    status = CharInFilter(help_text='Uno o varios estados separados por comas.')
+    severity = CharInFilter(help_text='Una o varias severidades separadas por comas.')
+    detected_date = django_filters.DateFromToRangeFilter(
+        help_text='Rango de fechas: detected_date_after / detected_date_before.'
+    )
+
+    class Meta:
+        model = Defect
+        fields = ['project', 'task', 'status', 'severity', 'detected_date']
+
+
+class RiskFilter(django_filters.FilterSet):
+    status = CharInFilter(help_text='Uno o varios estados separados por comas.')
+    detected_date = django_filters.DateFromToRangeFilter(
+        help_text='Rango de fechas: detected_date_after / detected_date_before.'
+    )
+
+    class Meta:
+        model = Risk
+        fields = ['project', 'status', 'detected_date']
+
+
+class TaskFilter(django_filters.FilterSet):
+    employee = django_filters.NumberFilter(field_name='assigned_to_id', help_text='ID del empleado asignado.')
+    planned_start = django_filters.DateFromToRangeFilter(
+        help_text='Rango de fechas: planned_start_after / planned_start_before.'
+    )
+    planned_end = django_filters.DateFromToRangeFilter(
+        help_text='Rango de fechas: planned_end_after / planned_end_before.'
+    )
+
+    class Meta:
+        model = Task
+        fields = ['project', 'employee', 'planned_start', 'planned_end']
@@ -0,0 +1,224 @@
+import json
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from rest_framework.settings import api_settings
+
+from gestion_oltp.views import (
+    ClientViewSet, DefectViewSet, EmployeeViewSet, ProjectViewSet,
+    ResourceViewSet, RiskViewSet, TaskViewSet, TimeEntryViewSet,
+)
+
+SCHEMA = 'project_mgmt'
+
+# --- ÍNDICES ---
+# (tabla, nombre, columnas). Cada índice empieza por la columna del filtro y
+# termina en el orden del viewset + PK, para que filtro y paginación por cursor
+# (gestion_oltp/pagination.py) se resuelvan leyendo el índice sin ordenar.
+INDEXES = [
+    # Registros de tiempo: orden -entry_timestamp, -entry_id
+    ('time_entry', 'time_entry_task_ts_idx', '(task_id, entry_timestamp DESC, entry_id DESC)'),
+    ('time_entry', 'time_entry_employee_ts_idx', '(employee_id, entry_timestamp DESC, entry_id DESC)'),
+    ('time_entry', 'time_entry_ts_idx', '(entry_timestamp DESC, entry_id DESC)'),
+    # Tareas: orden task_id
+    ('task', 'task_project_idx', '(project_id, task_id)'),
+    ('task', 'task_assigned_to_idx', '(assigned_to, task_id)'),
+    ('task', 'task_planned_start_idx', '(planned_start, task_id)'),
+    ('task', 'task_planned_end_idx', '(planned_end, task_id)'),
+    # Defectos: orden -detected_date, -defect_id
+    ('defect', 'defect_project_date_idx', '(project_id, detected_date DESC, defect_id DESC)'),
+    ('defect', 'defect_task_date_idx', '(task_id, detected_date DESC, defect_id DESC)'),
+    ('defect', 'defect_status_date_idx', '(status, detected_date DESC, defect_id DESC)'),
+    ('defect', 'defect_severity_date_idx', '(severity, detected_date DESC, defect_id DESC)'),
+    ('defect', 'defect_date_idx', '(detected_date DESC, defect_id DESC)'),
+    # Riesgos: orden risk_id
+    ('risk', 'risk_project_idx', '(project_id, risk_id)'),
+    ('risk', 'risk_status_idx', '(status, risk_id)'),
+    ('risk', 'risk_detected_date_idx', '(detected_date, risk_id)'),
+    # Listados sin filtros: solo el orden de la paginación
+    ('client', 'client_name_idx', '(name, client_id)'),
+    ('employee', 'employee_name_idx', '(name, employee_id)'),
+    ('project', 'project_start_date_idx', '(start_date DESC, project_id DESC)'),
+    ('resource', 'resource_name_idx', '(name, resource_id)'),
+]
+
+# --- COMPROBACIONES ---
+# (viewset, {parámetro: columna de la fila de muestra}, índices aceptados).
+# Los parámetros *_after toman el valor de la muestra menos RANGE_WINDOW.
+RANGE_WINDOW = timedelta(days=30)
+CHECKS = [
+    (TimeEntryViewSet, {}, ['time_entry_ts_idx']),
+    (TimeEntryViewSet, {'task': 'task_id'}, ['time_entry_task_ts_idx']),
+    (TimeEntryViewSet, {'employee': 'employee_id'}, ['time_entry_employee_ts_idx']),
+    (TimeEntryViewSet, {'project': 'task__project_id'}, ['time_entry_task_ts_idx', 'time_entry_ts_idx']),
+    (TimeEntryViewSet, {'entry_timestamp_after': 'entry_timestamp', 'entry_timestamp_before': 'entry_timestamp'},
+     ['time_entry_ts_idx']),
+    (TaskViewSet, {'project': 'project_id'}, ['task_project_idx']),
+    (TaskViewSet, {'employee': 'assigned_to'}, ['task_assigned_to_idx']),
+    (TaskViewSet, {'planned_start_after': 'planned_start', 'planned_start_before': 'planned_start'},
+     ['task_planned_start_idx']),
+    (TaskViewSet, {'planned_end_after': 'planned_end', 'planned_end_before': 'planned_end'},
+     ['task_planned_end_idx']),
+    (DefectViewSet, {}, ['defect_date_idx']),
+    (DefectViewSet, {'project': 'project_id'}, ['defect_project_date_idx']),
+    (DefectViewSet, {'task': 'task_id'}, ['defect_task_date_idx']),
+    (DefectViewSet, {'status': 'status'}, ['defect_status_date_idx']),
+    (DefectViewSet, {'severity': 'severity'}, ['defect_severity_date_idx']),
+    (DefectViewSet, {'detected_date_after': 'detected_date', 'detected_date_before': 'detected_date'},
+     ['defect_date_idx']),
+    (RiskViewSet, {'project': 'project_id'}, ['risk_project_idx']),
+    (RiskViewSet, {'status': 'status'}, ['risk_status_idx']),
+    (RiskViewSet, {'detected_date_after': 'detected_date', 'detected_date_before': 'detected_date'},
+     ['risk_detected_date_idx']),
+    (ClientViewSet, {}, ['client_name_idx']),
+    (EmployeeViewSet, {}, ['employee_name_idx']),
+    (ProjectViewSet, {}, ['project_start_date_idx']),
+    (ResourceViewSet, {}, ['resource_name_idx']),
+]
+
+INVALID_INDEXES_SQL = """
+    SELECT c.relname FROM pg_index i
+    JOIN pg_class c ON c.oid = i.indexrelid
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE n.nspname = %s AND NOT i.indisvalid AND c.relname = ANY(%s)
+"""
+
+
+def _plan_nodes(node):
+    yield node
+    for child in node.get('Plans', []):
+        yield from _plan_nodes(child)
+
+
+def explain_nodes(connection, queryset):
+    """Nodos del plan de ``queryset`` (EXPLAIN sin ejecutar, planificador normal)."""
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return list(_plan_nodes(plan[0]['Plan']))
+
+
+def page_query(viewset, params, using='default', with_cursor=True, where=None):
+    """
+    Página del listado filtrado tal como la arma el viewset: la segunda
+    (cursor en una fila de muestra) o, con ``with_cursor=False``, la primera.
+    ``where`` restringe la fila de muestra (p. ej. un estado poco frecuente).
+    Devuelve (queryset, error).
+    """
+    view = viewset()
+    queryset = view.get_queryset().using(using)
+    paginator = api_settings.DEFAULT_PAGINATION_CLASS()
+    ordering = paginator.get_ordering(queryset)
+
+    # Fila de muestra con valores no nulos para las columnas del filtro
+    columns = list(dict.fromkeys(list(params.values()) + [field.attname for field, _ in ordering]))
+    sample_query = queryset.order_by().filter(**(where or {}))
+    for column in params.values():
+        sample_query = sample_query.exclude(**{f'{column}__isnull': True})
+    sample = sample_query.values(*columns).first()
+    if sample is None:
+        return None, 'no hay datos de muestra'
+
+    data = {}
+    for name, column in params.items():
+        value = sample[column]
+        if name.endswith('_after'):
+            value -= RANGE_WINDOW
+        data[name] = value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+    filterset = viewset.filterset_class(data=data, queryset=queryset) if params else None
+    if filterset is not None:
+        if not filterset.is_valid():
+            return None, f'filtro inválido {dict(filterset.errors)}'
+        queryset = filterset.qs
+
+    cursor_values = [sample[field.attname] for field, _ in ordering] if with_cursor else None
+    return paginator.page_queryset(queryset, ordering, cursor_values, paginator.page_size), None
+
+
+class Command(BaseCommand):
+    help = (
+        'Crea (CONCURRENTLY) los índices compuestos que usan los filtros y la paginación '
+        'de los endpoints de gestión, y comprueba con EXPLAIN que cada filtro usa su índice'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='No crear nada: comprobar con EXPLAIN que cada filtro usa un índice con los datos actuales.')
+        parser.add_argument('--drop', action='store_true', help='Eliminar los índices en lugar de crearlos.')
+        parser.add_argument('--sql', action='store_true', help='Solo mostrar el DDL, sin ejecutarlo.')
+
+    def handle(self, *args, **options):
+        connection = connections['default']
+        if connection.vendor != 'postgresql':
+            raise CommandError('Este comando requiere PostgreSQL.')
+        if options['check']:
+            return self.check_plans(connection)
+
+        statements = []
+        if options['drop']:
+            statements = [f'DROP INDEX CONCURRENTLY IF EXISTS {SCHEMA}.{name}' for _, name, _ in INDEXES]
+        else:
+            with connection.cursor() as cursor:
+                # Un CREATE INDEX CONCURRENTLY fallido deja el índice inválido y IF NOT EXISTS lo saltaría
+                cursor.execute(INVALID_INDEXES_SQL, [SCHEMA, [name for _, name, _ in INDEXES]])
+                statements += [f'DROP INDEX CONCURRENTLY {SCHEMA}.{name}' for (name,) in cursor.fetchall()]
+            statements += [
+                f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {SCHEMA}.{table} {columns}'
+                for table, name, columns in INDEXES
+            ]
+            statements += [f'ANALYZE {SCHEMA}.{table}' for table in dict.fromkeys(t for t, _, _ in INDEXES)]
+
+        if options['sql']:
+            for sql in statements:
+                self.stdout.write(sql + ';')
+            return
+
+        # CONCURRENTLY no puede correr dentro de una transacción: cada sentencia en autocommit
+        with connection.cursor() as cursor:
+            for sql in statements:
+                self.stdout.write(f'   > {sql}')
+                cursor.execute(sql)
+        self.stdout.write(self.style.SUCCESS(
+            f"¡Listo! {len(INDEXES)} índices {'eliminados' if options['drop'] else 'creados o ya existentes'}."
+        ))
+
+    # --- EXPLAIN ---
+
+    def check_plans(self, connection):
+        """
+        Plan real de cada filtro sobre los datos actuales (sin forzar índices):
+        con tablas pequeñas un Seq Scan es legítimo. Las pruebas de
+        gestion_oltp/tests.py comprueban los índices con datos representativos.
+        """
+        failures = 0
+        for viewset, params, expected in CHECKS:
+            label = f"{viewset.__name__} {'&'.join(params) or '(sin filtros)'}"
+            queryset, error = page_query(viewset, params)
+            if error:
+                failures += 1
+                self.stdout.write(self.style.ERROR(f'FAIL {label}: {error}'))
+                continue
+
+            nodes = explain_nodes(connection, queryset)
+            seq_scans = [n['Relation Name'] for n in nodes if n['Node Type'] == 'Seq Scan']
+            used = [n['Index Name'] for n in nodes if 'Index Name' in n]
+            if seq_scans or not set(used) & set(expected):
+                failures += 1
+                self.stdout.write(self.style.ERROR(
+                    f"FAIL {label}: índices {used or '-'}, Seq Scan en {seq_scans or '-'} "
+                    f"(se esperaba {' o '.join(expected)})"
+                ))
+            else:
+                self.stdout.write(f"ok   {label}: {', '.join(used)}")
+
+        if failures:
+            raise CommandError(
+                f'{failures} de {len(CHECKS)} consultas no usan su índice. '
+                '¿Falta ejecutar gestion_indexes o las tablas son todavía pequeñas?'
+            )
+        self.stdout.write(self.style.SUCCESS(f'¡Todo en orden! {len(CHECKS)} consultas usan índices.'))
@@ -0,0 +1,273 @@
+import csv
+import io
+import json
+import sys
+import time
+from datetime import date, datetime, time as dt_time
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.utils import timezone
+
+from gestion_oltp.models import Employee, Task
+from gestion_oltp.tree import invalidate_tasks
+
+# Columnas del archivo (las mismas del API de registros de tiempo; activity_type
+# es opcional). 'employee' y 'task' se admiten como alias de employee_id y task_id.
+REQUIRED_COLUMNS = ['employee_id', 'task_id', 'entry_timestamp', 'hours_worked']
+ALIASES = {'employee': 'employee_id', 'task': 'task_id'}
+MAX_HOURS = Decimal('24')
+ACTIVITY_MAX_LENGTH = 50
+
+STAGING_DDL = """
+    CREATE TEMP TABLE IF NOT EXISTS time_entry_staging (
+        line_number bigint NOT NULL,
+        employee_id integer NOT NULL,
+        task_id integer NOT NULL,
+        entry_timestamp timestamptz NOT NULL,
+        hours_worked numeric(5, 2) NOT NULL,
+        activity_type varchar(50)
+    ) ON COMMIT DELETE ROWS
+"""
+
+# Antes de insertar se vuelven a comprobar las claves foráneas contra las tablas
+# reales (por si un empleado o tarea se borró durante la importación); las filas
+# que no pasan se sacan del staging y se reportan.
+STAGING_CHECKS = [
+    ("""
+        DELETE FROM time_entry_staging s
+        WHERE NOT EXISTS (SELECT 1 FROM project_mgmt.employee e WHERE e.employee_id = s.employee_id)
+        RETURNING s.line_number
+    """, 'employee_id no existe'),
+    ("""
+        DELETE FROM time_entry_staging s
+        WHERE NOT EXISTS (SELECT 1 FROM project_mgmt.task t WHERE t.task_id = s.task_id)
+        RETURNING s.line_number
+    """, 'task_id no existe'),
+]
+
+SKIP_EXISTING_SQL = """
+    DELETE FROM time_entry_staging s
+    WHERE EXISTS (
+        SELECT 1 FROM project_mgmt.time_entry te
+        WHERE te.employee_id = s.employee_id AND te.task_id = s.task_id
+          AND te.entry_timestamp = s.entry_timestamp
+    )
+"""
+
+INSERT_SQL = """
+    INSERT INTO project_mgmt.time_entry (employee_id, task_id, entry_timestamp, hours_worked, activity_type)
+    SELECT employee_id, task_id, entry_timestamp, hours_worked, activity_type
+    FROM time_entry_staging
+    ORDER BY line_number
+"""
+
+
+class RowError(ValueError):
+    pass
+
+
+def _copy_text(value):
+    """Valor en formato de texto de COPY (\\N = NULL)."""
+    if value is None:
+        return '\\N'
+    return (
+        str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Importa registros de tiempo históricos desde un CSV o NDJSON de cualquier tamaño '
+        '(lectura en streaming, COPY a una tabla de staging y archivo de rechazos)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Archivo CSV o NDJSON ('-' para leer de la entrada estándar).")
+        parser.add_argument('--format', choices=['csv', 'ndjson'], help='Por defecto se deduce de la extensión.')
+        parser.add_argument('--delimiter', default=',', help='Separador del CSV.')
+        parser.add_argument('--batch-size', type=int, default=50_000, help='Filas por lote (COPY + INSERT).')
+        parser.add_argument('--rejects', help='Archivo NDJSON de filas rechazadas (por defecto <path>.rejects.ndjson).')
+        parser.add_argument('--skip', type=int, default=0, help='Filas de datos a saltar (para reanudar una importación).')
+        parser.add_argument('--skip-existing', action='store_true',
+                            help='No insertar registros idénticos (empleado, tarea, fecha) ya existentes.')
+        parser.add_argument('--dry-run', action='store_true', help='Solo validar, sin escribir en la base.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv')
+        batch_size = options['batch_size']
+        if batch_size <= 0:
+            raise CommandError('--batch-size debe ser mayor que cero.')
+        rejects_path = options['rejects'] or ('rejects.ndjson' if path == '-' else f'{path}.rejects.ndjson')
+
+        # Conjuntos de IDs válidos en memoria (proporcionales a empleados y tareas, no al archivo)
+        self.employee_ids = set(Employee.objects.using('default').values_list('pk', flat=True))
+        self.task_ids = set(Task.objects.using('default').values_list('pk', flat=True))
+        self.stdout.write(
+            f"Validando contra {len(self.employee_ids)} empleados y {len(self.task_ids)} tareas."
+        )
+
+        self.default_timezone = timezone.get_default_timezone()
+        self.totals = {'read': 0, 'loaded': 0, 'rejected': 0, 'skipped': 0}
+        self.start_time = time.monotonic()
+        source = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8-sig')
+        try:
+            with source, open(rejects_path, 'w', encoding='utf-8') as rejects:
+                self.rejects = rejects
+                rows = self.read_rows(source, fmt, options['delimiter'])
+                batch = []
+                for line_number, raw in rows:
+                    if self.totals['read'] < options['skip']:
+                        self.totals['read'] += 1
+                        continue
+                    self.totals['read'] += 1
+                    try:
+                        batch.append((line_number, raw, self.validate(raw)))
+                    except RowError as e:
+                        self.reject(line_number, raw, str(e))
+                    if len(batch) >= batch_size:
+                        self.load_batch(batch, options)
+                        batch = []
+                if batch:
+                    self.load_batch(batch, options)
+        except FileNotFoundError as e:
+            raise CommandError(f'No se encontró el archivo: {e.filename}')
+
+        elapsed = time.monotonic() - self.start_time
+        self.stdout.write(self.style.SUCCESS(
+            f"¡Importación terminada! {self.totals['loaded']} registros cargados, "
+            f"{self.totals['rejected']} rechazados y {self.totals['skipped']} ya existentes "
+            f"de {self.totals['read']} leídos "
+            f"en {elapsed:.1f} s ({self.totals['read'] / elapsed if elapsed else 0:,.0f} filas/s)."
+        ))
+        if self.totals['rejected']:
+            self.stdout.write(self.style.WARNING(f"Filas rechazadas en {rejects_path}"))
+
+    # --- LECTURA Y VALIDACIÓN ---
+
+    def read_rows(self, source, fmt, delimiter):
+        """Genera (número de línea, dict) sin cargar el archivo en memoria."""
+        if fmt == 'csv':
+            reader = csv.DictReader(source, delimiter=delimiter)
+            columns = {ALIASES.get(name, name) for name in reader.fieldnames or []}
+            missing = [name for name in REQUIRED_COLUMNS if name not in columns]
+            if missing:
+                raise CommandError(f"Faltan columnas en el CSV: {', '.join(missing)}")
+            for raw in reader:
+                yield reader.line_num, raw
+        else:
+            for line_number, line in enumerate(source, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    raw = json.loads(line)
+                except ValueError:
+                    raw = {'_raw': line.rstrip('\n')}
+                yield line_number, raw
+
+    def validate(self, raw):
+        if not isinstance(raw, dict) or '_raw' in raw:
+            raise RowError('línea JSON inválida')
+        row = {ALIASES.get(key, key): value for key, value in raw.items()}
+
+        try:
+            employee_id = int(row.get('employee_id'))
+            task_id = int(row.get('task_id'))
+        except (TypeError, ValueError):
+            raise RowError('employee_id y task_id deben ser enteros')
+        if employee_id not in self.employee_ids:
+            raise RowError('employee_id no existe')
+        if task_id not in self.task_ids:
+            raise RowError('task_id no existe')
+
+        timestamp = self.parse_timestamp(row.get('entry_timestamp'))
+
+        try:
+            hours = Decimal(str(row.get('hours_worked')))
+            # NaN pasa por quantize pero no se puede comparar
+            if not hours.is_finite():
+                raise InvalidOperation
+            hours = hours.quantize(Decimal('0.01'))
+        except (InvalidOperation, ValueError):
+            raise RowError('hours_worked no es un número')
+        if not Decimal('0') < hours <= MAX_HOURS:
+            raise RowError('hours_worked fuera de rango (0, 24]')
+
+        activity = row.get('activity_type')
+        if activity in (None, ''):
+            activity = None
+        elif not isinstance(activity, str):
+            raise RowError('activity_type debe ser texto')
+        elif len(activity) > ACTIVITY_MAX_LENGTH:
+            raise RowError(f'activity_type supera {ACTIVITY_MAX_LENGTH} caracteres')
+
+        return employee_id, task_id, timestamp, hours, activity
+
+    def parse_timestamp(self, value):
+        if not value:
+            raise RowError('entry_timestamp vacío')
+        try:
+            parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        except ValueError:
+            raise RowError('entry_timestamp no es una fecha ISO 8601')
+        if isinstance(parsed, date) and not isinstance(parsed, datetime):
+            parsed = datetime.combine(parsed, dt_time())
+        if parsed.tzinfo is None:
+            parsed = timezone.make_aware(parsed, self.default_timezone)
+        return parsed
+
+    def reject(self, line_number, raw, reason):
+        self.totals['rejected'] += 1
+        self.rejects.write(json.dumps({'line': line_number, 'error': reason, 'row': raw}, ensure_ascii=False, default=str))
+        self.rejects.write('\n')
+
+    # --- CARGA ---
+
+    def load_batch(self, batch, options):
+        if options['dry_run']:
+            self.totals['loaded'] += len(batch)
+            self.report()
+            return
+
+        buffer = io.StringIO()
+        for line_number, _, (employee_id, task_id, timestamp, hours, activity) in batch:
+            # Solo activity_type es texto libre: el resto no necesita escaparse
+            buffer.write(
+                f"{line_number}\t{employee_id}\t{task_id}\t{timestamp.isoformat()}\t{hours}\t{_copy_text(activity)}\n"
+            )
+        buffer.seek(0)
+
+        raw_by_line = {line_number: raw for line_number, raw, _ in batch}
+        with transaction.atomic(using='default'), connections['default'].cursor() as cursor:
+            cursor.execute(STAGING_DDL)
+            # ON COMMIT no vacía el staging si el comando corre dentro de otra transacción
+            cursor.execute('TRUNCATE time_entry_staging')
+            cursor.copy_expert(
+                'COPY time_entry_staging (line_number, employee_id, task_id, entry_timestamp, '
+                'hours_worked, activity_type) FROM STDIN',
+                buffer,
+            )
+            for sql, reason in STAGING_CHECKS:
+                cursor.execute(sql)
+                for (line_number,) in cursor.fetchall():
+                    self.reject(line_number, raw_by_line[line_number], reason)
+            if options['skip_existing']:
+                cursor.execute(SKIP_EXISTING_SQL)
+                self.totals['skipped'] += cursor.rowcount
+            cursor.execute(INSERT_SQL)
+            inserted = cursor.rowcount
+            # El COPY no pasa por el ORM: invalidar a mano los árboles de tareas afectados
+            invalidate_tasks({task_id for _, _, (_, task_id, _, _, _) in batch})
+
+        self.totals['loaded'] += inserted
+        self.report()
+
+    def report(self):
+        elapsed = time.monotonic() - self.start_time
+        rate = self.totals['read'] / elapsed if elapsed else 0
+        self.stdout.write(
+            f"   > {self.totals['read']:,} leídas | {self.totals['loaded']:,} cargadas | "
+            f"{self.totals['rejected']:,} rechazadas | {rate:,.0f} filas/s"
+        )
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-19 09:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_oltp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DroppedConstraint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('foreign_key', 'Clave foránea'), ('index', 'Índice')], max_length=20)),
+                ('table', models.CharField(max_length=200)),
+                ('name', models.CharField(max_length=200)),
+                ('definition', models.TextField()),
+            ],
+            options={
+                'db_table': 'synthetic_dropped_constraint',
+                'constraints': [models.UniqueConstraint(fields=('kind', 'name'), name='synthetic_dropped_constraint_uniq')],
+            },
+        ),
+    ]
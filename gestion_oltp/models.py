@@ -121,3 +121,24 @@ class TimeEntry(models.Model):
         managed = False
         db_table = 'project_mgmt"."time_entry'
 
+
+# --- CARGA DE DATOS SINTÉTICOS ---
+
+class DroppedConstraint(models.Model):
+    """
+    Clave foránea o índice de project_mgmt que quitó una carga de datos
+    sintéticos (gestion_oltp/synthetic.py) y que todavía no se restauró. Se
+    guarda en la misma transacción que lo quita: si la carga muere, la
+    siguiente lo restaura.
+    """
+    FOREIGN_KEY = 'foreign_key'
+    INDEX = 'index'
+
+    kind = models.CharField(max_length=20, choices=[(FOREIGN_KEY, 'Clave foránea'), (INDEX, 'Índice')])
+    table = models.CharField(max_length=200)
+    name = models.CharField(max_length=200)
+    definition = models.TextField()
+
+    class Meta:
+        db_table = 'synthetic_dropped_constraint'
+        constraints = [models.UniqueConstraint(fields=['kind', 'name'], name='synthetic_dropped_constraint_uniq')]
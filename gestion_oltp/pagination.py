@@ -0,0 +1,238 @@
+"""
+Paginación por cursor (keyset) para los endpoints de gestión.
+
+El cursor guarda los valores del último registro de la página para cada campo
+del orden del viewset, más la PK como desempate. La página siguiente se pide
+con ``WHERE (orden) > (cursor) ... LIMIT n``: con un índice sobre esas columnas
+una página profunda cuesta lo mismo que la primera (no hay OFFSET).
+
+Los NULL se tratan como el valor más grande, igual que PostgreSQL por defecto
+(``ASC NULLS LAST`` / ``DESC NULLS FIRST``), de modo que el orden coincide con
+los índices normales.
+"""
+import base64
+import binascii
+import json
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured, ValidationError
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+_NOTHING = Q(pk__in=[])
+
+
+def _encode_value(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+class KeysetPagination(BasePagination):
+    page_size = api_settings.PAGE_SIZE or 50
+    page_size_query_param = 'page_size'
+    max_page_size = settings.PAGINATION_MAX_PAGE_SIZE
+    cursor_query_param = 'cursor'
+    # Por debajo de esta estimación del planificador se hace COUNT(*) exacto
+    exact_count_threshold = settings.PAGINATION_EXACT_COUNT_THRESHOLD
+    invalid_cursor_message = 'Cursor inválido.'
+
+    # --- ORDEN ---
+
+    def get_ordering(self, queryset):
+        """[(campo, descendente)] del orden del queryset, terminado en la PK."""
+        model = queryset.model
+        pk_name = model._meta.pk.name
+        ordering = list(queryset.query.order_by) or list(model._meta.ordering)
+        names = [o.lstrip('-') for o in ordering]
+        if pk_name not in names and 'pk' not in names:
+            descending = ordering[-1].startswith('-') if ordering else False
+            ordering.append(('-' if descending else '') + pk_name)
+
+        result = []
+        for item in ordering:
+            if not isinstance(item, str):
+                raise ImproperlyConfigured(f'{type(self).__name__} solo admite ordenar por nombres de campo.')
+            name = item.lstrip('-')
+            try:
+                field = model._meta.get_field(pk_name if name == 'pk' else name)
+            except FieldDoesNotExist:
+                raise ImproperlyConfigured(
+                    f"{type(self).__name__}: '{name}' no es un campo de {model.__name__}."
+                )
+            result.append((field, item.startswith('-')))
+        return result
+
+    # --- CURSOR ---
+
+    def encode_cursor(self, values):
+        raw = json.dumps([_encode_value(v) for v in values], separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request, ordering):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4))
+            values = json.loads(raw)
+            if not isinstance(values, list) or len(values) != len(ordering):
+                raise ValueError
+            return [
+                None if value is None else field.to_python(value)
+                for (field, _), value in zip(ordering, values)
+            ]
+        except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    # --- CONDICIÓN KEYSET ---
+
+    def _beyond(self, field, descending, value):
+        """Filas estrictamente posteriores a ``value`` en una columna."""
+        name = field.attname
+        if value is None:
+            # NULL es el mayor: en ASC no hay nada después; en DESC, todos los no nulos
+            return _NOTHING if not descending else Q(**{f'{name}__isnull': False})
+        if descending:
+            return Q(**{f'{name}__lt': value})
+        after = Q(**{f'{name}__gt': value})
+        return after | Q(**{f'{name}__isnull': True}) if field.null else after
+
+    def _bound(self, field, descending, value):
+        """Cota indexable sobre la primera columna (el índice arranca en el cursor)."""
+        name = field.attname
+        if value is None:
+            return Q() if descending else Q(**{f'{name}__isnull': True})
+        if descending:
+            return Q(**{f'{name}__lte': value})
+        bound = Q(**{f'{name}__gte': value})
+        return bound | Q(**{f'{name}__isnull': True}) if field.null else bound
+
+    def keyset_filter(self, ordering, values):
+        condition = _NOTHING
+        prefix = Q()
+        for (field, descending), value in zip(ordering, values):
+            condition |= prefix & self._beyond(field, descending, value)
+            if value is None:
+                prefix &= Q(**{f'{field.attname}__isnull': True})
+            else:
+                prefix &= Q(**{field.attname: value})
+        return self._bound(*ordering[0], values[0]) & condition
+
+    # --- CONTEO ---
+
+    def get_count(self, queryset):
+        """(conteo, es_estimado): estadísticas del planificador en tablas grandes."""
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return queryset.count(), False
+        sql, params = queryset.order_by().query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        estimate = int(plan[0]['Plan']['Plan Rows'])
+        if estimate < self.exact_count_threshold:
+            return queryset.count(), False
+        return estimate, True
+
+    # --- PAGINACIÓN ---
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+            if size > 0:
+                return min(size, self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+        return self.page_size
+
+    def page_queryset(self, queryset, ordering, values, page_size):
+        """Consulta de una página (más una fila para saber si hay siguiente)."""
+        page_queryset = queryset.order_by(*[
+            ('-' if descending else '') + field.attname for field, descending in ordering
+        ])
+        if values is not None:
+            page_queryset = page_queryset.filter(self.keyset_filter(ordering, values))
+        return page_queryset[:page_size + 1]
+
+    def row_values(self, queryset, row, ordering):
+        """Valores del orden de una fila: instancia de modelo o tupla de values_list()."""
+        if isinstance(row, tuple):
+            columns = list(queryset.query.values_select)
+            return [row[columns.index(field.attname)] for field, _ in ordering]
+        return [getattr(row, field.attname) for field, _ in ordering]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        ordering = self.get_ordering(queryset)
+        values = self.decode_cursor(request, ordering)
+
+        rows = list(self.page_queryset(queryset, ordering, values, page_size))
+        self.has_next = len(rows) > page_size
+        rows = rows[:page_size]
+        self.next_values = self.row_values(queryset, rows[-1], ordering) if self.has_next else None
+
+        if values is None and not self.has_next:
+            # Todo cabe en la primera página: no hace falta contar
+            self.count, self.count_is_estimate = len(rows), False
+        else:
+            self.count, self.count_is_estimate = self.get_count(queryset)
+        return rows
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_values))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.count,
+            'count_is_estimate': self.count_is_estimate,
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['count', 'count_is_estimate', 'results'],
+            'properties': {
+                'count': {'type': 'integer', 'example': 123},
+                'count_is_estimate': {
+                    'type': 'boolean',
+                    'description': 'true si el conteo viene de las estadísticas del planificador.',
+                },
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Cursor opaco de la página siguiente (campo "next" de la respuesta).',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': f'Registros por página (máximo {self.max_page_size}).',
+                'schema': {'type': 'integer'},
+            },
+        ]
@@ -1,9 +1,16 @@
 from rest_framework import serializers
 from .models import Client, Project, Employee, Task, TimeEntry, Risk, Defect, Resource
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from core.authentication import revocations
+from .bulk import BulkPrimaryKeyRelatedField
+from .fieldsets import FieldsetMixin
 
 
-class ProjectSerializer(serializers.ModelSerializer):
+class ProjectSerializer(FieldsetMixin, serializers.ModelSerializer):
+    # Relaciones que se pueden pedir como objeto con ?expand=
+    expandable_fields = {'client': 'ClientSerializer'}
     budget = serializers.DecimalField(
         max_digits=12,
         decimal_places=2,
@@ -18,7 +25,9 @@ class ProjectSerializer(serializers.ModelSerializer):
         model = Project
         fields = '__all__'
 
-class RiskSerializer(serializers.ModelSerializer):
+class RiskSerializer(FieldsetMixin, serializers.ModelSerializer):
+    # Relaciones que se pueden pedir como objeto con ?expand=
+    expandable_fields = {'project': 'ProjectSerializer'}
     probability = serializers.DecimalField(
         max_digits=3,
         decimal_places=2,
@@ -33,36 +42,98 @@ class RiskSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class ClientSerializer(serializers.ModelSerializer):
+class ClientSerializer(FieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Client
         fields = '__all__'
 
-class EmployeeSerializer(serializers.ModelSerializer):
+class EmployeeSerializer(FieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Employee
         fields = '__all__'
 
-class TaskSerializer(serializers.ModelSerializer):
+class TaskSerializer(FieldsetMixin, serializers.ModelSerializer):
+    # Relaciones que se pueden pedir como objeto con ?expand=
+    expandable_fields = {
+        'project': 'ProjectSerializer', 'assigned_to': 'EmployeeSerializer', 'parent_task': 'TaskSerializer',
+    }
+    # Claves foráneas validadas por conjuntos en la carga masiva (bulk/)
+    serializer_related_field = BulkPrimaryKeyRelatedField
+
     class Meta:
         model = Task
         fields = '__all__'
 
-class TimeEntrySerializer(serializers.ModelSerializer):
+class TimeEntrySerializer(FieldsetMixin, serializers.ModelSerializer):
+    # Relaciones que se pueden pedir como objeto con ?expand=
+    expandable_fields = {'employee': 'EmployeeSerializer', 'task': 'TaskSerializer'}
+    # Claves foráneas validadas por conjuntos en la carga masiva (bulk/)
+    serializer_related_field = BulkPrimaryKeyRelatedField
+
     class Meta:
         model = TimeEntry
         fields = '__all__'
 
-class DefectSerializer(serializers.ModelSerializer):
+class DefectSerializer(FieldsetMixin, serializers.ModelSerializer):
+    # Relaciones que se pueden pedir como objeto con ?expand=
+    expandable_fields = {
+        'project': 'ProjectSerializer', 'task': 'TaskSerializer',
+        'detected_by': 'EmployeeSerializer', 'resolved_by': 'EmployeeSerializer',
+    }
+    # Claves foráneas validadas por conjuntos en la carga masiva (bulk/)
+    serializer_related_field = BulkPrimaryKeyRelatedField
+
     class Meta:
         model = Defect
         fields = '__all__'
 
-class ResourceSerializer(serializers.ModelSerializer):
+class ResourceSerializer(FieldsetMixin, serializers.ModelSerializer):
+    # Relaciones que se pueden pedir como objeto con ?expand=
+    expandable_fields = {'project': 'ProjectSerializer'}
     class Meta:
         model = Resource
         fields = '__all__'
 
+# --- CARGA MASIVA ---
+
+class BulkResultSerializer(serializers.Serializer):
+    created = serializers.IntegerField(required=False, help_text="Registros insertados (POST).")
+    updated = serializers.IntegerField(required=False, help_text="Registros actualizados (PATCH).")
+    ids = serializers.ListField(child=serializers.IntegerField(), help_text="PKs en el orden del lote.")
+
+class BulkItemErrorSerializer(serializers.Serializer):
+    index = serializers.IntegerField(help_text="Posición del registro en el lote.")
+    errors = serializers.DictField(help_text="Errores de validación por campo.")
+
+class BulkErrorSerializer(serializers.Serializer):
+    error = serializers.CharField()
+    errors = BulkItemErrorSerializer(many=True, required=False)
+
+# --- ÁRBOL DE TAREAS ---
+
+class TaskTreeRollupSerializer(serializers.Serializer):
+    planned_hours = serializers.DecimalField(max_digits=12, decimal_places=2, help_text="Horas planificadas del subárbol.")
+    hours_worked = serializers.DecimalField(max_digits=12, decimal_places=2, help_text="Horas registradas del subárbol.")
+    percent_complete = serializers.FloatField(
+        allow_null=True, help_text="Avance del subárbol ponderado por horas planificadas."
+    )
+    task_count = serializers.IntegerField(help_text="Tareas del subárbol, incluida esta.")
+
+class TaskTreeNodeSerializer(serializers.Serializer):
+    task_id = serializers.IntegerField()
+    name = serializers.CharField(allow_null=True)
+    assigned_to = serializers.IntegerField(allow_null=True)
+    planned_start = serializers.DateField(allow_null=True)
+    planned_end = serializers.DateField(allow_null=True)
+    percent_complete = serializers.IntegerField(allow_null=True)
+    planned_hours = serializers.DecimalField(max_digits=7, decimal_places=2, help_text="Horas planificadas de la tarea.")
+    hours_worked = serializers.DecimalField(max_digits=12, decimal_places=2, help_text="Horas registradas en la tarea.")
+    depth = serializers.IntegerField(help_text="Nivel en el árbol (0 = raíz).")
+    rollup = TaskTreeRollupSerializer()
+
+# Estructura recursiva: cada nodo contiene a sus hijos
+TaskTreeNodeSerializer._declared_fields['children'] = TaskTreeNodeSerializer(many=True)
+
 # --- TOKEN PERSONALIZADO ---
 
 class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
@@ -78,4 +149,22 @@ class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
         token['groups'] = list(user.groups.values_list('name', flat=True))
         token['is_superuser'] = user.is_superuser
 
-        return token
\ No newline at end of file
+        # 3. Sesión: los access tokens que salen de este refresh heredan el claim
+        # y se pueden revocar juntos (core/authentication.py)
+        token['sid'] = token[api_settings.JTI_CLAIM]
+
+        return token
+
+
+class MyTokenRefreshSerializer(TokenRefreshSerializer):
+    def validate(self, attrs):
+        if revocations.is_revoked(self.token_class(attrs['refresh'])):
+            raise InvalidToken('El token fue revocado.')
+        return super().validate(attrs)
+
+
+class TokenRevokeSerializer(serializers.Serializer):
+    all = serializers.BooleanField(
+        default=False,
+        help_text="Si es true se revocan todos los tokens del usuario (todas sus sesiones), no solo la actual."
+    )
@@ -0,0 +1,711 @@
+"""
+Generación vectorizada de datos sintéticos para la base OLTP (``populate_db``).
+
+Cada tabla se genera por columnas con NumPy (fechas, horas, costos y
+categorías de una vez para todo un lote) en lugar de fila por fila, y se
+carga con COPY. Los IDs se asignan en memoria (la carga empieza con las
+tablas vacías y las secuencias reiniciadas), así las claves foráneas de las
+tablas hijas se arman sin ``RETURNING`` y al final solo se ajustan las
+secuencias.
+
+Los tamaños de ``BASE_COUNTS`` se multiplican por ``scale``; tareas, registros
+de tiempo, riesgos y defectos crecen con el número de proyectos. La forma de
+los datos la da un perfil de ``PROFILES`` (uniforme, o con el sesgo de
+producción). Los textos (nombres, correos, descripciones) salen de pools
+generados con Faker una sola vez.
+
+Los proyectos se reparten en particiones de ``PROJECTS_PER_PARTITION``, cada
+una con sus propias semillas derivadas de la principal (``SeedSequence``), así
+que se pueden generar y cargar en paralelo en un pool de procesos y, con la
+misma semilla, perfil y fecha de referencia (``as_of``), los datos son
+idénticos con cualquier número de procesos. Una semilla da la estructura de
+la partición (calendario de las tareas y cuántos registros, riesgos y
+defectos tiene) y otra los valores de las filas: los IDs de cada partición
+salen de los tamaños de las anteriores sin generar sus filas.
+"""
+import io
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from django.db import connections, transaction
+from faker import Faker
+
+from .models import DroppedConstraint
+
+SCHEMA = 'project_mgmt'
+
+# --- PARÁMETROS DE GENERACIÓN ---
+# Cantidades a escala 1 (se multiplican por --scale)
+BASE_COUNTS = {
+    'client': 20,
+    'employee': 50,
+    'project': 40,
+    'resource': 30,
+}
+# Rangos por proyecto / tarea (ambos extremos incluidos) del perfil uniforme
+TASKS_PER_PROJECT = (5, 15)
+TIME_ENTRIES_PER_TASK = (1, 25)
+RISKS_PER_PROJECT = (0, 5)
+DEFECTS_PER_PROJECT = (0, 10)
+# Proporción de tareas que cuelgan de otra tarea anterior del mismo proyecto (EDT)
+SUBTASK_RATIO = 0.6
+# Tope de tareas de un proyecto con tamaños Zipf
+MAX_TASKS_PER_PROJECT = 1500
+# Proyectos por partición (unidad de generación, semilla y COPY)
+PROJECTS_PER_PARTITION = 1000
+# Rondas de re-muestreo de fechas rechazadas por estacionalidad
+SEASONALITY_ROUNDS = 3
+# Tamaño de los pools de textos generados con Faker
+TEXT_POOL_SIZE = 1000
+
+# --- PERFILES DE DISTRIBUCIÓN ---
+# 'uniform' es la generación original (todo uniforme). 'production' imita la
+# forma de los datos reales:
+#   project_size_zipf    tareas por proyecto ~ Zipf(a): muchos proyectos chicos y unos pocos enormes
+#   hot_employees_zipf   peso de cada empleado ~ 1 / rango^s: pocos empleados concentran tareas y horas
+#   assignee_share       proporción de horas que registra el responsable de la tarea
+#   entry_burst          Beta(a, b) de la posición del registro dentro de la tarea (el trabajo se acumula al final)
+#   weekend_ratio        proporción de registros de fin de semana que se quedan ahí (el resto pasa al viernes)
+#   monthly_seasonality  carga relativa por mes (vacaciones de enero, agosto y diciembre)
+#   defect_arrival       'rayleigh': defectos detectados según una curva de Rayleigh con pico en
+#                        defect_peak x duración del proyecto; defects_per_task defectos esperados por tarea
+PROFILES = {
+    'uniform': {
+        'project_size_zipf': None,
+        'hot_employees_zipf': None,
+        'assignee_share': 0.0,
+        'entry_burst': None,
+        'weekend_ratio': 1.0,
+        'monthly_seasonality': None,
+        'defect_arrival': 'uniform',
+    },
+    'production': {
+        'project_size_zipf': 2.0,
+        'hot_employees_zipf': 0.8,
+        'assignee_share': 0.7,
+        'entry_burst': (2.0, 1.3),
+        'weekend_ratio': 0.05,
+        'monthly_seasonality': [0.8, 1.0, 1.05, 1.0, 1.0, 0.95, 0.85, 0.6, 1.0, 1.05, 1.05, 0.7],
+        'defect_arrival': 'rayleigh',
+        'defect_peak': 0.35,
+        'defects_per_task': 0.6,
+    },
+}
+
+# --- DATOS DE DOMINIO ---
+SECTORS = ['Tecnología', 'Finanzas', 'Salud', 'Retail', 'Educación', 'Gobierno']
+ROLES = {
+    "Project Manager": (80, 120),
+    "Senior Developer": (70, 100),
+    "Developer": (40, 65),
+    "QA Tester": (35, 60),
+    "Business Analyst": (60, 90),
+    "UI/UX Designer": (50, 80)
+}
+PROJECT_STATUSES = ['Planned', 'Active', 'Completed', 'On Hold']
+RISK_STATUSES = ['Open', 'Closed', 'Mitigated']
+TASK_NAMES = [
+    'Análisis de Requisitos', 'Diseño de Arquitectura',
+    'Desarrollo de Módulo de Autenticación', 'Pruebas Unitarias',
+    'Despliegue a Producción', 'Capacitación de Usuario', 'Revisión de Seguridad'
+]
+ACTIVITY_TYPES = ['Desarrollo', 'Reunión', 'Investigación']
+DEFECT_SEVERITY = ['Critico', 'Alto', 'Medio', 'Bajo']
+DEFECT_STATUS = ['Abierto', 'Resuelto', 'Cerrado']
+RESOURCE_TYPES = {
+    'Hardware': ['Servidor Dedicado', 'Cluster GPU', 'Laptop Desarrollo'],
+    'Software': ['Licencia IDE', 'Licencia Project Manager', 'Suscripción Cloud'],
+    'Service': ['Consultoría Externa', 'Soporte AWS', 'Dominio Web']
+}
+
+# Tablas en orden de carga (padres antes que hijas) y columnas del COPY
+TABLES = {
+    'client': ['client_id', 'name', 'sector', 'contact_email'],
+    'employee': ['employee_id', 'name', 'role', 'cost_per_hour', 'start_date', 'available_hours_per_week'],
+    'project': ['project_id', 'client_id', 'name', 'start_date', 'end_date', 'budget', 'status'],
+    'resource': ['resource_id', 'project_id', 'name', 'type', 'cost', 'start_date', 'end_date'],
+    'task': ['task_id', 'project_id', 'name', 'assigned_to', 'planned_start', 'planned_end',
+             'actual_start', 'actual_end', 'percent_complete', 'parent_task', 'planned_hours'],
+    'time_entry': ['entry_id', 'employee_id', 'task_id', 'entry_timestamp', 'hours_worked', 'activity_type'],
+    'risk': ['risk_id', 'project_id', 'description', 'probability', 'impact_score', 'status', 'detected_date'],
+    'defect': ['defect_id', 'project_id', 'task_id', 'detected_by_id', 'resolved_by_id', 'detected_date',
+               'resolved_date', 'description', 'severity', 'status'],
+}
+
+DAY = np.timedelta64(1, 'D')
+NAT = np.datetime64('NaT', 'D')
+
+
+# --- UTILIDADES VECTORIZADAS ---
+
+def _between(rng, low, high, size=None):
+    """Enteros uniformes en [low, high] (admite arreglos)."""
+    return rng.integers(low, np.asarray(high) + 1, size=size)
+
+
+def _dates_between(rng, start, end, size=None):
+    """Fechas uniformes en [start, end] (datetime64[D], escalares o arreglos)."""
+    start = np.asarray(start, dtype='datetime64[D]')
+    span = (np.asarray(end, dtype='datetime64[D]') - start) // DAY
+    return start + _between(rng, 0, span, size) * DAY
+
+
+def _choice(rng, values, size):
+    return np.asarray(values, dtype=object)[rng.integers(0, len(values), size)]
+
+
+def _money(rng, low, high, size):
+    return np.round(rng.uniform(low, high, size), 2)
+
+
+def _nullable_int(values, mask):
+    """Enteros con NULL donde ``mask`` es False."""
+    return pd.arrays.IntegerArray(np.where(mask, values, 0).astype('int64'), ~mask)
+
+
+def _repeat_ranges(counts):
+    """Para cada elemento, su posición dentro de su grupo: [3, 2] -> [0, 1, 2, 0, 1]."""
+    starts = np.cumsum(counts) - counts
+    return np.arange(counts.sum()) - np.repeat(starts, counts)
+
+
+class TextPools:
+    """Textos generados con Faker una sola vez y elegidos al azar con NumPy."""
+
+    def __init__(self, seed, size=TEXT_POOL_SIZE):
+        fake = Faker('es_ES')
+        fake.seed_instance(seed)
+        self.companies = [fake.company() for _ in range(size)]
+        self.emails = [fake.email() for _ in range(size)]
+        self.people = [fake.name() for _ in range(size)]
+        self.project_names = [f"Proyecto {fake.bs().title()}"[:100] for _ in range(size)]
+        self.risk_descriptions = [fake.sentence(nb_words=10) for _ in range(size)]
+        self.defect_descriptions = [fake.sentence(nb_words=15) for _ in range(size)]
+
+
+# --- GENERADOR ---
+
+class SyntheticDataset:
+    """
+    Genera las tablas de project_mgmt como DataFrames con las columnas de
+    ``TABLES``. ``entities()`` devuelve clientes, empleados, proyectos y
+    recursos; ``partition_tables()`` las tablas que dependen de los proyectos
+    de una partición (ver ``partitions()``).
+    """
+
+    def __init__(self, scale=1.0, seed=None, as_of=None, profile='uniform'):
+        self.seed = seed if seed is not None else int(np.random.SeedSequence().entropy % 2**32)
+        self.profile = PROFILES[profile]
+        self.today = np.datetime64(as_of or date.today(), 'D')
+        self.counts = {table: max(1, round(count * scale)) for table, count in BASE_COUNTS.items()}
+        self.texts = TextPools(self.seed)
+        # Distribución acumulada de empleados "calientes" (None = uniforme)
+        self.employee_cdf = None
+
+    def days_ago(self, days):
+        return self.today - days * DAY
+
+    def employees(self, rng, size):
+        """IDs de empleado al azar, con el sesgo del perfil."""
+        if self.employee_cdf is None:
+            return _between(rng, 1, self.counts['employee'], size)
+        return np.searchsorted(self.employee_cdf, rng.random(size), side='right') + 1
+
+    def entities(self):
+        rng = np.random.default_rng(np.random.SeedSequence(self.seed))
+        texts, counts, profile = self.texts, self.counts, self.profile
+
+        n = counts['client']
+        clients = pd.DataFrame({
+            'client_id': np.arange(1, n + 1),
+            'name': _choice(rng, texts.companies, n),
+            'sector': _choice(rng, SECTORS, n),
+            'contact_email': _choice(rng, texts.emails, n),
+        })
+
+        n = counts['employee']
+        roles = _choice(rng, list(ROLES), n)
+        low = np.array([ROLES[role][0] for role in roles])
+        high = np.array([ROLES[role][1] for role in roles])
+        employees = pd.DataFrame({
+            'employee_id': np.arange(1, n + 1),
+            'name': _choice(rng, texts.people, n),
+            'role': roles,
+            'cost_per_hour': np.round(low + rng.random(n) * (high - low), 2),
+            'start_date': _dates_between(rng, self.days_ago(5 * 365), self.days_ago(30), n),
+            'available_hours_per_week': np.full(n, 40.0),
+        })
+        if profile['hot_employees_zipf']:
+            # Los rangos se barajan para que los empleados calientes no sean siempre los primeros IDs
+            weights = 1.0 / np.arange(1, n + 1) ** profile['hot_employees_zipf']
+            cdf = np.cumsum(weights[rng.permutation(n)])
+            self.employee_cdf = cdf / cdf[-1]
+
+        n = counts['project']
+        start = _dates_between(rng, self.days_ago(2 * 365), self.days_ago(90), n)
+        if profile['project_size_zipf']:
+            size = rng.zipf(profile['project_size_zipf'], n) * TASKS_PER_PROJECT[0]
+            task_count = np.minimum(size + rng.integers(0, TASKS_PER_PROJECT[0], n), MAX_TASKS_PER_PROJECT)
+        else:
+            task_count = _between(rng, *TASKS_PER_PROJECT, n)
+        projects = pd.DataFrame({
+            'project_id': np.arange(1, n + 1),
+            'client_id': _between(rng, 1, counts['client'], n),
+            'name': _choice(rng, texts.project_names, n),
+            'start_date': start,
+            'end_date': start + _between(rng, 90, 730, n) * DAY,
+            'budget': _between(rng, 15000, 60000, n),
+            'status': _choice(rng, PROJECT_STATUSES, n),
+            # No es columna de la tabla: tareas que tendrá el proyecto
+            'task_count': task_count,
+        })
+
+        n = counts['resource']
+        types = _choice(rng, list(RESOURCE_TYPES), n)
+        start = _dates_between(rng, self.days_ago(365), self.today, n)
+        resources = pd.DataFrame({
+            'resource_id': np.arange(1, n + 1),
+            'project_id': _between(rng, 1, counts['project'], n),
+            'name': [RESOURCE_TYPES[kind][i] for kind, i in zip(types, rng.integers(0, 3, n))],
+            'type': types,
+            'cost': _money(rng, 50, 5000, n),
+            'start_date': start,
+            'end_date': start + _between(rng, 30, 365, n) * DAY,
+        })
+        return {'client': clients, 'employee': employees, 'project': projects, 'resource': resources}
+
+    def partitions(self, projects, size=PROJECTS_PER_PARTITION):
+        """
+        Reparte los proyectos en particiones contiguas. Cada una lleva sus
+        semillas (estructura y valores) y el ID de su primera tarea (los IDs de
+        tarea se conocen de antemano por ``task_count``).
+        """
+        task_count = projects['task_count'].to_numpy()
+        first_task = np.cumsum(task_count) - task_count + 1
+        return [
+            {
+                'index': index,
+                'layout_seed': np.random.SeedSequence(self.seed, spawn_key=(index, 0)),
+                'values_seed': np.random.SeedSequence(self.seed, spawn_key=(index, 1)),
+                'project_id': projects['project_id'].to_numpy()[start:start + size],
+                'start_date': projects['start_date'].to_numpy().astype('datetime64[D]')[start:start + size],
+                'end_date': projects['end_date'].to_numpy().astype('datetime64[D]')[start:start + size],
+                'task_count': task_count[start:start + size],
+                'first_task': int(first_task[start]),
+            }
+            for index, start in enumerate(range(0, len(projects), size))
+        ]
+
+    def entry_dates(self, rng, start, end):
+        """Fechas de registros de tiempo en [start, end] con ráfagas, fines de semana y estacionalidad del perfil."""
+        profile = self.profile
+        span = (end - start) // DAY
+
+        def draw(index):
+            if profile['entry_burst'] is None:
+                return _dates_between(rng, start[index], end[index])
+            position = rng.beta(*profile['entry_burst'], len(index))
+            return start[index] + np.minimum((position * (span[index] + 1)).astype('int64'), span[index]) * DAY
+
+        dates = draw(np.arange(len(start)))
+        if profile['monthly_seasonality']:
+            weights = np.asarray(profile['monthly_seasonality'])
+            weights = weights / weights.max()
+            for _ in range(SEASONALITY_ROUNDS):
+                month = dates.astype('datetime64[M]').astype('int64') % 12
+                rejected = np.flatnonzero(rng.random(len(dates)) > weights[month])
+                if not len(rejected):
+                    break
+                dates[rejected] = draw(rejected)
+        if profile['weekend_ratio'] < 1:
+            # 1970-01-01 fue jueves: 0 = lunes ... 5, 6 = sábado, domingo
+            weekday = (dates.astype('int64') + 3) % 7
+            friday = dates - (weekday - 4) * DAY
+            moved = (weekday >= 5) & (rng.random(len(dates)) >= profile['weekend_ratio']) & (friday >= start)
+            dates = np.where(moved, friday, dates)
+        return dates
+
+    def defect_projects(self, rng, partition):
+        """Índice de proyecto (dentro de la partición) y fecha de detección de cada defecto."""
+        starts, n_projects = partition['start_date'], len(partition['project_id'])
+        if self.profile['defect_arrival'] == 'rayleigh':
+            # Curva de Rayleigh: pocos defectos al inicio, pico en defect_peak de la duración y cola larga
+            counts = rng.poisson(partition['task_count'] * self.profile['defects_per_task'])
+            index = np.repeat(np.arange(n_projects), counts)
+            duration = (partition['end_date'] - starts) // DAY
+            offset = rng.rayleigh(self.profile['defect_peak'] * duration[index]).astype('int64')
+            detected = starts[index] + offset * DAY
+            # Los que caerían después de hoy todavía no se detectaron
+            keep = detected <= self.today
+            return index[keep], detected[keep]
+        counts = _between(rng, *DEFECTS_PER_PROJECT, n_projects)
+        index = np.repeat(np.arange(n_projects), counts)
+        return index, _dates_between(rng, starts[index], self.today)
+
+    def partition_layout(self, partition):
+        """
+        Estructura de una partición, con su semilla propia: calendario y
+        progreso de las tareas, registros de tiempo por tarea, riesgos por
+        proyecto y proyecto y fecha de cada defecto.
+        """
+        rng, today = np.random.default_rng(partition['layout_seed']), self.today
+        tasks_per_project = partition['task_count']
+        n = int(tasks_per_project.sum())
+
+        p_start = np.repeat(partition['start_date'], tasks_per_project)
+        planned_start = _dates_between(rng, p_start, p_start + 90 * DAY)
+        planned_end = planned_start + _between(rng, 7, 60, n) * DAY
+
+        # Progreso simulado: empezada si su inicio planificado ya pasó, la mitad
+        # de las que empezaron antes de hoy ya terminó
+        started = planned_start < today
+        actual_start = np.where(started, planned_start + _between(rng, 0, 5, n) * DAY, NAT)
+        running = started & (actual_start < today)
+        finish = actual_start + _between(rng, 7, 65, n) * DAY
+        done = running & (rng.random(n) > 0.5) & (finish < today)
+        actual_end = np.where(done, finish, NAT)
+        with np.errstate(invalid='ignore'):
+            elapsed = (today - actual_start) // DAY
+            duration = (planned_end - actual_start) // DAY
+        in_progress = running & ~done & (duration > 0)
+        percent = np.where(done, 100, 0)
+        percent[in_progress] = np.minimum(99, elapsed[in_progress] * 100 // duration[in_progress])
+
+        # Registros de tiempo solo en tareas empezadas, hasta hoy o su fin
+        log_end = np.where(done, actual_end, today)
+        has_entries = started & (actual_start <= log_end)
+        defect_project, defect_detected = self.defect_projects(rng, partition)
+        return {
+            'planned_start': planned_start,
+            'planned_end': planned_end,
+            'actual_start': actual_start,
+            'actual_end': actual_end,
+            'percent_complete': percent,
+            'log_end': log_end,
+            'entries_per_task': np.where(has_entries, _between(rng, *TIME_ENTRIES_PER_TASK, n), 0),
+            'risks_per_project': _between(rng, *RISKS_PER_PROJECT, len(partition['project_id'])),
+            'defect_project': defect_project,
+            'defect_detected': defect_detected,
+        }
+
+    def partition_sizes(self, partition):
+        """Registros de tiempo, riesgos y defectos de una partición, sin generar las filas."""
+        layout = self.partition_layout(partition)
+        return {
+            'time_entry': int(layout['entries_per_task'].sum()),
+            'risk': int(layout['risks_per_project'].sum()),
+            'defect': len(layout['defect_project']),
+        }
+
+    def partition_tables(self, partition, first_ids):
+        """
+        Tareas, registros de tiempo, riesgos y defectos de una partición.
+        ``first_ids`` trae el primer ID de registro de tiempo, riesgo y defecto.
+        """
+        layout = self.partition_layout(partition)
+        rng, today, profile = np.random.default_rng(partition['values_seed']), self.today, self.profile
+        project_ids, project_starts = partition['project_id'], partition['start_date']
+
+        # --- Tareas ---
+        tasks_per_project = partition['task_count']
+        n = int(tasks_per_project.sum())
+        task_ids = partition['first_task'] + np.arange(n)
+        position = _repeat_ranges(tasks_per_project)
+        first_task = task_ids - position
+        # Subtarea de una tarea anterior del mismo proyecto (sin ciclos)
+        is_subtask = (position > 0) & (rng.random(n) < SUBTASK_RATIO)
+        parent = first_task + (rng.random(n) * position).astype('int64')
+
+        assigned_to = self.employees(rng, n)
+        tasks = pd.DataFrame({
+            'task_id': task_ids,
+            'project_id': np.repeat(project_ids, tasks_per_project),
+            'name': _choice(rng, TASK_NAMES, n),
+            'assigned_to': assigned_to,
+            'planned_start': layout['planned_start'],
+            'planned_end': layout['planned_end'],
+            'actual_start': layout['actual_start'],
+            'actual_end': layout['actual_end'],
+            'percent_complete': layout['percent_complete'],
+            'parent_task': _nullable_int(parent, is_subtask),
+            'planned_hours': _money(rng, 20.0, 120.0, n),
+        })
+
+        # --- Registros de tiempo ---
+        entries_per_task = layout['entries_per_task']
+        m = int(entries_per_task.sum())
+        task_index = np.repeat(np.arange(n), entries_per_task)
+        entry_date = self.entry_dates(rng, layout['actual_start'][task_index], layout['log_end'][task_index])
+        # Hora del día dentro de la jornada (08:00 a 18:00)
+        timestamp = entry_date.astype('datetime64[s]') + rng.integers(8 * 3600, 18 * 3600, m).astype('timedelta64[s]')
+        by_assignee = rng.random(m) < profile['assignee_share']
+        time_entries = pd.DataFrame({
+            'entry_id': first_ids['time_entry'] + np.arange(m),
+            'employee_id': np.where(by_assignee, assigned_to[task_index], self.employees(rng, m)),
+            'task_id': task_ids[task_index],
+            'entry_timestamp': timestamp,
+            'hours_worked': _money(rng, 1, 8, m),
+            'activity_type': _choice(rng, ACTIVITY_TYPES, m),
+        })
+
+        # --- Riesgos ---
+        risks_per_project = layout['risks_per_project']
+        r = int(risks_per_project.sum())
+        r_start = np.repeat(project_starts, risks_per_project)
+        risks = pd.DataFrame({
+            'risk_id': first_ids['risk'] + np.arange(r),
+            'project_id': np.repeat(project_ids, risks_per_project),
+            'description': _choice(rng, self.texts.risk_descriptions, r),
+            'probability': np.round(rng.random(r), 2),
+            'impact_score': _between(rng, 1, 10, r),
+            'status': _choice(rng, RISK_STATUSES, r),
+            'detected_date': _dates_between(rng, r_start, today),
+        })
+
+        # --- Defectos (sobre una tarea del mismo proyecto) ---
+        project_index, detected = layout['defect_project'], layout['defect_detected']
+        d = len(project_index)
+        first_task_of_project = partition['first_task'] + np.cumsum(tasks_per_project) - tasks_per_project
+        defect_task = (
+            first_task_of_project[project_index]
+            + (rng.random(d) * tasks_per_project[project_index]).astype('int64')
+        )
+        status = _choice(rng, DEFECT_STATUS, d)
+        resolved = status != 'Abierto'
+        resolved_date = np.where(resolved, _dates_between(rng, detected, today), NAT)
+        defects = pd.DataFrame({
+            'defect_id': first_ids['defect'] + np.arange(d),
+            'project_id': project_ids[project_index],
+            'task_id': defect_task,
+            'detected_by_id': self.employees(rng, d),
+            'resolved_by_id': _nullable_int(self.employees(rng, d), resolved),
+            'detected_date': detected,
+            'resolved_date': resolved_date,
+            'description': _choice(rng, self.texts.defect_descriptions, d),
+            'severity': _choice(rng, DEFECT_SEVERITY, d),
+            'status': status,
+        })
+
+        return {'task': tasks, 'time_entry': time_entries, 'risk': risks, 'defect': defects}
+
+
+# --- CARGA CON COPY ---
+
+FOREIGN_KEYS_SQL = """
+    SELECT conrelid::regclass::text, conname, pg_get_constraintdef(oid)
+    FROM pg_constraint
+    WHERE contype = 'f' AND conrelid = ANY(%s::regclass[])
+"""
+
+# Índices secundarios (los que no respaldan una PK o UNIQUE)
+SECONDARY_INDEXES_SQL = """
+    SELECT i.indrelid::regclass::text, i.indexrelid::regclass::text, pg_get_indexdef(i.indexrelid)
+    FROM pg_index i
+    WHERE i.indrelid = ANY(%s::regclass[])
+      AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid)
+"""
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
+def _column_text(column):
+    """
+    Valores de una columna como texto del COPY, convertidos por columna (no
+    por celda como ``DataFrame.to_csv``): fechas con ``datetime_as_string``,
+    montos con ``repr`` (ya vienen redondeados a 2 decimales) y NULL como ``\\N``.
+    """
+    values = column.to_numpy()
+    if isinstance(column.dtype, pd.Int64Dtype):
+        mask = column.isna().to_numpy()
+        text = column.to_numpy(dtype='int64', na_value=0).astype(str).astype(object)
+    elif values.dtype.kind == 'M':
+        mask = np.isnat(values)
+        text = np.datetime_as_string(values, unit='s').astype(object)
+    elif values.dtype.kind == 'f':
+        return list(map(repr, values.tolist()))
+    elif values.dtype.kind in 'iub':
+        return list(map(str, values.tolist()))
+    else:
+        text = values.tolist()
+        if any(char in value for value in set(text) for char in '\\\t\n\r'):
+            text = [_escape(value) for value in text]
+        return text
+    text[mask] = '\\N'
+    return text.tolist()
+
+
+def copy_frame(cursor, table, frame):
+    """COPY de un DataFrame (columnas de ``TABLES``) en formato texto."""
+    if frame.empty:
+        return 0
+    columns = [_column_text(frame[name]) for name in TABLES[table]]
+    buffer = io.StringIO('\n'.join(map('\t'.join, zip(*columns))) + '\n')
+    cursor.copy_expert(f"COPY {SCHEMA}.{table} ({', '.join(TABLES[table])}) FROM STDIN", buffer)
+    return len(frame)
+
+
+# --- CARGA EN PARALELO ---
+# Estado de cada proceso del pool (lo fija _init_worker)
+_worker = {}
+
+# Tablas hijas cuyos IDs dependen de lo generado en particiones anteriores
+COUNTED_TABLES = ('time_entry', 'risk', 'defect')
+
+
+def _init_worker(dataset, using):
+    _worker.update(dataset=dataset, using=using)
+
+
+def _load_partition(partition, first_ids):
+    using = _worker['using']
+    try:
+        with transaction.atomic(using=using), connections[using].cursor() as cursor:
+            tables = _worker['dataset'].partition_tables(partition, first_ids)
+            return {table: copy_frame(cursor, table, frame) for table, frame in tables.items()}
+    finally:
+        connections[using].close()
+
+
+def _first_ids(counts):
+    """Primer ID de cada tabla contada para cada partición, en orden."""
+    next_id = dict.fromkeys(COUNTED_TABLES, 1)
+    for rows in counts:
+        yield dict(next_id)
+        for table in COUNTED_TABLES:
+            next_id[table] += rows[table]
+
+
+class Loader:
+    """
+    Carga un ``SyntheticDataset`` en project_mgmt. Vacía las tablas y, como
+    recomienda la documentación de PostgreSQL para cargas masivas, quita las
+    claves foráneas y los índices secundarios durante el COPY y los vuelve a
+    crear al final (una pasada por índice en lugar de una actualización por
+    fila). Sus definiciones se guardan en ``DroppedConstraint`` en la misma
+    transacción que las quita y se borran en la que las restaura: si la carga
+    muere a medias (incluso con SIGKILL), la siguiente restaura también las que
+    quedaron pendientes.
+
+    Con ``workers=1`` todo ocurre en una transacción. Con más procesos, cada
+    partición se genera y carga en su propio proceso y transacción (el
+    vaciado y las entidades se confirman antes); si algo falla, las tablas se
+    vacían y las restricciones se restauran igual.
+    """
+
+    def __init__(self, using='default', workers=1, log=print):
+        self.using = using
+        self.workers = workers
+        self.log = log
+        self.rows = dict.fromkeys(TABLES, 0)
+        self.tables = [f'{SCHEMA}.{table}' for table in TABLES]
+
+    def load(self, dataset):
+        start = time.monotonic()
+        entities = dataset.entities()
+        partitions = dataset.partitions(entities['project'])
+        first_ids = list(_first_ids(dataset.partition_sizes(partition) for partition in partitions))
+        workers = min(self.workers, len(partitions))
+
+        if workers <= 1:
+            with transaction.atomic(using=self.using), connections[self.using].cursor() as cursor:
+                self.prepare(cursor, entities)
+                for partition, ids in zip(partitions, first_ids):
+                    self.add_rows(self.copy_tables(cursor, dataset.partition_tables(partition, ids)), start)
+                self.finish(cursor)
+            return time.monotonic() - start
+
+        with transaction.atomic(using=self.using), connections[self.using].cursor() as cursor:
+            self.prepare(cursor, entities)
+        # Los procesos se crean con fork: no pueden heredar la conexión abierta
+        connections.close_all()
+        self.log(f'Cargando {len(partitions)} particiones con {workers} procesos...')
+        try:
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                     initializer=_init_worker, initargs=(dataset, self.using)) as pool:
+                for rows in pool.map(_load_partition, partitions, first_ids):
+                    self.add_rows(rows, start)
+        except BaseException:
+            with transaction.atomic(using=self.using), connections[self.using].cursor() as cursor:
+                cursor.execute(f"TRUNCATE {', '.join(self.tables)} RESTART IDENTITY CASCADE")
+            self.rows = dict.fromkeys(TABLES, 0)
+            raise
+        finally:
+            with transaction.atomic(using=self.using), connections[self.using].cursor() as cursor:
+                self.finish(cursor)
+        return time.monotonic() - start
+
+    def prepare(self, cursor, entities):
+        """
+        Vacía las tablas, quita claves foráneas e índices secundarios
+        (guardándolos en ``DroppedConstraint``) y carga las entidades.
+        """
+        pending = DroppedConstraint.objects.using(self.using).count()
+        if pending:
+            self.log(f'Una carga anterior no terminó: se restaurarán {pending} índices y claves foráneas que quitó.')
+        cursor.execute(f"TRUNCATE {', '.join(self.tables)} RESTART IDENTITY CASCADE")
+        cursor.execute(FOREIGN_KEYS_SQL, [self.tables])
+        dropped = [
+            DroppedConstraint(kind=DroppedConstraint.FOREIGN_KEY, table=table, name=name, definition=definition)
+            for table, name, definition in cursor.fetchall()
+        ]
+        cursor.execute(SECONDARY_INDEXES_SQL, [self.tables])
+        dropped += [
+            DroppedConstraint(kind=DroppedConstraint.INDEX, table=table, name=name, definition=definition)
+            for table, name, definition in cursor.fetchall()
+        ]
+        for constraint in dropped:
+            if constraint.kind == DroppedConstraint.FOREIGN_KEY:
+                cursor.execute(f'ALTER TABLE {constraint.table} DROP CONSTRAINT {constraint.name}')
+            else:
+                cursor.execute(f'DROP INDEX {constraint.name}')
+        # Si alguien recreó a mano una que seguía pendiente, queda la fila que ya estaba
+        DroppedConstraint.objects.using(self.using).bulk_create(dropped, ignore_conflicts=True)
+        for table, rows in self.copy_tables(cursor, entities).items():
+            self.rows[table] += rows
+
+    def finish(self, cursor):
+        """
+        Recrea los índices y claves foráneas pendientes en ``DroppedConstraint``
+        (los de esta carga y los de una anterior que no terminó), ajusta las
+        secuencias y actualiza las estadísticas.
+        """
+        pending = DroppedConstraint.objects.using(self.using).order_by('id')
+        indexes = [c for c in pending if c.kind == DroppedConstraint.INDEX]
+        foreign_keys = [c for c in pending if c.kind == DroppedConstraint.FOREIGN_KEY]
+        self.log(f'Recreando {len(indexes)} índices y {len(foreign_keys)} claves foráneas...')
+        cursor.execute("SET LOCAL maintenance_work_mem = '512MB'")
+        for index in indexes:
+            cursor.execute(index.definition)
+        for foreign_key in foreign_keys:
+            cursor.execute(
+                f'ALTER TABLE {foreign_key.table} ADD CONSTRAINT {foreign_key.name} {foreign_key.definition}'
+            )
+        pending.delete()
+        for table, columns in TABLES.items():
+            cursor.execute(
+                "SELECT setval(pg_get_serial_sequence(%s, %s), GREATEST(%s, 1), %s)",
+                [f'{SCHEMA}.{table}', columns[0], self.rows[table], self.rows[table] > 0],
+            )
+        for table in self.tables:
+            cursor.execute(f'ANALYZE {table}')
+
+    def copy_tables(self, cursor, tables):
+        return {table: copy_frame(cursor, table, frame) for table, frame in tables.items()}
+
+    def add_rows(self, rows, start):
+        for table, count in rows.items():
+            self.rows[table] += count
+        elapsed = time.monotonic() - start
+        entries = self.rows['time_entry']
+        self.log(
+            f"   > {self.rows['task']:,} tareas, {entries:,} registros de tiempo "
+            f"({entries / max(elapsed, 1e-9):,.0f}/s)"
+        )
@@ -1,3 +1,756 @@
-from django.test import TestCase
+"""
+Pruebas de los endpoints de gestión contra PostgreSQL.
 
-# Create your tests here.
+Los modelos de gestion_oltp no son administrados (el esquema project_mgmt ya
+existe en la base real), así que ``OLTPTestCase`` crea las tablas en la base
+de pruebas como en producción: sin índices en las claves foráneas, solo los
+de ``manage.py gestion_indexes``. Los datos se generan en SQL con
+generate_series.
+"""
+import json
+import unittest
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest import mock
+
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from gestion_oltp import tree
+from gestion_oltp.fastlist import FastListMixin
+from gestion_oltp.management.commands.gestion_indexes import INDEXES, SCHEMA, explain_nodes, page_query
+from gestion_oltp.models import Defect, Project, Resource, TimeEntry
+from gestion_oltp.pagination import KeysetPagination
+from gestion_oltp.views import DefectViewSet, RiskViewSet, TaskViewSet, TimeEntryViewSet
+
+# Filas por tabla ({n_*}) e historia en días ({n_days}) como parámetros de tamaño.
+# Las PK van explícitas: las secuencias no vuelven atrás con el rollback de cada clase
+SEED_SQL = [
+    """
+    INSERT INTO project_mgmt.client (client_id, name, sector)
+    SELECT i, 'Cliente ' || i, 'Sector ' || i % 5 FROM generate_series(1, {n_clients}) i
+    """,
+    """
+    INSERT INTO project_mgmt.employee (employee_id, name, role, cost_per_hour, start_date, available_hours_per_week)
+    SELECT i, 'Empleado ' || i, (ARRAY['Developer', 'QA Engineer', 'Project Manager'])[i % 3 + 1],
+           30 + i % 50, DATE '2020-01-01' + i, 40
+    FROM generate_series(1, {n_employees}) i
+    """,
+    """
+    INSERT INTO project_mgmt.project (project_id, client_id, name, start_date, end_date, budget, status)
+    SELECT i, i % {n_clients} + 1, 'Proyecto ' || i, DATE '2023-01-01' + i * 5, DATE '2024-01-01' + i * 5,
+           100000 + i, (ARRAY['Active', 'Completed', 'On Hold'])[i % 3 + 1]
+    FROM generate_series(1, {n_projects}) i
+    """,
+    # Grupos de cuatro tareas del mismo proyecto: la primera es la madre de las otras tres
+    """
+    INSERT INTO project_mgmt.task (task_id, project_id, name, assigned_to, planned_start, planned_end,
+                                   percent_complete, parent_task, planned_hours)
+    SELECT i, (i - 1) / 4 % {n_projects} + 1, 'Tarea ' || i, i % {n_employees} + 1,
+           DATE '2017-01-01' + i * 37 % {n_days}, DATE '2017-01-31' + i * 37 % {n_days},
+           i % 101, CASE WHEN (i - 1) % 4 > 0 THEN i - (i - 1) % 4 END, 8 + i % 40
+    FROM generate_series(1, {n_tasks}) i
+    """,
+    """
+    INSERT INTO project_mgmt.time_entry (entry_id, employee_id, task_id, entry_timestamp, hours_worked, activity_type)
+    SELECT i, i % {n_employees} + 1, i % {n_tasks} + 1,
+           TIMESTAMPTZ '2017-01-01 09:00+00' + (i * 7919 % {n_days}) * INTERVAL '1 day' + i % 9 * INTERVAL '1 hour',
+           0.25 * (1 + i % 32), (ARRAY['Desarrollo', 'Reunión', 'Pruebas'])[i % 3 + 1]
+    FROM generate_series(1, {n_entries}) i
+    """,
+    """
+    INSERT INTO project_mgmt.defect (defect_id, project_id, task_id, detected_by_id, resolved_by_id, detected_date,
+                                     description, severity, status)
+    SELECT i, i % {n_projects} + 1, i % {n_tasks} + 1, i % {n_employees} + 1,
+           CASE WHEN i % 4 >= 2 THEN i * 7 % {n_employees} + 1 END, DATE '2017-01-01' + i * 7919 % {n_days},
+           'Defecto ' || i, (ARRAY['Low', 'Medium', 'High', 'Critical'])[i / 3 % 4 + 1],
+           (ARRAY['Open', 'In Progress', 'Resolved', 'Closed'])[i % 4 + 1]
+    FROM generate_series(1, {n_defects}) i
+    """,
+    """
+    INSERT INTO project_mgmt.risk (risk_id, project_id, description, probability, impact_score, status, detected_date)
+    SELECT i, i % {n_projects} + 1, 'Riesgo ' || i, (i % 100) / 100.0, 1 + i % 10,
+           CASE WHEN i % 20 = 0 THEN 'Open' WHEN i % 20 < 7 THEN 'Mitigated' ELSE 'Closed' END,
+           DATE '2017-01-01' + i * 7919 % {n_days}
+    FROM generate_series(1, {n_risks}) i
+    """,
+    """
+    INSERT INTO project_mgmt.resource (resource_id, project_id, name, type, cost, start_date, end_date)
+    SELECT i, i % {n_projects} + 1, 'Recurso ' || i, (ARRAY['Software', 'Hardware', 'Servicio'])[i % 3 + 1],
+           500 + i, DATE '2023-01-01' + i % 1095, DATE '2023-06-01' + i % 1095
+    FROM generate_series(1, {n_resources}) i
+    """,
+]
+
+TABLES = ['client', 'employee', 'project', 'task', 'time_entry', 'defect', 'risk', 'resource']
+
+
+def create_oltp_schema():
+    """Crea project_mgmt en la base de pruebas (una vez por corrida)."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'CREATE SCHEMA IF NOT EXISTS {SCHEMA}')
+        cursor.execute('SELECT to_regclass(%s)', [f'{SCHEMA}.client'])
+        if cursor.fetchone()[0] is not None:
+            return
+
+    with connection.schema_editor() as editor:
+        for model in apps.get_app_config('gestion_oltp').get_models():
+            if not model._meta.managed:
+                editor.create_model(model)
+
+    with connection.cursor() as cursor:
+        # Como en la base real: sin los índices que Django crea para cada ForeignKey
+        cursor.execute("""
+            SELECT format('DROP INDEX %%I.%%I', schemaname, indexname) FROM pg_indexes i
+            WHERE schemaname = %s
+              AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conname = i.indexname)
+        """, [SCHEMA])
+        for (sql,) in cursor.fetchall():
+            cursor.execute(sql)
+        for table, name, columns in INDEXES:
+            cursor.execute(f'CREATE INDEX {name} ON {SCHEMA}.{table} {columns}')
+
+
+def seed_oltp(**sizes):
+    with connection.cursor() as cursor:
+        for sql in SEED_SQL:
+            cursor.execute(sql.format(**sizes))
+        for table in TABLES:
+            cursor.execute(f'ANALYZE {SCHEMA}.{table}')
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'El esquema project_mgmt requiere PostgreSQL.')
+class OLTPTestCase(APITestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # Fuera de la transacción de la clase: las tablas quedan para toda la corrida
+        create_oltp_schema()
+        super().setUpClass()
+
+
+# --- ÍNDICES DE LOS FILTROS (EXPLAIN) ---
+
+class FilterIndexTests(OLTPTestCase):
+    """
+    Cada filtro de los listados, en la primera página y en una página con
+    cursor, se resuelve con su índice compuesto. Los planes son los del
+    planificador normal (sin desalentar Seq Scan) sobre datos con la forma de
+    producción: diez años de historia, así que la ventana de RANGE_WINDOW de
+    los rangos de fechas es selectiva, y pocos riesgos abiertos.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_oltp(
+            n_clients=20, n_employees=300, n_projects=200, n_tasks=20_000,
+            n_entries=200_000, n_defects=20_000, n_risks=10_000, n_resources=1_000,
+            n_days=3650,
+        )
+
+    def assertUsesIndex(self, viewset, params, expected, where=None):
+        table = viewset.queryset.model._meta.db_table.split('"."')[-1]
+        for with_cursor in (False, True):
+            with self.subTest(cursor=with_cursor):
+                queryset, error = page_query(viewset, params, with_cursor=with_cursor, where=where)
+                self.assertIsNone(error)
+                nodes = explain_nodes(connection, queryset)
+                seq_scans = [n['Relation Name'] for n in nodes if n['Node Type'] == 'Seq Scan']
+                used = [
+                    n['Index Name'] for n in nodes
+                    if n['Node Type'] in ('Index Scan', 'Index Only Scan', 'Bitmap Index Scan')
+                ]
+                self.assertNotIn(table, seq_scans, f'Seq Scan en {table}: índices {used}')
+                self.assertTrue(set(used) & set(expected), f'se esperaba {expected}, el plan usa {used}')
+
+    # Registros de tiempo
+
+    def test_time_entry_task(self):
+        self.assertUsesIndex(TimeEntryViewSet, {'task': 'task_id'}, ['time_entry_task_ts_idx'])
+
+    def test_time_entry_employee(self):
+        self.assertUsesIndex(TimeEntryViewSet, {'employee': 'employee_id'}, ['time_entry_employee_ts_idx'])
+
+    def test_time_entry_project(self):
+        self.assertUsesIndex(
+            TimeEntryViewSet, {'project': 'task__project_id'}, ['time_entry_task_ts_idx', 'time_entry_ts_idx'],
+        )
+
+    def test_time_entry_timestamp_range(self):
+        self.assertUsesIndex(
+            TimeEntryViewSet,
+            {'entry_timestamp_after': 'entry_timestamp', 'entry_timestamp_before': 'entry_timestamp'},
+            ['time_entry_ts_idx'],
+        )
+
+    # Tareas
+
+    def test_task_project(self):
+        self.assertUsesIndex(TaskViewSet, {'project': 'project_id'}, ['task_project_idx'])
+
+    def test_task_employee(self):
+        self.assertUsesIndex(TaskViewSet, {'employee': 'assigned_to'}, ['task_assigned_to_idx'])
+
+    def test_task_planned_start_range(self):
+        self.assertUsesIndex(
+            TaskViewSet, {'planned_start_after': 'planned_start', 'planned_start_before': 'planned_start'},
+            ['task_planned_start_idx'],
+        )
+
+    def test_task_planned_end_range(self):
+        self.assertUsesIndex(
+            TaskViewSet, {'planned_end_after': 'planned_end', 'planned_end_before': 'planned_end'},
+            ['task_planned_end_idx'],
+        )
+
+    # Defectos
+
+    def test_defect_project(self):
+        self.assertUsesIndex(DefectViewSet, {'project': 'project_id'}, ['defect_project_date_idx'])
+
+    def test_defect_task(self):
+        self.assertUsesIndex(DefectViewSet, {'task': 'task_id'}, ['defect_task_date_idx'])
+
+    def test_defect_status(self):
+        self.assertUsesIndex(DefectViewSet, {'status': 'status'}, ['defect_status_date_idx'])
+
+    def test_defect_severity(self):
+        self.assertUsesIndex(DefectViewSet, {'severity': 'severity'}, ['defect_severity_date_idx'])
+
+    def test_defect_detected_date_range(self):
+        self.assertUsesIndex(
+            DefectViewSet, {'detected_date_after': 'detected_date', 'detected_date_before': 'detected_date'},
+            ['defect_date_idx'],
+        )
+
+    # Riesgos
+
+    def test_risk_project(self):
+        self.assertUsesIndex(RiskViewSet, {'project': 'project_id'}, ['risk_project_idx'])
+
+    def test_risk_status(self):
+        # Los riesgos abiertos son pocos: el filtro que se consulta es el selectivo
+        self.assertUsesIndex(RiskViewSet, {'status': 'status'}, ['risk_status_idx'], where={'status': 'Open'})
+
+    def test_risk_detected_date_range(self):
+        self.assertUsesIndex(
+            RiskViewSet, {'detected_date_after': 'detected_date', 'detected_date_before': 'detected_date'},
+            ['risk_detected_date_idx'],
+        )
+
+
+# --- CONSULTAS POR LISTADO (assertNumQueries) ---
+
+class ListQueryCountTests(OLTPTestCase):
+    """
+    Cada listado de gestión cuesta lo mismo con o sin ``?expand=`` /
+    ``?fields=``: la página, EXPLAIN y COUNT (QUERY_BUDGETS). Las páginas
+    tienen 50 filas con relaciones distintas, así que un N+1 sumaría decenas
+    de consultas.
+    """
+    QUERIES = 3
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_oltp(
+            n_clients=60, n_employees=60, n_projects=60, n_tasks=120,
+            n_entries=120, n_defects=120, n_risks=120, n_resources=120,
+            n_days=365,
+        )
+        cls.user = User.objects.create_user('gestion', password='gestion')
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def get_list(self, url):
+        with self.assertNumQueries(self.QUERIES):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(len(response.data['results']), 50)
+        self.assertIsNotNone(response.data['next'])
+        return response.data['results']
+
+    def page_select(self, url):
+        """Columnas (cláusula SELECT) de la consulta de la página."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return queries.captured_queries[0]['sql'].split(' FROM ')[0], response.data['results']
+
+    def test_plain_lists(self):
+        for resource in ('clients', 'projects', 'employees', 'tasks', 'timeentries', 'risks', 'defects', 'resources'):
+            with self.subTest(resource=resource):
+                self.get_list(f'/api/gestion/{resource}/')
+
+    def test_next_page(self):
+        with self.assertNumQueries(self.QUERIES):
+            first = self.client.get('/api/gestion/tasks/?expand=project,assigned_to,parent_task')
+        with self.assertNumQueries(self.QUERIES):
+            second = self.client.get(first.data['next'])
+        self.assertEqual(len(second.data['results']), 50)
+        self.assertIsInstance(second.data['results'][0]['project'], dict)
+
+    def test_task_expand(self):
+        results = self.get_list('/api/gestion/tasks/?expand=project,assigned_to,parent_task')
+        self.assertTrue(all(isinstance(row['project'], dict) for row in results))
+        self.assertTrue(all(isinstance(row['assigned_to'], dict) for row in results))
+        parents = [row['parent_task'] for row in results if row['parent_task'] is not None]
+        self.assertGreater(len({parent['task_id'] for parent in parents}), 10)
+        self.assertGreater(len({row['project']['project_id'] for row in results}), 10)
+
+    def test_task_fields(self):
+        results = self.get_list('/api/gestion/tasks/?fields=task_id,name,planned_end')
+        self.assertEqual(set(results[0]), {'task_id', 'name', 'planned_end'})
+
+    def test_task_fields_and_expand(self):
+        results = self.get_list(
+            '/api/gestion/tasks/?fields=task_id,name,project.name,parent_task.name&expand=project,parent_task'
+        )
+        self.assertEqual(set(results[0]), {'task_id', 'name', 'project', 'parent_task'})
+        self.assertEqual(set(results[0]['project']), {'name'})
+
+    def test_time_entry_expand(self):
+        results = self.get_list('/api/gestion/timeentries/?expand=employee,task.project')
+        self.assertIsInstance(results[0]['task']['project'], dict)
+        self.assertGreater(len({row['task']['task_id'] for row in results}), 10)
+
+    def test_time_entry_fields(self):
+        self.get_list('/api/gestion/timeentries/?fields=entry_id,hours_worked')
+
+    def test_time_entry_fields_and_expand(self):
+        results = self.get_list(
+            '/api/gestion/timeentries/?fields=entry_id,employee.name,task.name,task.project.name'
+            '&expand=employee,task.project'
+        )
+        self.assertEqual(results[0]['task']['project'].keys(), {'name'})
+
+    def test_defect_expand(self):
+        results = self.get_list('/api/gestion/defects/?expand=project,task,detected_by,resolved_by')
+        self.assertTrue(any(row['resolved_by'] is not None for row in results))
+
+    def test_defect_fields_and_expand(self):
+        self.get_list('/api/gestion/defects/?fields=defect_id,status')
+        self.get_list('/api/gestion/defects/?fields=defect_id,task.name,resolved_by.name&expand=task,resolved_by')
+
+    def test_single_relation_lists(self):
+        for resource, relation in (('projects', 'client'), ('risks', 'project'), ('resources', 'project')):
+            with self.subTest(resource=resource):
+                results = self.get_list(f'/api/gestion/{resource}/?expand={relation}')
+                self.assertIsInstance(results[0][relation], dict)
+                self.get_list(f'/api/gestion/{resource}/?fields={relation}')
+                self.get_list(f'/api/gestion/{resource}/?fields={relation}.name&expand={relation}')
+
+    def test_fields_only_columns(self):
+        # Sin el listado rápido (values_list) las columnas las recorta .only()
+        with mock.patch.object(TaskViewSet, 'fast_list', False):
+            select, results = self.page_select('/api/gestion/tasks/?fields=task_id,name')
+        self.assertEqual(set(results[0]), {'task_id', 'name'})
+        self.assertIn('"name"', select)
+        for column in ('planned_hours', 'percent_complete', 'planned_start', 'assigned_to'):
+            self.assertNotIn(f'"{column}"', select)
+
+    def test_fields_and_expand_only_columns(self):
+        select, results = self.page_select('/api/gestion/tasks/?fields=task_id,project.name&expand=project')
+        self.assertEqual(results[0]['project'].keys(), {'name'})
+        for column in ('planned_hours', 'percent_complete', 'budget', 'start_date', 'status'):
+            self.assertNotIn(f'"{column}"', select)
+
+
+# --- LISTADO RÁPIDO (fast_list) ---
+
+# Separadores de línea de JavaScript, controles, comillas, barras, no ASCII y emoji
+ODD_TEXT = 'a\u2028b\u2029c \x01\x1f\x7f\t\r\n "\\/</script> ñ€😀'
+
+
+class FastListTests(OLTPTestCase):
+    """
+    Con ``fast_list`` (values_list + orjson) cada listado devuelve los mismos
+    bytes que el serializer + ``JSONRenderer``: decimales, fechas con zona,
+    FK nulas y textos que los dos renderers podrían escapar distinto.
+    """
+    RESOURCES = ('clients', 'projects', 'employees', 'tasks', 'timeentries', 'risks', 'defects', 'resources')
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_oltp(
+            n_clients=12, n_employees=12, n_projects=12, n_tasks=24,
+            n_entries=24, n_defects=24, n_risks=24, n_resources=24,
+            n_days=365,
+        )
+        updates = [
+            ("client", "name = %(text)s, sector = NULL, contact_email = %(text)s", "mod(client_id, 3) = 0"),
+            ("employee", "role = %(text)s, cost_per_hour = NULL, available_hours_per_week = 0.5", "mod(employee_id, 3) = 0"),
+            ("employee", "cost_per_hour = 12345678.9, available_hours_per_week = 0", "mod(employee_id, 3) = 1"),
+            ("project", "name = %(text)s, budget = 9999999999.99, start_date = NULL", "mod(project_id, 3) = 0"),
+            ("project", "budget = 0.01, status = ''", "mod(project_id, 3) = 1"),
+            ("task", "name = %(text)s, parent_task = NULL, assigned_to = NULL, planned_hours = NULL", "mod(task_id, 3) = 0"),
+            ("task", "planned_hours = 0, percent_complete = NULL", "mod(task_id, 3) = 1"),
+            ("time_entry", "activity_type = %(text)s, hours_worked = NULL", "mod(entry_id, 3) = 0"),
+            ("time_entry", "entry_timestamp = entry_timestamp + INTERVAL '0.123456 second', hours_worked = 999.99",
+             "mod(entry_id, 3) = 1"),
+            ("risk", "description = %(text)s, probability = NULL, impact_score = NULL", "mod(risk_id, 3) = 0"),
+            ("risk", "probability = 0, description = ''", "mod(risk_id, 3) = 1"),
+            ("defect", "description = %(text)s, task_id = NULL, detected_by_id = NULL", "mod(defect_id, 3) = 0"),
+            ("resource", "name = %(text)s, cost = NULL, end_date = NULL", "mod(resource_id, 3) = 0"),
+            ("resource", "cost = 0.10", "mod(resource_id, 3) = 1"),
+        ]
+        with connection.cursor() as cursor:
+            for table, assignments, where in updates:
+                cursor.execute(f'UPDATE {SCHEMA}.{table} SET {assignments} WHERE {where}', {'text': ODD_TEXT})
+        cls.user = User.objects.create_user('rapido', password='rapido')
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def render(self, url, fast):
+        with mock.patch.object(FastListMixin, 'fast_list', fast):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        # Que cada respuesta haya salido por el camino que se quiere comparar
+        self.assertEqual(response.renderer_context['view'].fast_json, fast)
+        return response.content
+
+    def assertSameBytes(self, url):
+        content = self.render(url, True)
+        self.assertEqual(content, self.render(url, False))
+        return content
+
+    def test_lists_render_same_bytes(self):
+        for resource in self.RESOURCES:
+            with self.subTest(resource=resource):
+                content = self.assertSameBytes(f'/api/gestion/{resource}/?page_size=100')
+                self.assertEqual(json.loads(content)['count'], len(json.loads(content)['results']))
+
+    def test_odd_text_escaped(self):
+        content = self.assertSameBytes('/api/gestion/clients/?page_size=100')
+        self.assertIn(b'a\\u2028b\\u2029c', content)
+        self.assertIn(ODD_TEXT, [row['name'] for row in json.loads(content)['results']])
+
+    def test_next_page(self):
+        first = json.loads(self.assertSameBytes('/api/gestion/timeentries/?page_size=10'))
+        self.assertSameBytes(first['next'])
+
+    @override_settings(TIME_ZONE='America/Bogota')
+    def test_local_time_zone(self):
+        content = self.assertSameBytes('/api/gestion/timeentries/?page_size=100')
+        timestamps = [row['entry_timestamp'] for row in json.loads(content)['results']]
+        self.assertTrue(all(value.endswith('-05:00') for value in timestamps), timestamps)
+        self.assertTrue(any('.123456' in value for value in timestamps), timestamps)
+
+
+# --- PAGINACIÓN POR CURSOR ---
+
+class KeysetPaginationTests(OLTPTestCase):
+    """
+    Recorrer las páginas devuelve las filas en el orden del queryset, sin
+    perder ni repetir ninguna, también con valores repetidos y NULL en las
+    columnas del orden.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_oltp(
+            n_clients=5, n_employees=5, n_projects=40, n_tasks=0,
+            n_entries=0, n_defects=0, n_risks=0, n_resources=60,
+            n_days=365,
+        )
+        with connection.cursor() as cursor:
+            # Pocas fechas, nombres y costos distintos, con NULL intercalados
+            cursor.execute(f"""
+                UPDATE {SCHEMA}.project SET start_date =
+                    CASE WHEN project_id % 5 = 0 THEN NULL ELSE DATE '2024-01-01' + project_id % 4 END
+            """)
+            cursor.execute(f"""
+                UPDATE {SCHEMA}.resource SET
+                    name = CASE WHEN resource_id % 6 = 0 THEN NULL ELSE 'Recurso ' || resource_id % 3 END,
+                    cost = CASE WHEN resource_id % 4 = 0 THEN NULL ELSE 10.5 * (resource_id % 2) END
+            """)
+        cls.user = User.objects.create_user('paginas', password='paginas')
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def walk(self, queryset, page_size):
+        """PKs de todas las páginas de ``queryset``, siguiendo el enlace ``next``."""
+        paginator, factory = KeysetPagination(), APIRequestFactory()
+        url, pks = f'/api/gestion/?page_size={page_size}', []
+        while url:
+            rows = paginator.paginate_queryset(queryset, Request(factory.get(url)))
+            self.assertLessEqual(len(rows), page_size)
+            pks += [row.pk for row in rows]
+            url = paginator.get_next_link()
+        return pks
+
+    def assertWalks(self, queryset, *ordering):
+        expected = list(queryset.order_by(*ordering).values_list('pk', flat=True))
+        for page_size in (1, 3, 7, len(expected)):
+            with self.subTest(ordering=ordering, page_size=page_size):
+                self.assertEqual(self.walk(queryset, page_size), expected)
+
+    def test_walk_ascending_with_nulls(self):
+        self.assertWalks(Resource.objects.order_by('name'), 'name', 'resource_id')
+
+    def test_walk_descending_with_nulls(self):
+        self.assertWalks(Project.objects.order_by('-start_date'), '-start_date', '-project_id')
+
+    def test_walk_mixed_directions(self):
+        # Dos columnas con NULL y repetidos; el desempate sigue la dirección de la última
+        self.assertWalks(Resource.objects.order_by('name', '-cost'), 'name', '-cost', '-resource_id')
+        self.assertWalks(Resource.objects.order_by('-cost', 'start_date'), '-cost', 'start_date', 'resource_id')
+
+    def test_walk_endpoint(self):
+        url, pks = '/api/gestion/projects/?page_size=6', []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, response.content)
+            pks += [row['project_id'] for row in response.data['results']]
+            url = response.data['next']
+        expected = Project.objects.order_by('-start_date', '-project_id').values_list('pk', flat=True)
+        self.assertEqual(pks, list(expected))
+
+    def test_tampered_cursor(self):
+        paginator = KeysetPagination()
+        ordering = paginator.get_ordering(Project.objects.order_by('-start_date'))
+        cursors = [
+            'no-es-un-cursor',
+            paginator.encode_cursor(['2024-01-02']),  # faltan columnas del orden
+            paginator.encode_cursor(['2024-13-45', 3]),  # fecha inválida
+            paginator.encode_cursor({'start_date': '2024-01-02', 'project_id': 3}),
+        ]
+        self.assertEqual(len(ordering), 2)
+        for cursor in cursors:
+            with self.subTest(cursor=cursor):
+                response = self.client.get(f'/api/gestion/projects/?cursor={cursor}')
+                self.assertEqual(response.status_code, 404, response.content)
+
+    def test_max_page_size(self):
+        # PAGINATION_MAX_PAGE_SIZE
+        with mock.patch.object(KeysetPagination, 'max_page_size', 8):
+            response = self.client.get('/api/gestion/resources/?page_size=1000')
+        self.assertEqual(len(response.data['results']), 8)
+        for page_size in ('0', '-3', 'todas'):
+            with self.subTest(page_size=page_size):
+                response = self.client.get(f'/api/gestion/resources/?page_size={page_size}')
+                self.assertEqual(len(response.data['results']), KeysetPagination.page_size)
+
+    def test_count(self):
+        response = self.client.get('/api/gestion/resources/?page_size=10')
+        self.assertEqual((response.data['count'], response.data['count_is_estimate']), (60, False))
+
+        # Por encima del umbral: la estimación del planificador, sin COUNT(*)
+        with mock.patch.object(KeysetPagination, 'exact_count_threshold', 50), \
+                CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/gestion/resources/?page_size=10')
+        self.assertTrue(response.data['count_is_estimate'])
+        self.assertGreater(response.data['count'], 0)
+        self.assertFalse(any('COUNT(' in query['sql'] for query in queries.captured_queries))
+
+        # Todo en la primera página: ni EXPLAIN ni COUNT
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/gestion/projects/?page_size=100')
+        self.assertEqual((response.data['count'], response.data['count_is_estimate']), (40, False))
+        self.assertEqual(len(queries), 1)
+
+
+# --- CARGA MASIVA (bulk/) ---
+
+class BulkEndpointTests(OLTPTestCase):
+    """
+    ``POST/PATCH <recurso>/bulk/``: todo el lote o nada, con los errores por
+    posición, y las claves foráneas validadas con una consulta por tabla sin
+    importar el tamaño del lote.
+    """
+    URL = '/api/gestion/timeentries/bulk/'
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_oltp(
+            n_clients=2, n_employees=10, n_projects=2, n_tasks=40,
+            n_entries=50, n_defects=4, n_risks=0, n_resources=0,
+            n_days=365,
+        )
+        with connection.cursor() as cursor:
+            # Las semillas llevan PK explícitas: los INSERT sin PK siguen después
+            for table, pk in (('time_entry', 'entry_id'), ('defect', 'defect_id')):
+                cursor.execute(
+                    f"SELECT setval(pg_get_serial_sequence(%s, %s), (SELECT MAX({pk}) FROM {SCHEMA}.{table}))",
+                    [f'{SCHEMA}.{table}', pk],
+                )
+        cls.user = User.objects.create_user('lotes', password='lotes')
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def entry(self, i, **changes):
+        return {
+            'employee': i % 10 + 1, 'task': i % 40 + 1, 'entry_timestamp': f'2024-05-{i % 28 + 1:02d}T10:00:00Z',
+            'hours_worked': '2.50', 'activity_type': 'Desarrollo', **changes,
+        }
+
+    def send(self, method, items, url=URL):
+        return getattr(self.client, method)(url, items, format='json')
+
+    def assertRejected(self, response, indexes):
+        """400 con un error por cada posición de ``indexes``; devuelve los errores por posición."""
+        self.assertEqual(response.status_code, 400, response.content)
+        errors = {error['index']: error['errors'] for error in response.data['errors']}
+        self.assertEqual(sorted(errors), indexes)
+        return errors
+
+    def test_create(self):
+        response = self.send('post', [self.entry(1), self.entry(2, hours_worked='8.00')])
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.data['created'], 2)
+        created = TimeEntry.objects.in_bulk(response.data['ids'])
+        self.assertEqual([created[pk].hours_worked for pk in response.data['ids']], [Decimal('2.50'), Decimal('8.00')])
+        self.assertEqual(created[response.data['ids'][0]].employee_id, 2)
+
+    def test_update(self):
+        before = TimeEntry.objects.get(pk=2)
+        response = self.send('patch', [
+            {'entry_id': 1, 'hours_worked': '7.25'},
+            {'entry_id': 2, 'activity_type': 'Pruebas', 'task': 5},
+        ])
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual((response.data['updated'], response.data['ids']), (2, [1, 2]))
+        self.assertEqual(TimeEntry.objects.get(pk=1).hours_worked, Decimal('7.25'))
+        after = TimeEntry.objects.get(pk=2)
+        self.assertEqual((after.activity_type, after.task_id), ('Pruebas', 5))
+        self.assertEqual((after.hours_worked, after.employee_id), (before.hours_worked, before.employee_id))
+
+    def test_create_all_or_nothing(self):
+        count = TimeEntry.objects.count()
+        response = self.send('post', [
+            self.entry(1), self.entry(2, employee=999), self.entry(3), self.entry(4, hours_worked='muchas'),
+            self.entry(5, task='x'),
+        ])
+        errors = self.assertRejected(response, [1, 3, 4])
+        self.assertEqual(set(errors[1]), {'employee'})
+        self.assertEqual(set(errors[3]), {'hours_worked'})
+        self.assertEqual(set(errors[4]), {'task'})
+        self.assertEqual(TimeEntry.objects.count(), count)
+
+    def test_update_all_or_nothing(self):
+        before = TimeEntry.objects.get(pk=1).hours_worked
+        response = self.send('patch', [{'entry_id': 1, 'hours_worked': '9.99'}, {'entry_id': 2, 'task': 999}])
+        self.assertEqual(set(self.assertRejected(response, [1])[1]), {'task'})
+        self.assertEqual(TimeEntry.objects.get(pk=1).hours_worked, before)
+
+    def test_update_unknown_and_duplicate_pks(self):
+        response = self.send('patch', [
+            {'entry_id': 1, 'hours_worked': '1.00'},
+            {'entry_id': 999, 'hours_worked': '1.00'},
+            {'entry_id': 1, 'hours_worked': '2.00'},
+            {'hours_worked': '3.00'},
+            {'entry_id': 'uno', 'hours_worked': '3.00'},
+        ])
+        errors = self.assertRejected(response, [1, 2, 3, 4])
+        self.assertEqual(errors[1], {'entry_id': ['El registro no existe.']})
+        self.assertEqual(errors[2], {'entry_id': ['Registro repetido en el lote.']})
+        self.assertEqual(errors[3], {'entry_id': ['El registro no existe.']})
+        self.assertEqual(errors[4], {'entry_id': ['El registro no existe.']})
+
+    def test_non_dict_items(self):
+        for method, valid in (('post', self.entry(1)), ('patch', {'entry_id': 1, 'hours_worked': '1.00'})):
+            with self.subTest(method=method):
+                self.assertRejected(self.send(method, [valid, 5, 'registro', None, [1]]), [1, 2, 3, 4])
+        for body in ({}, [], 'x'):
+            with self.subTest(body=body):
+                response = self.send('post', body)
+                self.assertEqual(response.status_code, 400, response.content)
+                self.assertNotIn('errors', response.data)
+
+    def test_max_items(self):
+        with mock.patch.object(TimeEntryViewSet, 'bulk_max_items', 3):
+            response = self.send('post', [self.entry(i) for i in range(4)])
+        self.assertEqual(response.status_code, 400, response.content)
+        self.assertIn('máximo de 3', response.data['error'])
+
+    def queries(self, method, items, url=URL, status=200):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.send(method, items, url)
+        self.assertEqual(response.status_code, status, response.content)
+        return [query['sql'] for query in queries.captured_queries]
+
+    def assertConstantQueries(self, method, make_items, url=URL, status=200):
+        """Mismas consultas con 2 y con 40 registros; devuelve las del lote grande."""
+        small = self.queries(method, make_items(range(2)), url, status)
+        large = self.queries(method, make_items(range(2, 42)), url, status)
+        self.assertEqual(len(small), len(large), large)
+        return large
+
+    def lookups(self, sql, table):
+        """Consultas que cargan filas de ``table`` para validar claves foráneas."""
+        return sum(q.startswith(f'SELECT "{SCHEMA}"."{table}".') for q in sql)
+
+    def test_create_checks_relations_by_set(self):
+        sql = self.assertConstantQueries('post', lambda ids: [self.entry(i) for i in ids], status=201)
+        for table in ('employee', 'task'):
+            self.assertEqual(self.lookups(sql, table), 1, sql)
+
+    def test_update_checks_relations_by_set(self):
+        sql = self.assertConstantQueries(
+            'patch', lambda ids: [{'entry_id': i + 1, 'employee': i % 10 + 1} for i in ids],
+        )
+        self.assertEqual(self.lookups(sql, 'employee'), 1, sql)
+
+    def test_defects_check_relations_by_set(self):
+        def defects(ids):
+            return [
+                {'project': i % 2 + 1, 'task': i % 40 + 1, 'detected_by': i % 10 + 1, 'resolved_by': (i + 3) % 10 + 1,
+                 'detected_date': '2024-05-01', 'severity': 'Low', 'status': 'Open'}
+                for i in ids
+            ]
+        count = Defect.objects.count()
+        sql = self.assertConstantQueries('post', defects, url='/api/gestion/defects/bulk/', status=201)
+        # detected_by y resolved_by son dos campos sobre employee: una consulta cada uno
+        for table, expected in (('project', 1), ('task', 1), ('employee', 2)):
+            self.assertEqual(self.lookups(sql, table), expected, sql)
+        self.assertEqual(Defect.objects.count(), count + 42)
+
+
+# --- CACHÉ DEL ÁRBOL DE TAREAS ---
+
+class TaskTreeCacheTests(OLTPTestCase):
+    """El árbol vive en la caché compartida y una escritura lo borra para todos los workers."""
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_oltp(
+            n_clients=2, n_employees=5, n_projects=2, n_tasks=8,
+            n_entries=16, n_defects=0, n_risks=0, n_resources=0,
+            n_days=365,
+        )
+
+    def setUp(self):
+        caches[tree.CACHE_ALIAS].clear()
+
+    def shared_keys(self):
+        # La tabla de la caché compartida: lo que leen los demás workers
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT cache_key FROM django_cache WHERE cache_key LIKE %s", ['%task-tree:%'])
+            return {key.rsplit(':', 1)[1] for (key,) in cursor.fetchall()}
+
+    def test_tree_is_shared(self):
+        tree.project_tree(1)
+        self.assertEqual(self.shared_keys(), {'1'})
+
+    def test_write_invalidates_shared_tree(self):
+        root = tree.project_tree(1)[0]
+        tree.project_tree(2)
+        with self.captureOnCommitCallbacks(execute=True):
+            TimeEntry.objects.create(
+                entry_id=1000, employee_id=1, task_id=root['children'][0]['task_id'],
+                entry_timestamp=datetime(2024, 1, 1, tzinfo=timezone.utc), hours_worked=Decimal('3.00'),
+            )
+        self.assertEqual(self.shared_keys(), {'2'})
+        updated = tree.project_tree(1)[0]
+        self.assertEqual(
+            Decimal(updated['rollup']['hours_worked']), Decimal(root['rollup']['hours_worked']) + 3,
+        )
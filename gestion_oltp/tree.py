@@ -0,0 +1,199 @@
+"""
+Árbol de tareas (EDT) por proyecto con totales acumulados.
+
+Una sola consulta recursiva (``TASK_TREE_SQL``) recorre ``Task.parent_task``
+desde las raíces del proyecto y calcula, para cada nodo, los totales de todo
+su subárbol: horas planificadas, horas trabajadas (``time_entry``) y avance
+ponderado por horas planificadas. Python solo arma la estructura anidada.
+
+El árbol se guarda por proyecto en la caché compartida (``caches['shared']``,
+la misma para todos los workers) y se invalida al escribir tareas o registros
+de tiempo: señales de Django para el ORM, ``bulk_saved`` para los endpoints de
+carga masiva e ``invalidate_tasks`` en la importación por COPY. Con una caché
+por proceso la invalidación solo llegaría al worker que hizo la escritura.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from core.metrics import record_cache
+
+from .bulk import bulk_saved
+from .models import Task, TimeEntry
+
+CACHE_ALIAS = 'shared'
+CACHE_PREFIX = 'task-tree'
+TWO_PLACES = Decimal('0.01')
+
+# Raíces: tareas sin padre o cuyo padre es de otro proyecto. El arreglo ``path``
+# evita ciclos y sirve para acumular cada tarea en todos sus ancestros.
+TASK_TREE_SQL = """
+    WITH RECURSIVE tree AS (
+        SELECT t.task_id, ARRAY[t.task_id] AS path
+        FROM project_mgmt.task t
+        WHERE t.project_id = %(project_id)s
+          AND NOT EXISTS (
+              SELECT 1 FROM project_mgmt.task p
+              WHERE p.task_id = t.parent_task AND p.project_id = t.project_id
+          )
+        UNION ALL
+        SELECT c.task_id, tree.path || c.task_id
+        FROM project_mgmt.task c
+        JOIN tree ON c.parent_task = tree.task_id
+        WHERE c.project_id = %(project_id)s AND c.task_id <> ALL(tree.path)
+    ),
+    worked AS (
+        SELECT te.task_id, SUM(te.hours_worked) AS hours
+        FROM project_mgmt.time_entry te
+        JOIN tree ON tree.task_id = te.task_id
+        GROUP BY te.task_id
+    ),
+    node AS (
+        SELECT tree.task_id, tree.path, t.parent_task, t.name, t.assigned_to,
+               t.planned_start, t.planned_end, t.percent_complete,
+               COALESCE(t.planned_hours, 0) AS planned_hours,
+               COALESCE(w.hours, 0) AS hours_worked
+        FROM tree
+        JOIN project_mgmt.task t ON t.task_id = tree.task_id
+        LEFT JOIN worked w ON w.task_id = tree.task_id
+    ),
+    rollup AS (
+        SELECT a.task_id,
+               SUM(n.planned_hours) AS planned_hours,
+               SUM(n.hours_worked) AS hours_worked,
+               SUM(n.percent_complete * n.planned_hours) FILTER (WHERE n.percent_complete IS NOT NULL) AS weighted,
+               SUM(n.planned_hours) FILTER (WHERE n.percent_complete IS NOT NULL) AS weight,
+               AVG(n.percent_complete) AS average,
+               COUNT(*) AS task_count
+        FROM node n
+        CROSS JOIN LATERAL unnest(n.path) AS a(task_id)
+        GROUP BY a.task_id
+    )
+    SELECT n.task_id, n.parent_task, cardinality(n.path) - 1 AS depth, n.name, n.assigned_to,
+           n.planned_start, n.planned_end, n.percent_complete, n.planned_hours, n.hours_worked,
+           r.planned_hours, r.hours_worked,
+           -- Avance ponderado por horas planificadas; sin horas, promedio simple
+           COALESCE(r.weighted / NULLIF(r.weight, 0), r.average),
+           r.task_count
+    FROM node n
+    JOIN rollup r ON r.task_id = n.task_id
+    ORDER BY n.path
+"""
+
+
+def _hours(value):
+    return f'{Decimal(value).quantize(TWO_PLACES):f}'
+
+
+def _percent(value):
+    return None if value is None else float(Decimal(value).quantize(TWO_PLACES))
+
+
+def cache_key(project_id):
+    return f'{CACHE_PREFIX}:{project_id}'
+
+
+def build_tree(rows):
+    """Filas en orden de ``path`` (padres antes que hijos) -> lista de raíces anidadas."""
+    nodes, roots = {}, []
+    for (task_id, parent_id, depth, name, assigned_to, planned_start, planned_end, percent_complete,
+         planned_hours, hours_worked, total_planned, total_worked, total_percent, task_count) in rows:
+        node = {
+            'task_id': task_id,
+            'name': name,
+            'assigned_to': assigned_to,
+            'planned_start': planned_start.isoformat() if planned_start else None,
+            'planned_end': planned_end.isoformat() if planned_end else None,
+            'percent_complete': percent_complete,
+            'planned_hours': _hours(planned_hours),
+            'hours_worked': _hours(hours_worked),
+            'depth': depth,
+            'rollup': {
+                'planned_hours': _hours(total_planned),
+                'hours_worked': _hours(total_worked),
+                'percent_complete': _percent(total_percent),
+                'task_count': task_count,
+            },
+            'children': [],
+        }
+        nodes[task_id] = node
+        parent = nodes.get(parent_id) if depth else None
+        (parent['children'] if parent is not None else roots).append(node)
+    return roots
+
+
+def project_tree(project_id):
+    """Árbol de tareas del proyecto (lista de raíces), desde la caché si está."""
+    cache = caches[CACHE_ALIAS]
+    key = cache_key(project_id)
+    tree = cache.get(key)
+    record_cache('task_tree', tree is not None)
+    if tree is None:
+        # Siempre del primario: una réplica atrasada dejaría en caché un árbol viejo
+        with connections['default'].cursor() as cursor:
+            cursor.execute(TASK_TREE_SQL, {'project_id': project_id})
+            tree = build_tree(cursor.fetchall())
+        cache.set(key, tree, settings.TASK_TREE_CACHE_SECONDS)
+    return tree
+
+
+def find_node(tree, task_id):
+    stack = list(tree)
+    while stack:
+        node = stack.pop()
+        if node['task_id'] == task_id:
+            return node
+        stack.extend(node['children'])
+    return None
+
+
+# --- INVALIDACIÓN ---
+
+def invalidate_projects(project_ids):
+    keys = [cache_key(project_id) for project_id in set(project_ids) if project_id is not None]
+    if keys:
+        # Después del commit: antes, otra petición podría volver a guardar el árbol viejo
+        transaction.on_commit(lambda: caches[CACHE_ALIAS].delete_many(keys))
+
+
+def invalidate_tasks(task_ids):
+    """Invalida los proyectos de estas tareas (una consulta)."""
+    task_ids = {task_id for task_id in task_ids if task_id is not None}
+    if task_ids:
+        invalidate_projects(
+            Task.objects.using('default').filter(pk__in=task_ids).values_list('project_id', flat=True).distinct()
+        )
+
+
+@receiver(post_init, sender=Task)
+@receiver(post_init, sender=TimeEntry)
+def remember_tree_keys(sender, instance, **kwargs):
+    # Valores con que se cargó la fila, para invalidar también el árbol anterior
+    # si una actualización la mueve (sin leer campos diferidos por .only())
+    instance._tree_keys = (instance.__dict__.get('project_id'), instance.__dict__.get('task_id'))
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def task_changed(sender, instance, **kwargs):
+    invalidate_projects([instance.project_id, instance._tree_keys[0]])
+
+
+@receiver(post_save, sender=TimeEntry)
+@receiver(post_delete, sender=TimeEntry)
+def time_entry_changed(sender, instance, **kwargs):
+    invalidate_tasks([instance.task_id, instance._tree_keys[1]])
+
+
+@receiver(bulk_saved, sender=Task)
+def tasks_bulk_saved(sender, objs, **kwargs):
+    invalidate_projects([obj.project_id for obj in objs] + [obj._tree_keys[0] for obj in objs])
+
+
+@receiver(bulk_saved, sender=TimeEntry)
+def time_entries_bulk_saved(sender, objs, **kwargs):
+    invalidate_tasks([obj.task_id for obj in objs] + [obj._tree_keys[1] for obj in objs])
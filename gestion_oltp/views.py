@@ -1,4 +1,7 @@
 from rest_framework import viewsets, permissions
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from drf_spectacular.utils import extend_schema, extend_schema_view
 from .models import (
     Client, Project, Employee, Task, 
     TimeEntry, Risk, Defect, Resource
@@ -7,12 +10,33 @@ from .serializers import (
     ClientSerializer, ProjectSerializer, EmployeeSerializer, TaskSerializer,
     TimeEntrySerializer, RiskSerializer, DefectSerializer, ResourceSerializer
 )
-from rest_framework_simplejwt.views import TokenObtainPairView
-from .serializers import MyTokenObtainPairSerializer
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework.views import APIView
+from core.authentication import revocations
+from .serializers import MyTokenObtainPairSerializer, MyTokenRefreshSerializer, TokenRevokeSerializer
+from .serializers import BulkResultSerializer, BulkErrorSerializer, TaskTreeNodeSerializer
+from .bulk import BulkMixin
+from .fastlist import FastListMixin
+from .filters import DefectFilter, RiskFilter, TaskFilter, TimeEntryFilter
+from . import tree
 
 # El permiso IsAuthenticated asegura que solo usuarios logueados puedan usar la API
 
-class ClientViewSet(viewsets.ModelViewSet):
+
+def bulk_schema(serializer_class, resource):
+    return extend_schema_view(bulk=extend_schema(
+        request=serializer_class(many=True),
+        responses={200: BulkResultSerializer, 201: BulkResultSerializer, 400: BulkErrorSerializer},
+        summary=f"Crear (POST) o actualizar (PATCH) {resource} en lote",
+        description=(
+            "Recibe una lista de registros (en PATCH cada uno con su PK). Se valida todo el lote "
+            "y se guarda en una sola transacción: si algún registro tiene errores no se guarda "
+            "ninguno y se devuelven los errores por posición."
+        ),
+    ))
+
+class ClientViewSet(FastListMixin, viewsets.ModelViewSet):
     """
     API endpoint que permite ver o editar Clientes.
     """
@@ -20,7 +44,7 @@ class ClientViewSet(viewsets.ModelViewSet):
     serializer_class = ClientSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-class ProjectViewSet(viewsets.ModelViewSet):
+class ProjectViewSet(FastListMixin, viewsets.ModelViewSet):
     """
     API endpoint que permite ver o editar Proyectos.
     """
@@ -28,7 +52,24 @@ class ProjectViewSet(viewsets.ModelViewSet):
     serializer_class = ProjectSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-class EmployeeViewSet(viewsets.ModelViewSet):
+    @extend_schema(
+        responses=TaskTreeNodeSerializer(many=True),
+        summary="Árbol de tareas del proyecto con totales acumulados",
+        description=(
+            "Jerarquía completa de tareas (parent_task) en una sola consulta recursiva. Cada nodo "
+            "incluye en 'rollup' las horas planificadas, horas registradas y el avance ponderado "
+            "de todo su subárbol. Se guarda en caché hasta la próxima escritura de tareas o registros de tiempo."
+        ),
+    )
+    @action(detail=True, methods=['get'], url_path='task-tree', pagination_class=None, filter_backends=[])
+    def task_tree(self, request, pk=None):
+        project = self.get_object()
+        try:
+            return Response(tree.project_tree(project.pk))
+        except Exception as e:
+            return Response({"error": str(e)}, status=500)
+
+class EmployeeViewSet(FastListMixin, viewsets.ModelViewSet):
     """
     API endpoint que permite ver o editar Empleados.
     """
@@ -36,39 +77,63 @@ class EmployeeViewSet(viewsets.ModelViewSet):
     serializer_class = EmployeeSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-class TaskViewSet(viewsets.ModelViewSet):
+@bulk_schema(TaskSerializer, 'tareas')
+class TaskViewSet(FastListMixin, BulkMixin, viewsets.ModelViewSet):
     """
     API endpoint que permite ver o editar Tareas.
     """
     queryset = Task.objects.all()
     serializer_class = TaskSerializer
+    filterset_class = TaskFilter
     permission_classes = [permissions.IsAuthenticated]
 
-class TimeEntryViewSet(viewsets.ModelViewSet):
+    @extend_schema(
+        responses=TaskTreeNodeSerializer,
+        summary="Subárbol de una tarea con totales acumulados",
+        description="La tarea con todos sus descendientes anidados (ver projects/{id}/task-tree/).",
+    )
+    @action(detail=True, methods=['get'], pagination_class=None, filter_backends=[])
+    def subtree(self, request, pk=None):
+        task = self.get_object()
+        try:
+            node = tree.find_node(tree.project_tree(task.project_id), task.pk)
+        except Exception as e:
+            return Response({"error": str(e)}, status=500)
+        if node is None:
+            # Solo pasa si parent_task forma un ciclo: la tarea no cuelga de ninguna raíz
+            return Response({"error": "La tarea forma parte de un ciclo en parent_task."}, status=409)
+        return Response(node)
+
+@bulk_schema(TimeEntrySerializer, 'registros de tiempo')
+class TimeEntryViewSet(FastListMixin, BulkMixin, viewsets.ModelViewSet):
     """
     API endpoint que permite ver o editar Registros de Tiempo.
     """
     queryset = TimeEntry.objects.all().order_by('-entry_timestamp')
     serializer_class = TimeEntrySerializer
+    filterset_class = TimeEntryFilter
     permission_classes = [permissions.IsAuthenticated]
 
-class RiskViewSet(viewsets.ModelViewSet):
+class RiskViewSet(FastListMixin, viewsets.ModelViewSet):
     """
     API endpoint que permite ver o editar Riesgos.
     """
     queryset = Risk.objects.all()
     serializer_class = RiskSerializer
+    filterset_class = RiskFilter
     permission_classes = [permissions.IsAuthenticated]
 
-class DefectViewSet(viewsets.ModelViewSet):
+@bulk_schema(DefectSerializer, 'defectos')
+class DefectViewSet(FastListMixin, BulkMixin, viewsets.ModelViewSet):
     """
     API endpoint que permite ver o editar Defectos.
     """
     queryset = Defect.objects.all().order_by('-detected_date')
     serializer_class = DefectSerializer
+    filterset_class = DefectFilter
     permission_classes = [permissions.IsAuthenticated]
 
-class ResourceViewSet(viewsets.ModelViewSet):
+class ResourceViewSet(FastListMixin, viewsets.ModelViewSet):
     """
     API endpoint que permite ver o editar Recursos.
     """
@@ -78,4 +143,34 @@ class ResourceViewSet(viewsets.ModelViewSet):
 
 
 class MyTokenObtainPairView(TokenObtainPairView):
-    serializer_class = MyTokenObtainPairSerializer
\ No newline at end of file
+    serializer_class = MyTokenObtainPairSerializer
+
+
+class MyTokenRefreshView(TokenRefreshView):
+    serializer_class = MyTokenRefreshSerializer
+
+
+class TokenRevokeView(APIView):
+    """
+    Cierra la sesión del token actual (o todas las del usuario con all=true).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    @extend_schema(
+        request=TokenRevokeSerializer,
+        responses={204: None},
+        summary="Revocar tokens (logout)",
+        description=(
+            "Revoca el refresh token de la sesión y todos los access tokens emitidos con él. "
+            "Con all=true revoca todos los tokens vigentes del usuario."
+        ),
+    )
+    def post(self, request):
+        serializer = TokenRevokeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        token = request.auth
+        # Tokens emitidos antes del claim 'sid': solo se puede revocar el propio token
+        session = token.get('sid') or token.get(jwt_settings.JTI_CLAIM)
+        user_ids = [request.user.pk] if serializer.validated_data['all'] else []
+        revocations.revoke(jti=session, user_ids=user_ids)
+        return Response(status=204)
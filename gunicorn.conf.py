@@ -0,0 +1,96 @@
+"""
+Configuración de gunicorn para producción (se lee sola desde la raíz del repo).
+
+    gunicorn                          # WSGI, workers síncronos
+    SERVER_PROFILE=asgi gunicorn      # ASGI con uvicorn (core/asgi.py)
+
+- ``preload_app``: la aplicación se carga y calienta en el master
+  (core/warmup.py) y los workers la heredan con fork, compartiendo páginas
+  copy-on-write en lugar de importar todo cada uno.
+- Cada worker abre sus conexiones y lanza las consultas de los tableros antes
+  de aceptar tráfico, para que la primera petición tenga la latencia normal.
+- ``max_requests`` + ``max_requests_jitter``: cada worker se recicla tras un
+  número aleatorio de peticiones (acota fugas de memoria sin reiniciar todos
+  a la vez).
+
+Variables de entorno:
+    PORT                          puerto (8000)
+    SERVER_PROFILE                wsgi | asgi (wsgi)
+    WEB_CONCURRENCY               workers (2 x CPUs + 1 en wsgi, CPUs en asgi)
+    GUNICORN_THREADS              hilos por worker wsgi; >1 usa gthread (1)
+    GUNICORN_PRELOAD              1 | 0 (1)
+    GUNICORN_MAX_REQUESTS         peticiones antes de reciclar un worker (2000, 0 = nunca)
+    GUNICORN_MAX_REQUESTS_JITTER  variación aleatoria de lo anterior (200)
+    GUNICORN_TIMEOUT              segundos sin respuesta antes de matar un worker (60)
+    GUNICORN_KEEPALIVE            segundos de keep-alive (5)
+    PROMETHEUS_MULTIPROC_DIR      métricas multi-proceso (ver core/metrics.py)
+"""
+import multiprocessing
+import os
+from pathlib import Path
+
+cpus = multiprocessing.cpu_count()
+profile = os.environ.get('SERVER_PROFILE', 'wsgi')
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+if profile == 'asgi':
+    # Un worker ASGI atiende muchas peticiones concurrentes: uno por CPU
+    wsgi_app = 'core.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+    workers = int(os.environ.get('WEB_CONCURRENCY', cpus))
+else:
+    wsgi_app = 'core.wsgi:application'
+    threads = int(os.environ.get('GUNICORN_THREADS', 1))
+    worker_class = 'gthread' if threads > 1 else 'sync'
+    workers = int(os.environ.get('WEB_CONCURRENCY', cpus * 2 + 1))
+
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 200))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+graceful_timeout = 30
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# Heartbeat de los workers en memoria (en contenedores /tmp puede ser disco)
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG') or None
+
+# Con preload el master importa prometheus_client antes de on_starting: el
+# directorio de métricas tiene que existir desde que se lee esta configuración
+multiproc_dir = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+if multiproc_dir:
+    Path(multiproc_dir).mkdir(parents=True, exist_ok=True)
+
+
+# --- HOOKS ---
+
+def on_starting(server):
+    # Los archivos de métricas de una corrida anterior sumarían valores viejos
+    if multiproc_dir:
+        for path in Path(multiproc_dir).glob('*.db'):
+            path.unlink()
+
+
+def when_ready(server):
+    if server.cfg.preload_app:
+        from core.warmup import warm_up
+
+        # En el master no pueden quedar conexiones: los workers las heredarían
+        warm_up(keep_connections=False)
+
+
+def post_worker_init(worker):
+    from core.warmup import warm_up
+
+    # Con gthread o ASGI las conexiones son por hilo: abrirlas aquí no sirve
+    warm_up(keep_connections=worker.cfg.worker_class_str == 'sync')
+
+
+def child_exit(server, worker):
+    if multiproc_dir:
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)